@@ -1,76 +1,190 @@
 from django.contrib import admin
-from .models import Friendship, Follow, Conversation, Message, Group, GroupMembership, GroupPost, GroupPostComment, Notification, Review, Post, PostLike, PostComment, News
+from django.core.paginator import Paginator
+from django.db import connection
+from django.db.models import Max, Q
+from django.utils.functional import cached_property
+from .cache import bump_news_version
+from .models import Friendship, Follow, Conversation, Message, MessageArchive, Group, GroupMembership, GroupPost, GroupPostComment, Notification, Review, Post, PostLike, PostComment, News
+from .search import fts_matches, fts_query
+
+
+# -- великі таблиці --
+# Без фільтрів точний COUNT(*) по мільйонах рядків замінюємо оцінкою:
+# кількість рядків зі sqlite_stat1 (після ANALYZE) або найбільший id.
+ESTIMATED_COUNT_THRESHOLD = 10000
+
+
+def estimated_count(model):
+    if connection.vendor == 'sqlite':
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'sqlite_stat1'")
+            if cursor.fetchone():
+                cursor.execute('SELECT stat FROM sqlite_stat1 WHERE tbl = %s LIMIT 1', [model._meta.db_table])
+                row = cursor.fetchone()
+                if row:
+                    return int(row[0].split()[0])
+    return model._base_manager.aggregate(last=Max('pk'))['last'] or 0
+
+
+class EstimatedCountPaginator(Paginator):
+    @cached_property
+    def count(self):
+        # AliveManager завжди додає свій фільтр, тож порівнюємо з запитом менеджера
+        base = self.object_list.model._default_manager.all().query.where
+        if self.object_list.query.where == base:
+            estimate = estimated_count(self.object_list.model)
+            if estimate > ESTIMATED_COUNT_THRESHOLD:
+                return estimate
+        return super().count
+
+
+class LargeTableAdmin(admin.ModelAdmin):
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+    # текстове поле, яке шукається через FTS-індекс (search.py)
+    fts_search = False
+
+    def get_search_results(self, request, queryset, search_term):
+        if not self.fts_search or not search_term.strip() or connection.vendor != 'sqlite':
+            return super().get_search_results(request, queryset, search_term)
+        # search_fields - точні збіги (username), текст - через FTS замість LIKE '%...%';
+        # запит без жодного слова (напр. "?") дав би порожній MATCH - помилку FTS5
+        condition = Q(pk__in=fts_matches(self.model, search_term)) if fts_query(search_term) else Q()
+        for field in self.search_fields:
+            condition |= Q(**{field.lstrip('=^@'): search_term.strip()})
+        return queryset.filter(condition), False
 
 
 @admin.register(Friendship)
-class FriendshipAdmin(admin.ModelAdmin):
+class FriendshipAdmin(LargeTableAdmin):
     list_display = ['from_user', 'to_user', 'status', 'created_at']
     list_filter = ['status', 'created_at']
+    list_select_related = ['from_user', 'to_user']
+    autocomplete_fields = ['from_user', 'to_user']
 
 @admin.register(Follow)
-class FollowAdmin(admin.ModelAdmin):
+class FollowAdmin(LargeTableAdmin):
     list_display = ['follower', 'following', 'created_at']
+    list_select_related = ['follower', 'following']
+    autocomplete_fields = ['follower', 'following']
 
 @admin.register(Conversation)
-class ConversationAdmin(admin.ModelAdmin):
+class ConversationAdmin(LargeTableAdmin):
     list_display = ['id', 'created_at', 'updated_at']
+    autocomplete_fields = ['participants']
 
 @admin.register(Message)
-class MessageAdmin(admin.ModelAdmin):
+class MessageAdmin(LargeTableAdmin):
     list_display = ['sender', 'conversation', 'content', 'created_at', 'is_read']
-    list_filter = ['is_read', 'created_at']
+    list_filter = ['is_read']
+    list_select_related = ['sender', 'conversation']
+    date_hierarchy = 'created_at'
+    search_fields = ['sender__username']
+    fts_search = True
+    autocomplete_fields = ['sender']
+    raw_id_fields = ['conversation']
+
+    def get_queryset(self, request):
+        # назва чату складається з учасників
+        return super().get_queryset(request).prefetch_related('conversation__participants')
+
+@admin.register(MessageArchive)
+class MessageArchiveAdmin(admin.ModelAdmin):
+    list_display = ['id', 'conversation_id', 'first_id', 'last_id', 'message_count', 'created_at']
+    raw_id_fields = ['conversation']
+    exclude = ['data']
 
 @admin.register(Group)
 class GroupAdmin(admin.ModelAdmin):
     list_display = ['name', 'creator', 'is_private', 'created_at']
     list_filter = ['is_private', 'created_at']
+    list_select_related = ['creator']
+    search_fields = ['name']
+    autocomplete_fields = ['creator']
 
 @admin.register(GroupMembership)
-class GroupMembershipAdmin(admin.ModelAdmin):
+class GroupMembershipAdmin(LargeTableAdmin):
     list_display = ['user', 'group', 'role', 'joined_at']
     list_filter = ['role', 'joined_at']
+    list_select_related = ['user', 'group']
+    autocomplete_fields = ['user', 'group']
 
 @admin.register(GroupPost)
-class GroupPostAdmin(admin.ModelAdmin):
+class GroupPostAdmin(LargeTableAdmin):
     list_display = ['author', 'group', 'content', 'created_at']
     list_filter = ['created_at']
+    list_select_related = ['author', 'group']
+    autocomplete_fields = ['author', 'group']
 
 @admin.register(GroupPostComment)
-class GroupPostCommentAdmin(admin.ModelAdmin):
+class GroupPostCommentAdmin(LargeTableAdmin):
     list_display = ['author', 'post', 'content', 'created_at']
     list_filter = ['created_at']
+    list_select_related = ['author', 'post__author', 'post__group']
+    autocomplete_fields = ['author']
+    raw_id_fields = ['post']
 
 @admin.register(Notification)
-class NotificationAdmin(admin.ModelAdmin):
+class NotificationAdmin(LargeTableAdmin):
     list_display = ['recipient', 'sender', 'notification_type', 'text', 'is_read', 'created_at']
-    list_filter = ['notification_type', 'is_read', 'created_at']
-    search_fields = ['text', 'recipient__username', 'sender__username']
+    list_filter = ['notification_type', 'is_read']
+    list_select_related = ['recipient', 'sender']
+    date_hierarchy = 'created_at'
+    search_fields = ['recipient__username', 'sender__username']
+    fts_search = True
+    autocomplete_fields = ['recipient', 'sender']
 
 @admin.register(Review)
 class ReviewAdmin(admin.ModelAdmin):
     list_display = ['reviewer', 'reviewed_user', 'rating', 'created_at']
     list_filter = ['rating', 'created_at']
+    list_select_related = ['reviewer', 'reviewed_user']
     search_fields = ['reviewer__username', 'reviewed_user__username', 'comment']
+    autocomplete_fields = ['reviewer', 'reviewed_user']
 
 @admin.register(Post)
-class PostAdmin(admin.ModelAdmin):
+class PostAdmin(LargeTableAdmin):
     list_display = ['author', 'content', 'created_at']
-    list_filter = ['created_at']
-    search_fields = ['content', 'author__username']
+    list_select_related = ['author']
+    date_hierarchy = 'created_at'
+    search_fields = ['author__username']
+    fts_search = True
+    autocomplete_fields = ['author']
 
 @admin.register(PostLike)
-class PostLikeAdmin(admin.ModelAdmin):
+class PostLikeAdmin(LargeTableAdmin):
     list_display = ['user', 'post', 'created_at']
-    list_filter = ['created_at']
+    list_select_related = ['user', 'post__author']
+    date_hierarchy = 'created_at'
+    autocomplete_fields = ['user']
+    raw_id_fields = ['post']
 
 @admin.register(PostComment)
-class PostCommentAdmin(admin.ModelAdmin):
+class PostCommentAdmin(LargeTableAdmin):
     list_display = ['author', 'post', 'content', 'created_at']
-    list_filter = ['created_at']
-    search_fields = ['content', 'author__username']
+    list_select_related = ['author', 'post__author']
+    date_hierarchy = 'created_at'
+    search_fields = ['author__username']
+    fts_search = True
+    autocomplete_fields = ['author']
+    raw_id_fields = ['post']
 
 @admin.register(News)
 class NewsAdmin(admin.ModelAdmin):
     list_display = ['title', 'author', 'is_pinned', 'created_at']
     list_filter = ['is_pinned', 'created_at']
-    search_fields = ['title', 'content']
\ No newline at end of file
+    list_select_related = ['author']
+    search_fields = ['title', 'content']
+    autocomplete_fields = ['author']
+
+    def save_model(self, request, obj, form, change):
+        super().save_model(request, obj, form, change)
+        bump_news_version()
+
+    def delete_model(self, request, obj):
+        super().delete_model(request, obj)
+        bump_news_version()
+
+    def delete_queryset(self, request, queryset):
+        super().delete_queryset(request, queryset)
+        bump_news_version()
\ No newline at end of file
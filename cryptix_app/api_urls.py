@@ -0,0 +1,36 @@
+from django.urls import path
+from . import api_views
+
+urlpatterns = [
+    # батч підзапитів
+    path('batch/', api_views.BatchView.as_view(), name='api_batch'),
+
+    # друзі
+    path('friends/requests/', api_views.FriendRequestsView.as_view(), name='api_friend_requests'),
+
+    # стрічка і пости
+    path('feed/', api_views.FeedView.as_view(), name='api_feed'),
+    path('posts/', api_views.PostListCreateView.as_view(), name='api_posts'),
+    path('posts/<int:pk>/', api_views.PostDetailView.as_view(), name='api_post_detail'),
+    path('posts/<int:post_id>/like/', api_views.PostLikeView.as_view(), name='api_post_like'),
+    path('posts/<int:post_id>/comments/', api_views.PostCommentsView.as_view(), name='api_post_comments'),
+
+    # чат
+    path('conversations/', api_views.ConversationsView.as_view(), name='api_conversations'),
+    path('conversations/unread/', api_views.ConversationsUnreadView.as_view(), name='api_conversations_unread'),
+    path('conversations/<int:conversation_id>/messages/', api_views.MessagesView.as_view(), name='api_messages'),
+
+    # сповіщення
+    path('notifications/', api_views.NotificationsView.as_view(), name='api_notifications'),
+    path('notifications/unread/', api_views.NotificationsUnreadView.as_view(), name='api_notifications_unread'),
+    path('notifications/read/', api_views.NotificationsReadView.as_view(), name='api_notifications_read'),
+
+    # групи
+    path('groups/', api_views.GroupsView.as_view(), name='api_groups'),
+    path('groups/<int:group_id>/', api_views.GroupDetailView.as_view(), name='api_group_detail'),
+    path('groups/<int:group_id>/membership/', api_views.GroupMembershipView.as_view(), name='api_group_membership'),
+
+    # профілі
+    path('profiles/me/', api_views.ProfileView.as_view(), name='api_profile_me'),
+    path('profiles/<str:username>/', api_views.ProfileView.as_view(), name='api_profile'),
+]
@@ -0,0 +1,343 @@
+import copy
+from urllib.parse import urlsplit
+
+from django.contrib.auth.models import User
+from django.db import transaction
+from django.db.models import Count, Exists, OuterRef, Prefetch, Q, Subquery
+from django.db.models.functions import Coalesce
+from django.http import QueryDict
+from django.shortcuts import get_object_or_404
+from django.urls import Resolver404, resolve
+from rest_framework import generics, status
+from rest_framework.exceptions import PermissionDenied, ValidationError
+from rest_framework.pagination import CursorPagination
+from rest_framework.response import Response
+from rest_framework.test import force_authenticate
+from rest_framework.throttling import BaseThrottle
+from rest_framework.views import APIView
+
+from .cache import group_roles
+from .deletion import soft_delete_post
+from .events import publish_unread
+from .ratelimit import take_token
+from .models import Profile, Friendship, Follow, Conversation, Message, Group, Post, PostLike, PostComment
+from .serializers import (
+    ProfileSerializer, FriendRequestSerializer, PostSerializer, PostCommentSerializer, ConversationSerializer,
+    MessageSerializer, NotificationSerializer, GroupSerializer,
+)
+from .uploads import queue_image
+from .utils import (
+    get_feed_user_ids, get_profile, like_total, toggle_post_like, add_post_comment, send_message, join_group, leave_group,
+)
+
+
+class NewestFirstPagination(CursorPagination):
+    ordering = ('-created_at', '-id')
+    page_size = 20
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+
+
+class RecentlyUpdatedPagination(NewestFirstPagination):
+    ordering = ('-updated_at', '-id')
+
+
+class RateLimitThrottle(BaseThrottle):
+    """Ті самі ліміти, що й decorators.rate_limited, для POST-запитів API."""
+
+    def allow_request(self, request, view):
+        self.wait_seconds = take_token(view.rate_limit_scope, request) if request.method == 'POST' else 0
+        return not self.wait_seconds
+
+    def wait(self):
+        return self.wait_seconds
+
+
+class RateLimitMixin:
+    rate_limit_scope = None
+
+    def get_throttles(self):
+        return super().get_throttles() + [RateLimitThrottle()]
+
+
+def count_of(queryset, field):
+    rows = queryset.filter(**{field: OuterRef('pk')}).order_by().values(field)
+    return Coalesce(Subquery(rows.annotate(c=Count('pk')).values('c')), 0)
+
+
+def posts_for(user):
+    return Post.objects.select_related('author__profile').only(
+        'id', 'content', 'image', 'created_at',
+        'author__id', 'author__username', 'author__profile__avatar',
+    ).annotate(
+        num_likes=like_total(),
+        num_comments=count_of(PostComment.objects, 'post'),
+        liked=Exists(PostLike.objects.filter(post=OuterRef('pk'), user=user)),
+    )
+
+
+# -- друзі --
+class FriendRequestsView(generics.ListAPIView):
+    serializer_class = FriendRequestSerializer
+    pagination_class = NewestFirstPagination
+
+    def get_queryset(self):
+        return Friendship.objects.filter(
+            to_user=self.request.user, status=Friendship.PENDING
+        ).select_related('from_user__profile').only(
+            'id', 'created_at', 'from_user__id', 'from_user__username', 'from_user__profile__avatar',
+        )
+
+
+# -- стрічка і пости --
+class FeedView(generics.ListAPIView):
+    serializer_class = PostSerializer
+    pagination_class = NewestFirstPagination
+
+    def get_queryset(self):
+        user = self.request.user
+        return posts_for(user).filter(author_id__in=get_feed_user_ids(user))
+
+
+class PostListCreateView(generics.ListCreateAPIView):
+    serializer_class = PostSerializer
+    pagination_class = NewestFirstPagination
+
+    def get_queryset(self):
+        return posts_for(self.request.user).filter(author=self.request.user)
+
+    def perform_create(self, serializer):
+        post = serializer.save(author=self.request.user)
+        queue_image(post, 'image')
+        post.num_likes = post.num_comments = 0
+        post.liked = False
+
+
+class PostDetailView(generics.RetrieveDestroyAPIView):
+    serializer_class = PostSerializer
+
+    def get_queryset(self):
+        return posts_for(self.request.user)
+
+    def perform_destroy(self, post):
+        if post.author_id != self.request.user.id:
+            raise PermissionDenied('Видаляти можна лише власні пости')
+        soft_delete_post(post)
+
+
+class PostLikeView(RateLimitMixin, APIView):
+    rate_limit_scope = 'like'
+
+    def post(self, request, post_id):
+        post = get_object_or_404(Post.objects.select_related('author'), id=post_id)
+        liked = toggle_post_like(post, request.user)
+        return Response({'liked': liked, 'likes_count': post.likes_count()})
+
+
+class PostCommentsView(RateLimitMixin, generics.ListCreateAPIView):
+    serializer_class = PostCommentSerializer
+    pagination_class = NewestFirstPagination
+    rate_limit_scope = 'comment'
+
+    def get_post(self):
+        return get_object_or_404(Post.objects.select_related('author'), id=self.kwargs['post_id'])
+
+    def get_queryset(self):
+        return PostComment.objects.filter(post_id=self.kwargs['post_id']).select_related('author__profile').only(
+            'id', 'content', 'created_at', 'author__id', 'author__username', 'author__profile__avatar',
+        )
+
+    def perform_create(self, serializer):
+        serializer.instance = add_post_comment(self.get_post(), self.request.user, serializer.validated_data['content'])
+
+
+# -- чат --
+class ConversationsView(generics.ListAPIView):
+    serializer_class = ConversationSerializer
+    pagination_class = RecentlyUpdatedPagination
+
+    def get_queryset(self):
+        user = self.request.user
+        newest = Message.objects.filter(conversation=OuterRef('pk')).order_by('-created_at', '-id')
+        return user.conversations.annotate(
+            last_message=Subquery(newest.values('content')[:1]),
+            last_message_at=Subquery(newest.values('created_at')[:1]),
+            unread_count=count_of(Message.objects.filter(is_read=False).exclude(sender=user), 'conversation'),
+        ).prefetch_related(
+            Prefetch('participants', queryset=User.objects.select_related('profile').only('id', 'username', 'profile__avatar'))
+        )
+
+
+class ConversationsUnreadView(APIView):
+    def get(self, request):
+        unread = Message.objects.filter(
+            conversation__participants=request.user, is_read=False
+        ).exclude(sender=request.user).aggregate(
+            messages=Count('id'), conversations=Count('conversation', distinct=True)
+        )
+        return Response(unread)
+
+
+class MessagesView(RateLimitMixin, generics.ListCreateAPIView):
+    serializer_class = MessageSerializer
+    pagination_class = NewestFirstPagination
+    rate_limit_scope = 'message'
+
+    def get_conversation(self):
+        if not hasattr(self, '_conversation'):
+            self._conversation = get_object_or_404(
+                Conversation, id=self.kwargs['conversation_id'], participants=self.request.user
+            )
+        return self._conversation
+
+    def get_queryset(self):
+        return self.get_conversation().messages.only('id', 'sender_id', 'content', 'created_at', 'is_read')
+
+    def list(self, request, *args, **kwargs):
+        self.get_conversation().messages.filter(is_read=False).exclude(sender=request.user).update(is_read=True)
+        return super().list(request, *args, **kwargs)
+
+    def perform_create(self, serializer):
+        conversation = self.get_conversation()
+        other_user = conversation.participants.exclude(id=self.request.user.id).first()
+        serializer.instance = send_message(
+            conversation, self.request.user, other_user, serializer.validated_data['content']
+        )
+
+
+# -- сповіщення --
+class NotificationsView(generics.ListAPIView):
+    serializer_class = NotificationSerializer
+    pagination_class = RecentlyUpdatedPagination
+
+    def get_queryset(self):
+        return self.request.user.notifications.select_related('sender').only(
+            'id', 'notification_type', 'text', 'link', 'is_read', 'actor_count', 'created_at', 'updated_at',
+            'sender__username',
+        )
+
+
+class NotificationsUnreadView(APIView):
+    def get(self, request):
+        return Response({'unread': request.user.notifications.filter(is_read=False).count()})
+
+
+class NotificationsReadView(APIView):
+    def post(self, request):
+        updated = request.user.notifications.filter(is_read=False).update(is_read=True)
+        publish_unread(request.user.id, 0)
+        return Response({'marked': updated})
+
+
+# -- групи --
+class GroupRolesMixin:
+    def get_serializer_context(self):
+        context = super().get_serializer_context()
+        context['group_roles'] = group_roles(self.request.user.id)
+        return context
+
+
+class GroupsView(GroupRolesMixin, generics.ListAPIView):
+    serializer_class = GroupSerializer
+    pagination_class = NewestFirstPagination
+
+    def get_queryset(self):
+        return Group.objects.only(
+            'id', 'name', 'description', 'avatar', 'is_private', 'member_count', 'created_at',
+        )
+
+
+class GroupDetailView(GroupRolesMixin, generics.RetrieveAPIView):
+    serializer_class = GroupSerializer
+    queryset = Group.objects.all()
+    lookup_url_kwarg = 'group_id'
+
+    def get_object(self):
+        group = super().get_object()
+        if group.is_private and group.id not in group_roles(self.request.user.id):
+            raise PermissionDenied('Це приватна група')
+        return group
+
+
+class GroupMembershipView(APIView):
+    def post(self, request, group_id):
+        group = get_object_or_404(Group, id=group_id)
+        if group.is_private:
+            raise PermissionDenied('Неможливо приєднатися до приватної групи')
+        created = join_group(request.user, group)
+        return Response({'joined': True}, status=status.HTTP_201_CREATED if created else status.HTTP_200_OK)
+
+    def delete(self, request, group_id):
+        group = get_object_or_404(Group, id=group_id)
+        if group.creator_id == request.user.id:
+            raise PermissionDenied('Створювач не може покинути групу')
+        leave_group(request.user, group)
+        return Response(status=status.HTTP_204_NO_CONTENT)
+
+
+# -- профілі --
+class ProfileView(APIView):
+    def get(self, request, username=None):
+        if username is None:
+            user, profile = request.user, get_profile(request.user)
+        else:
+            user = get_object_or_404(User, username=username)
+            profile, created = Profile.objects.select_related('user').get_or_create(user=user)
+        profile.friends_count = Friendship.objects.filter(
+            Q(from_user=user) | Q(to_user=user), status=Friendship.ACCEPTED
+        ).count()
+        profile.followers_count = Follow.objects.filter(following=user).count()
+        profile.following_count = Follow.objects.filter(follower=user).count()
+        profile.groups_count = user.joined_groups.count()
+        return Response(ProfileSerializer(profile, context={'request': request}).data)
+
+
+# -- батч --
+# Клієнт при старті отримує кілька ресурсів одним HTTP-запитом. Підзапити
+# виконуються в одній транзакції і з тим самим request.user, тож множини
+# друзів і підписок (utils.get_friend_ids) читаються лише раз.
+
+BATCH_MAX_REQUESTS = 10
+
+
+class BatchView(APIView):
+    def post(self, request):
+        items = request.data.get('requests') if isinstance(request.data, dict) else None
+        if not isinstance(items, list) or not items:
+            raise ValidationError({'requests': 'Очікується непорожній список підзапитів'})
+        if len(items) > BATCH_MAX_REQUESTS:
+            raise ValidationError({'requests': f'Не більше {BATCH_MAX_REQUESTS} підзапитів'})
+
+        with transaction.atomic():
+            responses = [self.run_sub_request(request, item) for item in items]
+        return Response({'responses': responses})
+
+    def run_sub_request(self, request, item):
+        if not isinstance(item, dict) or not isinstance(item.get('path'), str):
+            return self.error(item, 400, 'Підзапит повинен містити path')
+        if item.get('method', 'GET').upper() != 'GET':
+            return self.error(item, 405, 'У батчі дозволені лише GET-запити')
+
+        url = urlsplit(item['path'])
+        try:
+            match = resolve(url.path)
+        except Resolver404:
+            return self.error(item, 404, 'Не знайдено')
+        if not match.url_name or not match.url_name.startswith('api_') or match.url_name == 'api_batch':
+            return self.error(item, 400, 'Підзапит повинен бути адресою API')
+
+        sub_request = copy.copy(request._request)
+        sub_request.method = 'GET'
+        sub_request.path = sub_request.path_info = url.path
+        sub_request.GET = QueryDict(url.query)
+        sub_request.META = {**request._request.META, 'REQUEST_METHOD': 'GET', 'QUERY_STRING': url.query}
+        # користувач уже автентифікований батчем: підзапит не перевіряє пароль
+        # знову і ділить з батчем той самий обʼєкт із запамʼятаними множинами
+        force_authenticate(sub_request, request.user, request.auth)
+
+        response = match.func(sub_request, *match.args, **match.kwargs)
+        return {'id': item.get('id'), 'status': response.status_code, 'body': getattr(response, 'data', None)}
+
+    def error(self, item, status_code, detail):
+        item_id = item.get('id') if isinstance(item, dict) else None
+        return {'id': item_id, 'status': status_code, 'body': {'detail': detail}}
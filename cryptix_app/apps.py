@@ -1,5 +1,16 @@
 from django.apps import AppConfig
+from django.db.models.signals import post_migrate
+
+
+def _ensure_fts_indexes(sender, using, **kwargs):
+    from .search import ensure_fts_indexes
+    ensure_fts_indexes(using)
 
 
 class СryptixAppConfig(AppConfig):
     name = 'cryptix_app'
+
+    def ready(self):
+        # підключає сигнали, що скидають кеш користувача
+        from . import cache  # noqa: F401
+        post_migrate.connect(_ensure_fts_indexes, sender=self)
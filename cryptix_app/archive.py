@@ -0,0 +1,102 @@
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.db import transaction
+from django.db.models import Count
+from django.utils import timezone
+
+from .models import Message, MessageArchive
+
+
+# -- архів повідомлень --
+# Повідомлення, старші за MESSAGE_ARCHIVE_DAYS, переносяться повними блоками
+# по MESSAGE_ARCHIVE_CHUNK у MessageArchive, тож таблиця Message і її індекси
+# (зокрема FTS) містять лише свіже листування. Блок пишеться і рядки
+# видаляються в одній транзакції. Архівні повідомлення вважаються
+# прочитаними: лічильники непрочитаних рахують лише Message.
+
+MESSAGES_PAGE_SIZE = 50
+
+
+def _archive_chunk(conversation_id, cutoff, chunk_size):
+    with transaction.atomic():
+        rows = list(Message.objects.filter(
+            conversation_id=conversation_id, created_at__lt=cutoff
+        ).order_by('id').values(*MessageArchive.FIELDS)[:chunk_size])
+        if len(rows) < chunk_size:
+            return 0
+        MessageArchive.objects.create(
+            conversation_id=conversation_id, first_id=rows[0]['id'], last_id=rows[-1]['id'],
+            message_count=len(rows), data=MessageArchive.pack(rows),
+        )
+        Message.objects.filter(id__in=[row['id'] for row in rows]).delete()
+    return len(rows)
+
+
+def archive_messages(days=None, chunk_size=None, pause=0):
+    days = settings.MESSAGE_ARCHIVE_DAYS if days is None else days
+    chunk_size = chunk_size or settings.MESSAGE_ARCHIVE_CHUNK
+    cutoff = timezone.now() - timedelta(days=days)
+
+    conversation_ids = list(Message.objects.filter(created_at__lt=cutoff).order_by().values(
+        'conversation_id'
+    ).annotate(total=Count('id')).filter(total__gte=chunk_size).values_list('conversation_id', flat=True))
+    result = {'conversations': len(conversation_ids), 'chunks': 0, 'messages': 0}
+    for conversation_id in conversation_ids:
+        while archived := _archive_chunk(conversation_id, cutoff, chunk_size):
+            result['chunks'] += 1
+            result['messages'] += archived
+            if pause:
+                time.sleep(pause)
+    return result
+
+
+def message_page(conversation, before=None, limit=MESSAGES_PAGE_SIZE):
+    """Повідомлення чату від новіших до старіших з id < before і чи є ще старіші.
+
+    Спершу береться таблиця Message, а коли її не вистачає - архівні блоки,
+    по одному за раз.
+    """
+    hot = conversation.messages.select_related('sender').order_by('-id')
+    if before is not None:
+        hot = hot.filter(id__lt=before)
+    page = list(hot[:limit + 1])
+
+    archived = []
+    boundary = page[-1].id if page else before
+    while len(page) + len(archived) <= limit:
+        archives = conversation.archives.order_by('-last_id')
+        if boundary is not None:
+            archives = archives.filter(first_id__lt=boundary)
+        archive = archives.first()
+        if archive is None:
+            break
+        archived += [
+            message for message in reversed(archive.messages()) if boundary is None or message.id < boundary
+        ]
+        boundary = archive.first_id
+
+    if archived:
+        senders = User.objects.in_bulk({message.sender_id for message in archived})
+        for message in archived:
+            message.sender = senders.get(message.sender_id)
+        page += [message for message in archived if message.sender is not None]
+    return page[:limit], len(page) > limit
+
+
+def strip_archived_sender(user_id, conversation_ids):
+    """Прибирає з архівних блоків повідомлення видаленого користувача."""
+    for archive in MessageArchive.objects.filter(conversation_id__in=conversation_ids):
+        kept = [
+            {field: getattr(message, field) for field in MessageArchive.FIELDS}
+            for message in archive.messages() if message.sender_id != user_id
+        ]
+        if not kept:
+            archive.delete()
+        elif len(kept) < archive.message_count:
+            archive.first_id, archive.last_id = kept[0]['id'], kept[-1]['id']
+            archive.message_count = len(kept)
+            archive.data = MessageArchive.pack(kept)
+            archive.save(update_fields=['first_id', 'last_id', 'message_count', 'data'])
@@ -0,0 +1,77 @@
+import atexit
+import logging
+import threading
+
+from django.db import connections
+
+
+logger = logging.getLogger(__name__)
+
+
+# -- буфер відкладеного запису --
+# Накопичує зміни в памʼяті процесу за ключем (останнє значення перемагає)
+# і скидає їх однією пачкою: за таймером, при переповненні або при виході
+# процесу. interval=0 - запис одразу, без буферизації.
+
+class WriteBehindBuffer:
+    def __init__(self, name, flush, interval, max_items):
+        self.name = name
+        self._flush = flush
+        self.interval = interval
+        self.max_items = max_items
+        self._lock = threading.Lock()
+        self._pending = {}
+        self._timer = None
+        atexit.register(self.flush)
+
+    def get(self, key, default=None):
+        with self._lock:
+            return self._pending.get(key, default)
+
+    def pending(self):
+        with self._lock:
+            return dict(self._pending)
+
+    def put(self, key, value):
+        with self._lock:
+            self._pending[key] = value
+            full = len(self._pending) >= self.max_items
+            if not full:
+                self._schedule()
+        if full or not self.interval:
+            self.flush()
+
+    def flush(self):
+        with self._lock:
+            items, self._pending = self._pending, {}
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+        if not items:
+            return 0
+        try:
+            self._flush(items)
+        except Exception:
+            logger.exception('Не вдалося скинути буфер %s, %d змін повернуто', self.name, len(items))
+            with self._lock:
+                for key, value in items.items():
+                    self._pending.setdefault(key, value)
+            raise
+        return len(items)
+
+    def _schedule(self):
+        if self.interval and self._timer is None:
+            self._timer = threading.Timer(self.interval, self._flush_in_background)
+            self._timer.daemon = True
+            self._timer.start()
+
+    def _flush_in_background(self):
+        try:
+            self.flush()
+        except Exception:
+            # зміни вже повернуто в буфер - спробуємо ще раз пізніше
+            with self._lock:
+                self._schedule()
+        finally:
+            # у потоці таймера відкривається власне зʼєднання з БД
+            connections.close_all()
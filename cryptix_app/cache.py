@@ -0,0 +1,244 @@
+import hashlib
+import time
+from datetime import datetime, timezone as dt_timezone
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.contrib.messages import get_messages
+from django.core.cache import cache, caches
+from django.db.models import Count, Max
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from django.middleware.csrf import get_token
+from django.template.loader import render_to_string
+from django.utils.safestring import mark_safe
+
+from .models import GroupMembership, News, Profile
+
+
+# -- версіоновані фрагменти шаблонів --
+# Ключ фрагмента містить лічильник версії обʼєкта; будь-яка зміна обʼєкта
+# збільшує лічильник, тож старі фрагменти просто перестають читатися.
+
+def fragment_cache():
+    return caches['fragments']
+
+
+def _version_key(kind, obj_id):
+    return f'fragver:{kind}:{obj_id}'
+
+
+def _initial_version():
+    # після витіснення ключа версія не повинна збігтися зі старою
+    return time.time_ns()
+
+
+def bump_fragment_version(kind, obj_id):
+    cache = fragment_cache()
+    key = _version_key(kind, obj_id)
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.set(key, _initial_version(), None)
+
+
+def fragment_versions(kind, ids):
+    cache = fragment_cache()
+    keys = {_version_key(kind, obj_id): obj_id for obj_id in set(ids)}
+    found = cache.get_many(keys.keys())
+    versions = {}
+    for key, obj_id in keys.items():
+        if key not in found:
+            version = _initial_version()
+            if not cache.add(key, version, None):
+                version = cache.get(key, version)
+            found[key] = version
+        versions[obj_id] = found[key]
+    return versions
+
+
+def attach_fragment_versions(kind, objects, author_attr='author_id'):
+    """Проставляє obj.fragment_version з урахуванням версії профілю автора."""
+    objects = list(objects)
+    versions = fragment_versions(kind, [obj.id for obj in objects])
+    author_versions = {}
+    if author_attr:
+        author_versions = fragment_versions('profile', [getattr(obj, author_attr) for obj in objects])
+    for obj in objects:
+        obj.fragment_version = f'{versions[obj.id]}.{author_versions.get(getattr(obj, author_attr, None), 0)}'
+    return objects
+
+
+def fragment_user_key(request):
+    """Частина ключа персональних фрагментів.
+
+    Фрагменти містять форми з CSRF-токеном, тому ключ залежить від секрету
+    CSRF, який змінюється при кожному вході.
+    """
+    get_token(request)
+    secret = request.META.get('CSRF_COOKIE', '')
+    digest = hashlib.md5(secret.encode(), usedforsecurity=False).hexdigest()[:12]
+    return f'{request.user.id}:{digest}'
+
+
+def has_pending_messages(request):
+    # 304 не показав би flash-повідомлення, тож такі відповіді не кешуємо
+    return len(get_messages(request)) > 0
+
+
+# -- кеш сторінки новин --
+# news:version - мітка часу останньої зміни новин; news:state - похідний від
+# неї стан (кількість і найновіший updated_at), щоб БД читалась раз на зміну.
+
+NEWS_VERSION_KEY = 'news:version'
+NEWS_STATE_KEY = 'news:state'
+NEWS_HTML_TIMEOUT = 60 * 60 * 24
+
+
+def bump_news_version():
+    previous = cache.get(NEWS_VERSION_KEY, 0)
+    cache.set(NEWS_VERSION_KEY, max(time.time(), previous + 0.001), None)
+    cache.delete(NEWS_STATE_KEY)
+
+
+def news_state():
+    state = cache.get(NEWS_STATE_KEY)
+    if state is not None:
+        return state
+
+    aggregate = News.objects.aggregate(newest=Max('updated_at'), count=Count('id'))
+    newest = aggregate['newest'] or datetime.fromtimestamp(0, dt_timezone.utc)
+    version = cache.get(NEWS_VERSION_KEY)
+    if version is None:
+        version = newest.timestamp()
+        cache.add(NEWS_VERSION_KEY, version, None)
+    state = {
+        'version': version,
+        'count': aggregate['count'],
+        'last_modified': max(newest, datetime.fromtimestamp(version, dt_timezone.utc)),
+    }
+    cache.set(NEWS_STATE_KEY, state, None)
+    return state
+
+
+def news_html():
+    """Відрендерений неперсоналізований список новин."""
+    key = f'news:html:{news_state()["version"]}'
+    html = cache.get(key)
+    if html is None:
+        news_list = News.objects.all().select_related('author')
+        html = render_to_string('cryptix_app/news_list.html', {
+            'news_list': attach_fragment_versions('news', news_list),
+            'is_admin': False,
+            'fragment_user': 'public',
+        })
+        cache.set(key, html, NEWS_HTML_TIMEOUT)
+    return mark_safe(html)
+
+
+def news_etag(request):
+    if has_pending_messages(request):
+        return None
+    state = news_state()
+    raw = f'{state["version"]}:{state["count"]}:{fragment_user_key(request)}'
+    return hashlib.md5(raw.encode(), usedforsecurity=False).hexdigest()
+
+
+def news_last_modified(request):
+    if has_pending_messages(request):
+        return None
+    return news_state()['last_modified']
+
+
+# -- водяні знаки змін для умовних GET --
+# Для кожного користувача зберігаємо час останньої зміни даних певного виду
+# (друзі, підписки, групи, сповіщення). Списки порівнюють їх з If-None-Match /
+# If-Modified-Since ще до основного запиту до БД.
+
+GLOBAL_WATERMARKS = {'groups'}
+
+
+def _watermark_key(kind, user_id=None):
+    if kind in GLOBAL_WATERMARKS:
+        return f'watermark:{kind}'
+    return f'watermark:{kind}:{user_id}'
+
+
+def touch_watermark(kind, *user_ids):
+    now = time.time()
+    if kind in GLOBAL_WATERMARKS:
+        cache.set(_watermark_key(kind), now, None)
+    else:
+        cache.set_many({_watermark_key(kind, user_id): now for user_id in user_ids}, None)
+
+
+def user_watermarks(kinds, user_id):
+    keys = [_watermark_key(kind, user_id) for kind in kinds]
+    found = cache.get_many(keys)
+    for key in keys:
+        if key not in found:
+            now = time.time()
+            if not cache.add(key, now, None):
+                now = cache.get(key, now)
+            found[key] = now
+    return [found[key] for key in keys]
+
+
+# -- ролі користувача в групах --
+# group_id -> role для кожного користувача; перевірка доступу до групи стає
+# пошуком у словнику замість двох запитів.
+
+GROUP_ROLES_TIMEOUT = 60 * 60
+
+
+def _group_roles_key(user_id):
+    return f'group_roles:{user_id}'
+
+
+def group_roles(user_id):
+    key = _group_roles_key(user_id)
+    roles = cache.get(key)
+    if roles is None:
+        # членства видаленої групи живуть до її очищення, але ролей уже не дають
+        roles = dict(GroupMembership.objects.filter(
+            user_id=user_id, group__deleted_at__isnull=True
+        ).values_list('group_id', 'role'))
+        cache.set(key, roles, GROUP_ROLES_TIMEOUT)
+    return roles
+
+
+def forget_group_roles(*user_ids):
+    cache.delete_many([_group_roles_key(user_id) for user_id in user_ids])
+
+
+# -- автентифікований користувач --
+# User разом з профілем за id; middleware.CachedAuthenticationMiddleware
+# читає його замість запиту до auth_user на кожній сторінці.
+
+def _auth_user_key(user_id):
+    return f'auth_user:{user_id}'
+
+
+def cached_auth_user(user_id):
+    key = _auth_user_key(user_id)
+    user = cache.get(key)
+    if user is None:
+        user = User.objects.select_related('profile').filter(pk=user_id).first()
+        if user is None:
+            return None
+        cache.set(key, user, settings.AUTH_USER_CACHE_TIMEOUT)
+    return user
+
+
+def forget_auth_user(*user_ids):
+    cache.delete_many([_auth_user_key(user_id) for user_id in user_ids])
+
+
+@receiver([post_save, post_delete], sender=User)
+def _forget_saved_user(sender, instance, **kwargs):
+    forget_auth_user(instance.pk)
+
+
+@receiver([post_save, post_delete], sender=Profile)
+def _forget_saved_profile(sender, instance, **kwargs):
+    forget_auth_user(instance.user_id)
@@ -0,0 +1,5 @@
+from django.conf import settings
+
+
+def notification_stream(request):
+    return {'notification_stream': settings.NOTIFICATION_STREAM}
@@ -0,0 +1,70 @@
+import hashlib
+import math
+from datetime import datetime, timezone as dt_timezone
+from functools import wraps
+
+from django.http import HttpResponse
+from django.views.decorators.cache import cache_control
+from django.views.decorators.http import condition
+
+from .cache import fragment_user_key, has_pending_messages, user_watermarks
+from .ratelimit import take_token
+
+
+def conditional_on(*kinds, vary_on=None):
+    """Відповідає 304, доки не змінились водяні знаки вказаних видів.
+
+    vary_on(request) - рядок з даними сторінки, що змінюються без водяних
+    знаків (присутність); тоді відповідь перевіряється лише за ETag.
+    """
+
+    def watermarks(request):
+        if not hasattr(request, '_watermarks'):
+            if not request.user.is_authenticated or has_pending_messages(request):
+                request._watermarks = None
+            else:
+                request._watermarks = user_watermarks(kinds, request.user.id)
+        return request._watermarks
+
+    def etag_func(request, *args, **kwargs):
+        marks = watermarks(request)
+        if marks is None:
+            return None
+        parts = [request.get_full_path(), fragment_user_key(request)] + [repr(m) for m in marks]
+        if vary_on is not None:
+            parts.append(vary_on(request))
+        raw = ':'.join(parts)
+        return hashlib.md5(raw.encode(), usedforsecurity=False).hexdigest()
+
+    def last_modified_func(request, *args, **kwargs):
+        marks = watermarks(request)
+        if marks is None or vary_on is not None:
+            return None
+        return datetime.fromtimestamp(max(marks), dt_timezone.utc)
+
+    def decorator(view_func):
+        conditional_view = condition(etag_func=etag_func, last_modified_func=last_modified_func)(view_func)
+        return cache_control(private=True, no_cache=True)(conditional_view)
+
+    return decorator
+
+
+def rate_limited(scope, methods=('POST',)):
+    """429 з Retry-After, коли користувач або IP вичерпали ліміт scope."""
+
+    def decorator(view_func):
+        @wraps(view_func)
+        def wrapper(request, *args, **kwargs):
+            if request.method in methods:
+                wait = take_token(scope, request)
+                if wait:
+                    response = HttpResponse(
+                        'Забагато запитів, спробуйте пізніше', status=429, content_type='text/plain; charset=utf-8'
+                    )
+                    response['Retry-After'] = str(math.ceil(wait))
+                    return response
+            return view_func(request, *args, **kwargs)
+
+        return wrapper
+
+    return decorator
@@ -0,0 +1,223 @@
+import logging
+import time
+from collections import Counter
+
+from django.conf import settings
+from django.contrib.admin.models import LogEntry
+from django.contrib.auth.models import User
+from django.db import connection, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .archive import strip_archived_sender
+from .cache import bump_fragment_version, bump_news_version, forget_auth_user, forget_group_roles, touch_watermark
+from .models import (
+    Profile, Friendship, Follow, Conversation, Message, Group, GroupMembership, GroupPost, GroupPostComment,
+    Notification, NotificationActor, Review, ReviewStats, Post, PostLike, PostLikeCounter, PostScore, PostComment, News, Tombstone,
+)
+from .utils import add_like_delta, adjust_review_stats
+
+
+logger = logging.getLogger(__name__)
+
+
+# -- мʼяке видалення --
+# Власник ховається одразу (deleted_at / is_active) і отримує Tombstone;
+# решту прибирає задача purge_tombstones порціями DELETE ... WHERE id IN (...).
+
+def soft_delete_post(post):
+    with transaction.atomic():
+        Post.all_objects.filter(id=post.id).update(deleted_at=timezone.now())
+        Tombstone.objects.get_or_create(kind=Tombstone.POST, object_id=post.id)
+    bump_fragment_version('post', post.id)
+
+
+def soft_delete_group(group):
+    member_ids = list(GroupMembership.objects.filter(group=group).values_list('user_id', flat=True))
+    with transaction.atomic():
+        Group.all_objects.filter(id=group.id).update(deleted_at=timezone.now())
+        Tombstone.objects.get_or_create(kind=Tombstone.GROUP, object_id=group.id)
+    forget_group_roles(*member_ids)
+    touch_watermark('groups')
+    touch_watermark('memberships', *member_ids)
+
+
+def soft_delete_user(user):
+    now = timezone.now()
+    member_ids = list(GroupMembership.objects.filter(
+        group__creator=user, group__deleted_at__isnull=True
+    ).values_list('user_id', flat=True))
+    with transaction.atomic():
+        User.objects.filter(id=user.id).update(is_active=False)
+        Post.all_objects.filter(author=user, deleted_at__isnull=True).update(deleted_at=now)
+        Group.all_objects.filter(creator=user, deleted_at__isnull=True).update(deleted_at=now)
+        Tombstone.objects.get_or_create(kind=Tombstone.USER, object_id=user.id)
+    forget_auth_user(user.id)
+    forget_group_roles(*member_ids)
+    touch_watermark('groups')
+    touch_watermark('memberships', *member_ids)
+
+
+# -- фонове очищення --
+
+def _raw_delete(model, ids):
+    table = connection.ops.quote_name(model._meta.db_table)
+    column = connection.ops.quote_name(model._meta.pk.column)
+    placeholders = ', '.join(['%s'] * len(ids))
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.execute(f'DELETE FROM {table} WHERE {column} IN ({placeholders})', ids)
+
+
+def _fix_like_counters(ids):
+    for post_id, count in Counter(PostLike.objects.filter(id__in=ids).values_list('post_id', flat=True)).items():
+        add_like_delta(post_id, -count)
+
+
+def _fix_comment_counts(ids):
+    counts = Counter(GroupPostComment.objects.filter(id__in=ids).values_list('post_id', flat=True))
+    for post_id, count in counts.items():
+        GroupPost.objects.filter(id=post_id).update(comment_count=F('comment_count') - count)
+
+
+def _fix_member_counts(ids):
+    memberships = list(GroupMembership.objects.filter(id__in=ids).values_list('group_id', 'user_id'))
+    for group_id, count in Counter(group_id for group_id, user_id in memberships).items():
+        Group.all_objects.filter(id=group_id).update(member_count=F('member_count') - count)
+    forget_group_roles(*{user_id for group_id, user_id in memberships})
+    touch_watermark('groups')
+
+
+def _fix_review_stats(ids):
+    for reviewed_user_id, rating in Review.objects.filter(id__in=ids).values_list('reviewed_user_id', 'rating'):
+        adjust_review_stats(reviewed_user_id, count=-1, total=-rating, **{f'rating_{rating}': -1})
+
+
+def _strip_archives(user_id):
+    def before_delete(ids):
+        Participant = Conversation.participants.through
+        conversation_ids = Participant.objects.filter(id__in=ids).values_list('conversation_id', flat=True)
+        strip_archived_sender(user_id, list(conversation_ids))
+    return before_delete
+
+
+def _post_plan(post_id):
+    # сповіщення про пост отримує лише його автор: фільтр іде індексом
+    # (recipient, notification_type, target_key), а не переглядом усієї таблиці
+    author_id = Post.all_objects.filter(id=post_id).values_list('author_id', flat=True).first()
+    if author_id is None:
+        notifications = Notification.objects.none()
+    else:
+        notifications = Notification.objects.filter(
+            recipient_id=author_id, notification_type__in=[Notification.LIKE, Notification.COMMENT],
+            target_key=f'post:{post_id}',
+        )
+    return [
+        (PostComment.objects.filter(post_id=post_id), None),
+        (PostLike.objects.filter(post_id=post_id), None),
+        (PostLikeCounter.objects.filter(post_id=post_id), None),
+        (PostScore.objects.filter(post_id=post_id), None),
+        (NotificationActor.objects.filter(notification__in=notifications), None),
+        (notifications, None),
+        (Post.all_objects.filter(id=post_id), None),
+    ]
+
+
+def _group_plan(group_id):
+    return [
+        (GroupPostComment.objects.filter(post__group_id=group_id), None),
+        (GroupPost.objects.filter(group_id=group_id), None),
+        (GroupMembership.objects.filter(group_id=group_id), None),
+        (Group.all_objects.filter(id=group_id), None),
+    ]
+
+
+def _user_plan(user_id):
+    Participant = Conversation.participants.through
+    return [
+        # власні пости і групи разом з усім, що в них
+        (PostComment.objects.filter(post__author_id=user_id), None),
+        (PostLike.objects.filter(post__author_id=user_id), None),
+        (PostLikeCounter.objects.filter(post__author_id=user_id), None),
+        (PostScore.objects.filter(post__author_id=user_id), None),
+        (Post.all_objects.filter(author_id=user_id), None),
+        (GroupPostComment.objects.filter(post__group__creator_id=user_id), None),
+        (GroupPost.objects.filter(group__creator_id=user_id), None),
+        (GroupMembership.objects.filter(group__creator_id=user_id), None),
+        (Group.all_objects.filter(creator_id=user_id), None),
+        # активність у чужих постах і групах - з корекцією лічильників
+        (PostComment.objects.filter(author_id=user_id), None),
+        (PostLike.objects.filter(user_id=user_id), _fix_like_counters),
+        (GroupPostComment.objects.filter(post__author_id=user_id), None),
+        (GroupPostComment.objects.filter(author_id=user_id), _fix_comment_counts),
+        (GroupPost.objects.filter(author_id=user_id), None),
+        (GroupMembership.objects.filter(user_id=user_id), _fix_member_counts),
+        # чати, сповіщення, відгуки, звʼязки
+        (Message.objects.filter(sender_id=user_id), None),
+        (Participant.objects.filter(user_id=user_id), _strip_archives(user_id)),
+        (NotificationActor.objects.filter(notification__recipient_id=user_id), None),
+        (NotificationActor.objects.filter(notification__sender_id=user_id), None),
+        (NotificationActor.objects.filter(actor_id=user_id), None),
+        (Notification.objects.filter(recipient_id=user_id), None),
+        (Notification.objects.filter(sender_id=user_id), None),
+        (Review.objects.filter(reviewer_id=user_id), _fix_review_stats),
+        (Review.objects.filter(reviewed_user_id=user_id), None),
+        (ReviewStats.objects.filter(user_id=user_id), None),
+        (Friendship.objects.filter(from_user_id=user_id), None),
+        (Friendship.objects.filter(to_user_id=user_id), None),
+        (Follow.objects.filter(follower_id=user_id), None),
+        (Follow.objects.filter(following_id=user_id), None),
+        (News.objects.filter(author_id=user_id), None, lambda ids: bump_news_version()),
+        (LogEntry.objects.filter(user_id=user_id), None),
+        (User.groups.through.objects.filter(user_id=user_id), None),
+        (User.user_permissions.through.objects.filter(user_id=user_id), None),
+        (Profile.objects.filter(user_id=user_id), None),
+        (User.objects.filter(id=user_id), None),
+    ]
+
+
+PLANS = {
+    Tombstone.POST: _post_plan,
+    Tombstone.GROUP: _group_plan,
+    Tombstone.USER: _user_plan,
+}
+
+
+def purge_tombstone(tombstone, chunk_size, deadline, pause=0):
+    """Видаляє залежні рядки; повертає (видалено, чи завершено)."""
+    deleted = 0
+    for queryset, before_delete, *after_delete in PLANS[tombstone.kind](tombstone.object_id):
+        while True:
+            if time.monotonic() >= deadline:
+                return deleted, False
+            ids = list(queryset.order_by().values_list('pk', flat=True)[:chunk_size])
+            if not ids:
+                break
+            # корекція лічильників і DELETE в одній транзакції: після збою між
+            # ними повторний запуск відняв би ще раз
+            with transaction.atomic():
+                if before_delete is not None:
+                    before_delete(ids)
+                _raw_delete(queryset.model, ids)
+                for hook in after_delete:
+                    hook(ids)
+            deleted += len(ids)
+            if pause:
+                time.sleep(pause)
+    tombstone.delete()
+    return deleted, True
+
+
+def purge_tombstones(chunk_size=None, time_budget=None, pause=0.05):
+    chunk_size = chunk_size or settings.TOMBSTONE_PURGE_CHUNK
+    time_budget = settings.TOMBSTONE_PURGE_BUDGET if time_budget is None else time_budget
+    deadline = time.monotonic() + time_budget
+    result = {'rows': 0, 'finished': 0, 'pending': 0}
+    for tombstone in Tombstone.objects.all():
+        deleted, finished = purge_tombstone(tombstone, chunk_size, deadline, pause)
+        result['rows'] += deleted
+        if not finished:
+            break
+        result['finished'] += 1
+        logger.info('Видалено %s разом з %d залежними рядками', tombstone, deleted)
+    result['pending'] = Tombstone.objects.count()
+    return result
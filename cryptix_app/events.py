@@ -0,0 +1,108 @@
+import asyncio
+import json
+import threading
+
+from django.db import transaction
+
+from .models import Notification
+
+
+# -- локальний pub/sub сповіщень для SSE --
+# Підписники - черги asyncio відкритих SSE-зʼєднань цього процесу. Публікація
+# йде з синхронного коду (потоки воркера), тому події передаються в цикл
+# підписника через call_soon_threadsafe. Між процесами події не ходять:
+# кожен воркер доставляє події лише своїм зʼєднанням. Щоб зʼєднання на
+# іншому воркері не відставало, потік на кожному keepalive перечитує
+# лічильник непрочитаних з БД (views.notifications_stream).
+
+SUBSCRIBER_QUEUE_SIZE = 100
+
+
+class NotificationBroker:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._subscribers = {}
+
+    def subscribe(self, user_id):
+        queue = asyncio.Queue(SUBSCRIBER_QUEUE_SIZE)
+        with self._lock:
+            self._subscribers.setdefault(user_id, set()).add((asyncio.get_running_loop(), queue))
+        return queue
+
+    def unsubscribe(self, user_id, queue):
+        with self._lock:
+            subscribers = self._subscribers.get(user_id, set())
+            subscribers.difference_update({item for item in subscribers if item[1] is queue})
+            if not subscribers:
+                self._subscribers.pop(user_id, None)
+
+    def has_subscribers(self, user_id):
+        return user_id in self._subscribers
+
+    def publish(self, user_id, event):
+        with self._lock:
+            subscribers = list(self._subscribers.get(user_id, ()))
+        for loop, queue in subscribers:
+            try:
+                loop.call_soon_threadsafe(_put, queue, event)
+            except RuntimeError:
+                # цикл уже закритий - зʼєднання завершилось
+                self.unsubscribe(user_id, queue)
+
+
+def _put(queue, event):
+    try:
+        queue.put_nowait(event)
+    except asyncio.QueueFull:
+        # повільний клієнт: пропускаємо подію, лічильник прийде наступною
+        pass
+
+
+broker = NotificationBroker()
+
+
+def notification_event(notification):
+    return {
+        'event': 'notification',
+        'id': notification.id,
+        'data': {
+            'id': notification.id,
+            'notification_type': notification.notification_type,
+            'sender': notification.sender.username if notification.sender_id else None,
+            'text': notification.text,
+            'link': notification.link,
+            'actor_count': notification.actor_count,
+        },
+    }
+
+
+def unread_event(count):
+    return {'event': 'unread', 'data': {'unread': count}}
+
+
+def publish_notification(notification):
+    recipient_id = notification.recipient_id
+    if not broker.has_subscribers(recipient_id):
+        return
+
+    def send():
+        broker.publish(recipient_id, notification_event(notification))
+        publish_unread(recipient_id)
+    transaction.on_commit(send)
+
+
+def publish_unread(user_id, count=None):
+    if not broker.has_subscribers(user_id):
+        return
+    if count is None:
+        count = Notification.objects.filter(recipient_id=user_id, is_read=False).count()
+    broker.publish(user_id, unread_event(count))
+
+
+def format_event(event):
+    lines = []
+    if 'id' in event:
+        lines.append(f'id: {event["id"]}')
+    lines.append(f'event: {event["event"]}')
+    lines.append(f'data: {json.dumps(event["data"], ensure_ascii=False)}')
+    return '\n'.join(lines) + '\n\n'
@@ -2,6 +2,7 @@ from django import forms
 from django.contrib.auth.forms import UserCreationForm
 from django.contrib.auth.models import User
 from .models import Profile
+from .uploads import check_image
 
 class RegisterForm(UserCreationForm):
     email = forms.EmailField(required=True)
@@ -22,10 +23,19 @@ class UserUpdateForm(forms.ModelForm):
 
 
 class ProfileUpdateForm(forms.ModelForm):
+    # без forms.ImageField: Pillow не декодує файл у запиті, це робить воркер
+    avatar = forms.FileField(required=False)
+
     class Meta:
         model = Profile
         fields = ['bio', 'avatar', 'birth_date', 'location', 'website', 'phone']
         widgets = {
             'birth_date': forms.DateInput(attrs={'type': 'date'}),
             'bio': forms.Textarea(attrs={'rows': 4}),
-        }
\ No newline at end of file
+        }
+
+    def clean_avatar(self):
+        avatar = self.cleaned_data.get('avatar')
+        if avatar and 'avatar' in self.files:
+            check_image(avatar)
+        return avatar
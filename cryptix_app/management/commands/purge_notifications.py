@@ -0,0 +1,32 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from cryptix_app.retention import purge_notifications
+
+
+class Command(BaseCommand):
+    help = 'Видаляє або архівує старі прочитані сповіщення і обрізає їх кількість на користувача'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, default=settings.NOTIFICATION_RETENTION_DAYS,
+                            help='вік прочитаних сповіщень, після якого вони видаляються')
+        parser.add_argument('--keep-per-user', type=int, default=settings.NOTIFICATION_MAX_PER_USER,
+                            help='скільки найновіших сповіщень лишати користувачу (0 - без ліміту)')
+        parser.add_argument('--chunk-size', type=int, default=settings.NOTIFICATION_PURGE_CHUNK)
+        parser.add_argument('--archive-dir', default=settings.NOTIFICATION_ARCHIVE_DIR,
+                            help='зберегти видалені рядки у gzip JSONL у цій теці')
+        parser.add_argument('--pause', type=float, default=0.05, help='пауза між порціями, секунд')
+
+    def handle(self, *args, **options):
+        result = purge_notifications(
+            days=options['days'],
+            keep_per_user=options['keep_per_user'],
+            chunk_size=options['chunk_size'],
+            archive_dir=options['archive_dir'],
+            pause=options['pause'],
+        )
+        self.stdout.write(self.style.SUCCESS(
+            f'Видалено прострочених: {result["expired"]}, понад ліміт: {result["over_cap"]}'
+        ))
+        if 'archive' in result:
+            self.stdout.write(f'Архів: {result["archive"]}')
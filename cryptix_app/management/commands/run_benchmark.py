@@ -0,0 +1,202 @@
+import json
+import random
+import re
+import subprocess
+import threading
+import time
+from collections import defaultdict
+from http.cookiejar import CookieJar
+from urllib import error, parse, request as urlrequest
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from cryptix_app.models import Group, Post
+
+
+CSRF_RE = re.compile(r'name="csrfmiddlewaretoken" value="([^"]+)"')
+
+
+class NoRedirect(urlrequest.HTTPRedirectHandler):
+    # редіректи після POST не рахуємо як окремі запити
+    def redirect_request(self, *args, **kwargs):
+        return None
+
+
+class BenchmarkClient:
+    def __init__(self, base_url, timeout):
+        self.base_url = base_url.rstrip('/')
+        self.timeout = timeout
+        self.cookies = CookieJar()
+        self.opener = urlrequest.build_opener(
+            urlrequest.HTTPCookieProcessor(self.cookies), NoRedirect()
+        )
+
+    def csrf_token(self):
+        for cookie in self.cookies:
+            if cookie.name == 'csrftoken':
+                return cookie.value
+        return ''
+
+    def open(self, method, path, data=None):
+        body = parse.urlencode(data).encode() if data is not None else None
+        req = urlrequest.Request(self.base_url + path, data=body, method=method)
+        if method == 'POST':
+            req.add_header('X-CSRFToken', self.csrf_token())
+            req.add_header('Referer', self.base_url + path)
+        try:
+            with self.opener.open(req, timeout=self.timeout) as response:
+                return response.status, response.read()
+        except error.HTTPError as exc:
+            return exc.code, exc.read()
+
+    def login(self, username, password):
+        status, body = self.open('GET', '/login/')
+        match = CSRF_RE.search(body.decode('utf-8', 'replace'))
+        if status != 200 or not match:
+            raise CommandError(f'Не вдалося отримати форму входу (HTTP {status})')
+        status, _ = self.open('POST', '/login/', {
+            'username': username,
+            'password': password,
+            'csrfmiddlewaretoken': match.group(1),
+        })
+        if status != 302:
+            raise CommandError(f'Не вдалося увійти як {username} (HTTP {status})')
+
+
+def percentile(sorted_values, pct):
+    if not sorted_values:
+        return None
+    index = max(0, min(len(sorted_values) - 1, round(pct / 100 * len(sorted_values)) - 1))
+    return sorted_values[index]
+
+
+def summarize(latencies, errors, elapsed):
+    values = sorted(latencies)
+    return {
+        'requests': len(values),
+        'errors': errors,
+        'rps': round(len(values) / elapsed, 2) if elapsed else 0,
+        'p50_ms': percentile(values, 50),
+        'p95_ms': percentile(values, 95),
+        'p99_ms': percentile(values, 99),
+        'max_ms': values[-1] if values else None,
+    }
+
+
+def git_revision():
+    try:
+        return subprocess.check_output(['git', 'rev-parse', '--short', 'HEAD'], text=True, stderr=subprocess.DEVNULL).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+class Command(BaseCommand):
+    help = 'Навантажувальний тест основних сторінок на запущеному сервері (результат у JSON)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--base-url', default='http://127.0.0.1:8000/app')
+        parser.add_argument('--clients', type=int, default=8)
+        parser.add_argument('--duration', type=float, default=30.0, help='тривалість у секундах')
+        parser.add_argument('--warmup', type=float, default=2.0, help='прогрів у секундах (не враховується)')
+        parser.add_argument('--prefix', default='bench')
+        parser.add_argument('--password', default='bench-pass-123')
+        parser.add_argument('--timeout', type=float, default=10.0)
+        parser.add_argument('--seed', type=int, default=42)
+        parser.add_argument('--output', help='файл для JSON-звіту (інакше stdout)')
+
+    def handle(self, *args, **options):
+        rng = random.Random(options['seed'])
+        usernames = self.bench_usernames(options['prefix'], options['clients'], rng)
+        post_ids = list(Post.objects.filter(author__username__startswith=f'{options["prefix"]}_').values_list('id', flat=True)[:5000])
+        group_ids = list(Group.objects.filter(is_private=False).values_list('id', flat=True)[:1000])
+        if not post_ids or not group_ids:
+            raise CommandError('Немає даних для тесту - спочатку запустіть seed_benchmark')
+
+        scenarios = [
+            ('feed', lambda c, r: c.open('GET', '/feed/')),
+            ('conversations_list', lambda c, r: c.open('GET', '/conversations/')),
+            ('users_list', lambda c, r: c.open('GET', f'/users/?q={options["prefix"]}_{r.randint(0, 99)}')),
+            ('group_detail', lambda c, r: c.open('GET', f'/group/{r.choice(group_ids)}/')),
+            ('post_like', lambda c, r: c.open('POST', f'/post/{r.choice(post_ids)}/like/', {})),
+        ]
+
+        clients = []
+        for username in usernames:
+            client = BenchmarkClient(options['base_url'], options['timeout'])
+            client.login(username, options['password'])
+            clients.append(client)
+
+        latencies = defaultdict(list)
+        errors = defaultdict(int)
+        lock = threading.Lock()
+        started = time.perf_counter()
+        measure_from = started + options['warmup']
+        deadline = measure_from + options['duration']
+
+        def worker(client, worker_rng):
+            local_latencies = defaultdict(list)
+            local_errors = defaultdict(int)
+            while True:
+                name, call = worker_rng.choice(scenarios)
+                begin = time.perf_counter()
+                if begin >= deadline:
+                    break
+                try:
+                    status, _ = call(client, worker_rng)
+                except OSError:
+                    status = None
+                took = (time.perf_counter() - begin) * 1000
+                if begin < measure_from:
+                    continue
+                if status is None or status >= 400:
+                    local_errors[name] += 1
+                else:
+                    local_latencies[name].append(round(took, 3))
+            with lock:
+                for name, values in local_latencies.items():
+                    latencies[name].extend(values)
+                for name, count in local_errors.items():
+                    errors[name] += count
+
+        threads = [
+            threading.Thread(target=worker, args=(client, random.Random(rng.random())))
+            for client in clients
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        elapsed = min(time.perf_counter(), deadline) - measure_from
+        report = {
+            'revision': git_revision(),
+            'started_at': timezone.now().isoformat(),
+            'base_url': options['base_url'],
+            'clients': options['clients'],
+            'duration_s': round(elapsed, 3),
+            'total': summarize(
+                [v for values in latencies.values() for v in values],
+                sum(errors.values()),
+                elapsed,
+            ),
+            'endpoints': {
+                name: summarize(latencies[name], errors[name], elapsed)
+                for name, _ in scenarios
+            },
+        }
+
+        payload = json.dumps(report, indent=2, ensure_ascii=False)
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf-8') as fh:
+                fh.write(payload + '\n')
+            self.stdout.write(self.style.SUCCESS(f'Звіт збережено в {options["output"]}'))
+        else:
+            self.stdout.write(payload)
+
+    def bench_usernames(self, prefix, count, rng):
+        usernames = list(User.objects.filter(username__startswith=f'{prefix}_').values_list('username', flat=True)[:max(count * 10, 100)])
+        if not usernames:
+            raise CommandError('Немає тестових користувачів - спочатку запустіть seed_benchmark')
+        return [rng.choice(usernames) for _ in range(count)]
@@ -0,0 +1,28 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from cryptix_app.tasks import PERIODIC_JOBS, run_due_jobs, run_job
+
+
+class Command(BaseCommand):
+    help = 'Виконує періодичні фонові задачі (очищення сповіщень тощо)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true', help='виконати задачі, що настали, і вийти (для cron)')
+        parser.add_argument('--job', help='примусово виконати одну задачу і вийти')
+        parser.add_argument('--poll', type=float, default=10, help='інтервал перевірки, секунд')
+
+    def handle(self, *args, **options):
+        if options['job']:
+            if options['job'] not in PERIODIC_JOBS:
+                raise CommandError(f'Невідома задача: {options["job"]}. Доступні: {", ".join(PERIODIC_JOBS)}')
+            self.stdout.write(f'{options["job"]}: {run_job(options["job"])}')
+            return
+
+        while True:
+            for name, result in run_due_jobs().items():
+                self.stdout.write(f'{name}: {result}')
+            if options['once']:
+                return
+            time.sleep(options['poll'])
@@ -0,0 +1,192 @@
+import random
+
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from cryptix_app.models import (
+    Profile, Friendship, Follow, Conversation, Message, Group, GroupMembership,
+    GroupPost, GroupPostComment, Post, PostLike, PostLikeCounter, PostComment,
+)
+
+
+class Command(BaseCommand):
+    help = 'Генерує синтетичний набір даних для навантажувального тестування'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=200)
+        parser.add_argument('--friends', type=int, default=10, help='друзів на користувача')
+        parser.add_argument('--follows', type=int, default=10, help='підписок на користувача')
+        parser.add_argument('--posts', type=int, default=5, help='постів на користувача')
+        parser.add_argument('--likes', type=int, default=5, help='лайків на пост')
+        parser.add_argument('--comments', type=int, default=2, help='коментарів на пост')
+        parser.add_argument('--conversations', type=int, default=3, help='чатів на користувача')
+        parser.add_argument('--messages', type=int, default=20, help='повідомлень у чаті')
+        parser.add_argument('--groups', type=int, default=20)
+        parser.add_argument('--members', type=int, default=30, help='учасників у групі')
+        parser.add_argument('--group-posts', type=int, default=10, help='постів у групі')
+        parser.add_argument('--prefix', default='bench')
+        parser.add_argument('--password', default='bench-pass-123')
+        parser.add_argument('--batch-size', type=int, default=1000)
+        parser.add_argument('--seed', type=int, default=42)
+        parser.add_argument('--flush', action='store_true', help='видалити попередні дані з тим самим префіксом')
+
+    def handle(self, *args, **options):
+        self.rng = random.Random(options['seed'])
+        self.batch_size = options['batch_size']
+        prefix = options['prefix']
+
+        if options['flush']:
+            deleted, _ = User.objects.filter(username__startswith=f'{prefix}_').delete()
+            self.stdout.write(f'Видалено {deleted} обʼєктів')
+
+        with transaction.atomic():
+            users = self.create_users(prefix, options['users'], options['password'])
+            user_ids = [u.id for u in users]
+            self.create_friendships(user_ids, options['friends'])
+            self.create_follows(user_ids, options['follows'])
+            post_ids = self.create_posts(user_ids, options['posts'])
+            self.create_post_activity(post_ids, user_ids, options['likes'], options['comments'])
+            self.create_conversations(user_ids, options['conversations'], options['messages'])
+            self.create_groups(prefix, user_ids, options['groups'], options['members'], options['group_posts'])
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Створено {len(users)} користувачів з префіксом "{prefix}_" (пароль: {options["password"]})'
+        ))
+
+    def bulk(self, model, objs):
+        return model.objects.bulk_create(objs, batch_size=self.batch_size)
+
+    def sample(self, population, k, exclude=None):
+        k = min(k, len(population) - (1 if exclude is not None else 0))
+        if k <= 0:
+            return []
+        picked = set()
+        while len(picked) < k:
+            candidate = self.rng.choice(population)
+            if candidate != exclude:
+                picked.add(candidate)
+        return list(picked)
+
+    def create_users(self, prefix, count, password):
+        # хешуємо пароль один раз - інакше генерація займає хвилини
+        hashed = make_password(password)
+        start = User.objects.filter(username__startswith=f'{prefix}_').count()
+        users = self.bulk(User, [
+            User(
+                username=f'{prefix}_{start + i}',
+                first_name=f'Bench{start + i}',
+                last_name='User',
+                email=f'{prefix}_{start + i}@example.com',
+                password=hashed,
+            )
+            for i in range(count)
+        ])
+        self.bulk(Profile, [Profile(user=u, bio=f'Тестовий профіль {u.username}') for u in users])
+        return users
+
+    def create_friendships(self, user_ids, per_user):
+        pairs = set()
+        for user_id in user_ids:
+            for other_id in self.sample(user_ids, per_user, exclude=user_id):
+                pairs.add((min(user_id, other_id), max(user_id, other_id)))
+        self.bulk(Friendship, [
+            Friendship(from_user_id=a, to_user_id=b, status=Friendship.ACCEPTED)
+            for a, b in pairs
+        ])
+
+    def create_follows(self, user_ids, per_user):
+        self.bulk(Follow, [
+            Follow(follower_id=user_id, following_id=other_id)
+            for user_id in user_ids
+            for other_id in self.sample(user_ids, per_user, exclude=user_id)
+        ])
+
+    def create_posts(self, user_ids, per_user):
+        posts = self.bulk(Post, [
+            Post(author_id=user_id, content=f'Пост #{n} від користувача {user_id}')
+            for user_id in user_ids
+            for n in range(per_user)
+        ])
+        return [p.id for p in posts]
+
+    def create_post_activity(self, post_ids, user_ids, likes, comments):
+        likers = {post_id: self.sample(user_ids, likes) for post_id in post_ids}
+        self.bulk(PostLike, [
+            PostLike(post_id=post_id, user_id=user_id)
+            for post_id in post_ids
+            for user_id in likers[post_id]
+        ])
+        self.bulk(PostLikeCounter, [
+            PostLikeCounter(post_id=post_id, shard=0, count=len(likers[post_id]))
+            for post_id in post_ids
+        ])
+        self.bulk(PostComment, [
+            PostComment(post_id=post_id, author_id=self.rng.choice(user_ids), content=f'Коментар {n}')
+            for post_id in post_ids
+            for n in range(comments)
+        ])
+
+    def create_conversations(self, user_ids, per_user, messages):
+        pairs = []
+        for user_id in user_ids:
+            for other_id in self.sample(user_ids, per_user, exclude=user_id):
+                pairs.append((user_id, other_id))
+
+        conversations = self.bulk(Conversation, [Conversation() for _ in pairs])
+        Through = Conversation.participants.through
+        self.bulk(Through, [
+            Through(conversation_id=conv.id, user_id=uid)
+            for conv, pair in zip(conversations, pairs)
+            for uid in pair
+        ])
+        self.bulk(Message, [
+            Message(
+                conversation_id=conv.id,
+                sender_id=pair[n % 2],
+                content=f'Повідомлення {n}',
+                is_read=n < messages - 2,
+            )
+            for conv, pair in zip(conversations, pairs)
+            for n in range(messages)
+        ])
+
+    def create_groups(self, prefix, user_ids, count, members, posts):
+        creators = [self.rng.choice(user_ids) for _ in range(count)]
+        groups = self.bulk(Group, [
+            Group(
+                name=f'{prefix} група {n}',
+                description='Група для навантажувального тестування',
+                creator_id=creator_id,
+                is_private=n % 5 == 4,
+            )
+            for n, creator_id in enumerate(creators)
+        ])
+
+        memberships = []
+        group_members = {}
+        for group in groups:
+            member_ids = set(self.sample(user_ids, members)) - {group.creator_id}
+            group_members[group.id] = [group.creator_id] + list(member_ids)
+            memberships.append(GroupMembership(user_id=group.creator_id, group_id=group.id, role=GroupMembership.ADMIN))
+            memberships.extend(GroupMembership(user_id=uid, group_id=group.id) for uid in member_ids)
+        self.bulk(GroupMembership, memberships)
+        for group in groups:
+            group.member_count = len(group_members[group.id])
+        Group.objects.bulk_update(groups, ['member_count'], batch_size=self.batch_size)
+
+        group_posts = self.bulk(GroupPost, [
+            GroupPost(
+                group_id=group.id,
+                author_id=self.rng.choice(group_members[group.id]),
+                content=f'Груповий пост {n}',
+                comment_count=1,
+            )
+            for group in groups
+            for n in range(posts)
+        ])
+        self.bulk(GroupPostComment, [
+            GroupPostComment(post_id=post.id, author_id=self.rng.choice(group_members[post.group_id]), content='Коментар')
+            for post in group_posts
+        ])
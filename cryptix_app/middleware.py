@@ -0,0 +1,178 @@
+import re
+import zlib
+from functools import partial
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib import auth
+from django.contrib.auth import BACKEND_SESSION_KEY, HASH_SESSION_KEY, SESSION_KEY
+from django.contrib.auth.middleware import AuthenticationMiddleware
+from django.contrib.auth.models import AnonymousUser, User
+from django.utils.cache import patch_vary_headers
+from django.utils.crypto import constant_time_compare
+from django.utils.deprecation import MiddlewareMixin
+from django.utils.functional import SimpleLazyObject
+from django.utils.text import compress_sequence, compress_string
+
+from .cache import cached_auth_user
+from .presence import record_heartbeat
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+
+def get_cached_user(request):
+    """Як django.contrib.auth.get_user, але User з профілем береться з кешу."""
+    try:
+        user_id = User._meta.pk.to_python(request.session[SESSION_KEY])
+        backend_path = request.session[BACKEND_SESSION_KEY]
+    except KeyError:
+        return AnonymousUser()
+    if backend_path not in settings.AUTHENTICATION_BACKENDS:
+        return AnonymousUser()
+
+    user = cached_auth_user(user_id)
+    if user is None or not user.is_active:
+        return AnonymousUser()
+    session_hash = request.session.get(HASH_SESSION_KEY)
+    if not session_hash or not constant_time_compare(session_hash, user.get_session_auth_hash()):
+        # повільний шлях Django: резервні SECRET_KEY або скидання сесії
+        return auth.get_user(request)
+    user.backend = backend_path
+    return user
+
+
+def _user(request):
+    if not hasattr(request, '_cached_user'):
+        request._cached_user = get_cached_user(request)
+    return request._cached_user
+
+
+async def _auser(request):
+    if not hasattr(request, '_acached_user'):
+        request._acached_user = await sync_to_async(get_cached_user)(request)
+    return request._acached_user
+
+
+class CachedAuthenticationMiddleware(AuthenticationMiddleware):
+    def process_request(self, request):
+        super().process_request(request)
+        request.user = SimpleLazyObject(lambda: _user(request))
+        request.auser = partial(_auser, request)
+
+
+class PresenceMiddleware(MiddlewareMixin):
+    # після автентифікації: користувач уже в кеші, тож це лише запис у кеш
+    def process_request(self, request):
+        if request.user.is_authenticated:
+            record_heartbeat(request.user.id)
+
+
+# -- стиснення відповідей --
+# Brotli (якщо встановлений пакет brotli) або gzip за Accept-Encoding.
+# Стискаються лише текстові типи: зображення й медіа вже стиснені, а SSE
+# (text/event-stream) мусить доходити до клієнта подію за подією.
+
+COMPRESSIBLE_TYPES = {
+    'application/javascript', 'application/json', 'application/xml', 'image/svg+xml',
+    'text/css', 'text/html', 'text/javascript', 'text/plain',
+}
+MIN_COMPRESS_LENGTH = 200
+BROTLI_QUALITY = 5
+GZIP_RANDOM_BYTES = 100
+
+re_encoding = re.compile(r'^\s*([\w*-]+)\s*(?:;\s*q\s*=\s*([\d.]+))?\s*$')
+
+
+def accepted_encodings(header):
+    """Кодування з Accept-Encoding з ненульовою вагою."""
+    accepted = set()
+    for part in header.split(','):
+        match = re_encoding.match(part)
+        if not match:
+            continue
+        try:
+            quality = float(match[2]) if match[2] else 1.0
+        except ValueError:
+            continue
+        if quality > 0:
+            accepted.add(match[1].lower())
+    return accepted
+
+
+def choose_encoding(header):
+    accepted = accepted_encodings(header)
+    if brotli is not None and 'br' in accepted:
+        return 'br'
+    if 'gzip' in accepted:
+        return 'gzip'
+    return None
+
+
+def brotli_sequence(sequence):
+    compressor = brotli.Compressor(quality=BROTLI_QUALITY)
+    for chunk in sequence:
+        # flush після кожного шматка, щоб потік не затримувався у компресорі
+        yield compressor.process(chunk) + compressor.flush()
+    yield compressor.finish()
+
+
+async def abrotli_sequence(sequence):
+    compressor = brotli.Compressor(quality=BROTLI_QUALITY)
+    async for chunk in sequence:
+        yield compressor.process(chunk) + compressor.flush()
+    yield compressor.finish()
+
+
+async def agzip_sequence(sequence):
+    # один gzip-потік на відповідь: окремі члени на кожен шматок частина
+    # клієнтів не дочитує далі першого
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 31)
+    async for chunk in sequence:
+        yield compressor.compress(chunk) + compressor.flush(zlib.Z_SYNC_FLUSH)
+    yield compressor.flush()
+
+
+class CompressionMiddleware(MiddlewareMixin):
+    def process_response(self, request, response):
+        if response.status_code != 200 or response.has_header('Content-Encoding'):
+            return response
+        content_type = response.get('Content-Type', '').split(';')[0].strip().lower()
+        if content_type not in COMPRESSIBLE_TYPES:
+            return response
+        if not response.streaming and len(response.content) < MIN_COMPRESS_LENGTH:
+            return response
+
+        patch_vary_headers(response, ('Accept-Encoding',))
+        encoding = choose_encoding(request.META.get('HTTP_ACCEPT_ENCODING', ''))
+        if encoding is None:
+            return response
+
+        if response.streaming:
+            content = response.streaming_content
+            if encoding == 'br':
+                response.streaming_content = abrotli_sequence(content) if response.is_async else brotli_sequence(content)
+            elif response.is_async:
+                response.streaming_content = agzip_sequence(content)
+            else:
+                response.streaming_content = compress_sequence(content, max_random_bytes=GZIP_RANDOM_BYTES)
+            # розмір стисненого потоку наперед невідомий
+            del response.headers['Content-Length']
+        else:
+            if encoding == 'br':
+                compressed = brotli.compress(response.content, quality=BROTLI_QUALITY)
+            else:
+                compressed = compress_string(response.content, max_random_bytes=GZIP_RANDOM_BYTES)
+            if len(compressed) >= len(response.content):
+                return response
+            response.content = compressed
+            response.headers['Content-Length'] = str(len(compressed))
+
+        # сильний ETag описує нестиснене тіло
+        etag = response.get('ETag')
+        if etag and etag.startswith('"'):
+            response.headers['ETag'] = 'W/' + etag
+        response.headers['Content-Encoding'] = encoding
+        return response
@@ -0,0 +1,28 @@
+# Generated by Django 5.2.7 on 2026-10-19 15:36
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def fill_member_count(apps, schema_editor):
+    Group = apps.get_model('cryptix_app', 'Group')
+    GroupMembership = apps.get_model('cryptix_app', 'GroupMembership')
+    counts = GroupMembership.objects.filter(group=OuterRef('pk')).order_by().values('group').annotate(c=Count('id')).values('c')
+    Group.objects.update(member_count=Coalesce(Subquery(counts), 0))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cryptix_app', '0004_news'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='group',
+            name='member_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.RunPython(fill_member_count, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,38 @@
+# Generated by Django 5.2.7 on 2026-10-19 15:37
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def fill_comment_count(apps, schema_editor):
+    GroupPost = apps.get_model('cryptix_app', 'GroupPost')
+    GroupPostComment = apps.get_model('cryptix_app', 'GroupPostComment')
+    counts = GroupPostComment.objects.filter(post=OuterRef('pk')).order_by().values('post').annotate(c=Count('id')).values('c')
+    GroupPost.objects.update(comment_count=Coalesce(Subquery(counts), 0))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cryptix_app', '0005_group_member_count'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='grouppost',
+            name='comment_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.RunPython(fill_comment_count, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='grouppost',
+            index=models.Index(fields=['group', 'id'], name='cryptix_app_group_i_94983e_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='grouppostcomment',
+            index=models.Index(fields=['post', 'id'], name='cryptix_app_post_id_8e4bba_idx'),
+        ),
+    ]
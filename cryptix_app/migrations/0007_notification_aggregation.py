@@ -0,0 +1,52 @@
+# Generated by Django 5.2.7 on 2026-10-19 15:44
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import F
+
+
+def fill_notification_fields(apps, schema_editor):
+    Notification = apps.get_model('cryptix_app', 'Notification')
+    Notification.objects.update(updated_at=F('created_at'))
+    # лайки раніше зберігались з типом comment
+    Notification.objects.filter(notification_type='comment', text__endswith='лайкнув ваш пост').update(notification_type='like')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cryptix_app', '0006_group_post_comment_count'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name='notification',
+            options={'ordering': ['-updated_at']},
+        ),
+        migrations.AddField(
+            model_name='notification',
+            name='actor_count',
+            field=models.PositiveIntegerField(default=1),
+        ),
+        migrations.AddField(
+            model_name='notification',
+            name='target_key',
+            field=models.CharField(blank=True, max_length=50),
+        ),
+        migrations.AddField(
+            model_name='notification',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.RunPython(fill_notification_fields, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='notification',
+            name='notification_type',
+            field=models.CharField(choices=[('friend_request', 'Запит у друзі'), ('friend_accept', 'Прийнято запит'), ('message', 'Нове повідомлення'), ('group_invite', 'Запрошення в групу'), ('group_post', 'Новий пост в групі'), ('comment', 'Новий коментар'), ('like', 'Вподобання'), ('review', 'Новий відгук')], max_length=20),
+        ),
+        migrations.AddIndex(
+            model_name='notification',
+            index=models.Index(fields=['recipient', 'notification_type', 'target_key'], name='cryptix_app_recipie_062462_idx'),
+        ),
+    ]
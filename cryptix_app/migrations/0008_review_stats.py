@@ -0,0 +1,44 @@
+# Generated by Django 5.2.7 on 2026-10-19 15:49
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count, Q, Sum
+
+
+def fill_review_stats(apps, schema_editor):
+    Review = apps.get_model('cryptix_app', 'Review')
+    ReviewStats = apps.get_model('cryptix_app', 'ReviewStats')
+    rows = Review.objects.order_by().values('reviewed_user').annotate(
+        count=Count('id'),
+        total=Sum('rating'),
+        **{f'rating_{i}': Count('id', filter=Q(rating=i)) for i in range(1, 6)}
+    )
+    ReviewStats.objects.bulk_create(
+        [ReviewStats(user_id=row.pop('reviewed_user'), **row) for row in rows], batch_size=1000
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auth', '0012_alter_user_first_name_max_length'),
+        ('cryptix_app', '0007_notification_aggregation'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ReviewStats',
+            fields=[
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='review_stats', serialize=False, to=settings.AUTH_USER_MODEL)),
+                ('count', models.PositiveIntegerField(default=0)),
+                ('total', models.PositiveIntegerField(default=0)),
+                ('rating_1', models.PositiveIntegerField(default=0)),
+                ('rating_2', models.PositiveIntegerField(default=0)),
+                ('rating_3', models.PositiveIntegerField(default=0)),
+                ('rating_4', models.PositiveIntegerField(default=0)),
+                ('rating_5', models.PositiveIntegerField(default=0)),
+            ],
+        ),
+        migrations.RunPython(fill_review_stats, migrations.RunPython.noop),
+    ]
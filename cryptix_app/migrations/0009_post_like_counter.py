@@ -0,0 +1,37 @@
+# Generated by Django 5.2.7 on 2026-10-19 15:51
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def fill_like_counters(apps, schema_editor):
+    PostLike = apps.get_model('cryptix_app', 'PostLike')
+    PostLikeCounter = apps.get_model('cryptix_app', 'PostLikeCounter')
+    rows = PostLike.objects.order_by().values('post').annotate(total=Count('id'))
+    PostLikeCounter.objects.bulk_create(
+        [PostLikeCounter(post_id=row['post'], shard=0, count=row['total']) for row in rows], batch_size=1000
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cryptix_app', '0008_review_stats'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PostLikeCounter',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('shard', models.PositiveSmallIntegerField()),
+                ('count', models.IntegerField(default=0)),
+                ('post', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='like_counters', to='cryptix_app.post')),
+            ],
+            options={
+                'unique_together': {('post', 'shard')},
+            },
+        ),
+        migrations.RunPython(fill_like_counters, migrations.RunPython.noop),
+    ]
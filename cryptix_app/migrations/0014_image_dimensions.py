@@ -0,0 +1,112 @@
+# Generated by Django 5.2.7 on 2026-10-19 16:13
+
+from django.db import migrations, models
+
+
+IMAGE_FIELDS = [
+    ('profile', 'avatar'),
+    ('group', 'avatar'),
+    ('grouppost', 'image'),
+    ('post', 'image'),
+    ('news', 'image'),
+]
+
+
+def queue_existing_images(apps, schema_editor):
+    # розміри, превʼю і варіанти для srcset порахує воркер (задача process_images)
+    PendingImage = apps.get_model('cryptix_app', 'PendingImage')
+    for model_name, field in IMAGE_FIELDS:
+        model = apps.get_model('cryptix_app', model_name)
+        rows = model.objects.exclude(**{f'{field}__isnull': True}).exclude(**{field: ''}).values_list('pk', field)
+        PendingImage.objects.bulk_create(
+            [
+                PendingImage(model=f'cryptix_app.{model_name}', object_id=pk, field=field, name=name)
+                for pk, name in rows.iterator()
+            ],
+            batch_size=1000,
+        )
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cryptix_app', '0013_pending_image'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='group',
+            name='avatar_height',
+            field=models.PositiveIntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='group',
+            name='avatar_placeholder',
+            field=models.TextField(blank=True),
+        ),
+        migrations.AddField(
+            model_name='group',
+            name='avatar_width',
+            field=models.PositiveIntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='grouppost',
+            name='image_height',
+            field=models.PositiveIntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='grouppost',
+            name='image_placeholder',
+            field=models.TextField(blank=True),
+        ),
+        migrations.AddField(
+            model_name='grouppost',
+            name='image_width',
+            field=models.PositiveIntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='news',
+            name='image_height',
+            field=models.PositiveIntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='news',
+            name='image_placeholder',
+            field=models.TextField(blank=True),
+        ),
+        migrations.AddField(
+            model_name='news',
+            name='image_width',
+            field=models.PositiveIntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='post',
+            name='image_height',
+            field=models.PositiveIntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='post',
+            name='image_placeholder',
+            field=models.TextField(blank=True),
+        ),
+        migrations.AddField(
+            model_name='post',
+            name='image_width',
+            field=models.PositiveIntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='profile',
+            name='avatar_height',
+            field=models.PositiveIntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='profile',
+            name='avatar_placeholder',
+            field=models.TextField(blank=True),
+        ),
+        migrations.AddField(
+            model_name='profile',
+            name='avatar_width',
+            field=models.PositiveIntegerField(blank=True, null=True),
+        ),
+        migrations.RunPython(queue_existing_images, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.7 on 2026-10-19 16:21
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cryptix_app', '0014_image_dimensions'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='profile',
+            name='last_seen',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
@@ -0,0 +1,38 @@
+# Generated by Django 5.2.7 on 2026-10-19 16:42
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cryptix_app', '0017_job_schedule'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='group',
+            name='avatar_variants',
+            field=models.BooleanField(default=False),
+        ),
+        migrations.AddField(
+            model_name='grouppost',
+            name='image_variants',
+            field=models.BooleanField(default=False),
+        ),
+        migrations.AddField(
+            model_name='news',
+            name='image_variants',
+            field=models.BooleanField(default=False),
+        ),
+        migrations.AddField(
+            model_name='post',
+            name='image_variants',
+            field=models.BooleanField(default=False),
+        ),
+        migrations.AddField(
+            model_name='profile',
+            name='avatar_variants',
+            field=models.BooleanField(default=False),
+        ),
+    ]
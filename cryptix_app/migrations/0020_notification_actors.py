@@ -0,0 +1,51 @@
+# Generated by Django 5.2.7 on 2026-10-19 17:09
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+def fill_notification_actors(apps, schema_editor):
+    Notification = apps.get_model('cryptix_app', 'Notification')
+    NotificationActor = apps.get_model('cryptix_app', 'NotificationActor')
+    User = apps.get_model(*settings.AUTH_USER_MODEL.split('.'))
+    # агрегуються лише непрочитані рядки, тож переносимо тільки їх;
+    # рядкам без списку відомий лише відправник
+    rows = Notification.objects.filter(is_read=False).exclude(target_key='').values_list('id', 'sender_id', 'actor_ids')
+    pairs = [
+        (notification_id, actor_id)
+        for notification_id, sender_id, actor_ids in rows.iterator()
+        for actor_id in actor_ids or ([sender_id] if sender_id else [])
+    ]
+    existing = set(User.objects.filter(id__in={actor_id for _, actor_id in pairs}).values_list('id', flat=True))
+    NotificationActor.objects.bulk_create(
+        [NotificationActor(notification_id=n, actor_id=a) for n, a in pairs if a in existing],
+        batch_size=1000, ignore_conflicts=True
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cryptix_app', '0019_notification_actor_ids'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='NotificationActor',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('actor', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to=settings.AUTH_USER_MODEL)),
+                ('notification', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='actors', to='cryptix_app.notification')),
+            ],
+            options={
+                'unique_together': {('notification', 'actor')},
+            },
+        ),
+        migrations.RunPython(fill_notification_actors, migrations.RunPython.noop),
+        migrations.RemoveField(
+            model_name='notification',
+            name='actor_ids',
+        ),
+    ]
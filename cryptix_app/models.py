@@ -1,3 +1,7 @@
+import json
+import zlib
+from datetime import datetime
+
 from django.db import models
 from django.contrib.auth.models import User
 from django.utils import timezone
@@ -8,15 +12,85 @@ class Profile(models.Model):
     user = models.OneToOneField(User, on_delete=models.CASCADE)
     bio = models.TextField(max_length=500, blank=True)
     avatar = models.ImageField(upload_to='avatars/', blank=True, null=True)
+    # розміри, крихітне превʼю (data: URI) і наявність копій для srcset
+    # заповнює воркер після обробки
+    avatar_width = models.PositiveIntegerField(null=True, blank=True)
+    avatar_height = models.PositiveIntegerField(null=True, blank=True)
+    avatar_placeholder = models.TextField(blank=True)
+    avatar_variants = models.BooleanField(default=False)
     birth_date = models.DateField(null=True, blank=True)
     location = models.CharField(max_length=100, blank=True)
     website = models.URLField(blank=True)
     phone = models.CharField(max_length=20, blank=True)
+    # пишеться пачками з presence.py, тож може відставати на кілька хвилин
+    last_seen = models.DateTimeField(null=True, blank=True)
     
     def __str__(self):
         return f'{self.user.username} Profile'
 
 
+# -- мʼяке видалення --
+# Видалені групи й пости лише позначаються deleted_at і зникають з objects;
+# залежні рядки прибирає фоновий воркер за записами Tombstone.
+class AliveManager(models.Manager):
+    def get_queryset(self):
+        return super().get_queryset().filter(deleted_at__isnull=True)
+
+
+class Tombstone(models.Model):
+    GROUP = 'group'
+    POST = 'post'
+    USER = 'user'
+    
+    KIND_CHOICES = [
+        (GROUP, 'Група'),
+        (POST, 'Пост'),
+        (USER, 'Акаунт'),
+    ]
+    
+    kind = models.CharField(max_length=10, choices=KIND_CHOICES)
+    object_id = models.BigIntegerField()
+    created_at = models.DateTimeField(auto_now_add=True)
+    
+    class Meta:
+        unique_together = ('kind', 'object_id')
+        ordering = ['id']
+    
+    def __str__(self):
+        return f'{self.kind}:{self.object_id}'
+
+
+# -- обробка завантажених зображень --
+# Зображення зберігається одразу, а повне декодування і перекодування
+# виконує воркер (uploads.process_pending_images) за записами PendingImage.
+class PendingImage(models.Model):
+    model = models.CharField(max_length=50)
+    object_id = models.BigIntegerField()
+    field = models.CharField(max_length=30)
+    # шлях файлу на момент завантаження; якщо поле вже змінилось - запис застарів
+    name = models.CharField(max_length=255)
+    attempts = models.PositiveSmallIntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+    
+    class Meta:
+        ordering = ['id']
+    
+    def __str__(self):
+        return f'{self.model}:{self.object_id}.{self.field}'
+
+
+# -- розклад періодичних задач --
+# Наступний запуск кожної задачі з tasks.py. Тримається в БД, щоб запуски
+# з cron (run_worker --once, кожен - новий процес) і кілька воркерів не
+# виконували ту саму задачу частіше за її інтервал.
+class JobSchedule(models.Model):
+    name = models.CharField(max_length=100, primary_key=True)
+    next_run_at = models.DateTimeField()
+    
+    def __str__(self):
+        return f'{self.name} @ {self.next_run_at}'
+
+
 # -- друзі --
 class Friendship(models.Model):
     PENDING = 'pending'
@@ -71,7 +145,13 @@ class Conversation(models.Model):
         return f'Чат: {users}'
     
     def get_last_message(self):
-        return self.messages.first()
+        message = self.messages.first()
+        if message is None:
+            # усе листування вже в архіві
+            archive = self.archives.first()
+            if archive is not None:
+                message = archive.messages()[-1]
+        return message
 
 
 # -- повідомлення --
@@ -79,7 +159,7 @@ class Message(models.Model):
     conversation = models.ForeignKey(Conversation, related_name='messages', on_delete=models.CASCADE)
     sender = models.ForeignKey(User, related_name='sent_messages', on_delete=models.CASCADE)
     content = models.TextField()
-    created_at = models.DateTimeField(auto_now_add=True)
+    created_at = models.DateTimeField(auto_now_add=True, db_index=True)
     is_read = models.BooleanField(default=False)
     
     class Meta:
@@ -89,16 +169,63 @@ class Message(models.Model):
         return f'{self.sender.username}: {self.content[:30]}'
 
 
+# Старі повідомлення зберігаються блоками: стиснений zlib JSON-список рядків
+# [id, sender_id, content, created_at, is_read], від старіших до новіших.
+# Переносить їх задача archive_messages (archive.py).
+class MessageArchive(models.Model):
+    FIELDS = ['id', 'sender_id', 'content', 'created_at', 'is_read']
+    
+    conversation = models.ForeignKey(Conversation, related_name='archives', on_delete=models.CASCADE)
+    first_id = models.BigIntegerField()
+    last_id = models.BigIntegerField()
+    message_count = models.PositiveIntegerField()
+    data = models.BinaryField()
+    created_at = models.DateTimeField(auto_now_add=True)
+    
+    class Meta:
+        ordering = ['-last_id']
+        indexes = [models.Index(fields=['conversation', 'last_id'])]
+    
+    def __str__(self):
+        return f'Архів чату {self.conversation_id}: {self.first_id}-{self.last_id}'
+    
+    @classmethod
+    def pack(cls, rows):
+        data = [[row[field] for field in cls.FIELDS] for row in rows]
+        for row in data:
+            row[3] = row[3].isoformat()
+        return zlib.compress(json.dumps(data, ensure_ascii=False, separators=(',', ':')).encode())
+    
+    def messages(self):
+        """Незбережені Message з блоку, від старіших до новіших."""
+        return [
+            Message(
+                id=message_id, conversation_id=self.conversation_id, sender_id=sender_id, content=content,
+                created_at=datetime.fromisoformat(created_at), is_read=is_read,
+            )
+            for message_id, sender_id, content, created_at, is_read in json.loads(zlib.decompress(self.data))
+        ]
+
+
 # -- групи --
 class Group(models.Model):
     name = models.CharField(max_length=100)
     description = models.TextField(blank=True)
     avatar = models.ImageField(upload_to='group_avatars/', blank=True, null=True)
+    avatar_width = models.PositiveIntegerField(null=True, blank=True)
+    avatar_height = models.PositiveIntegerField(null=True, blank=True)
+    avatar_placeholder = models.TextField(blank=True)
+    avatar_variants = models.BooleanField(default=False)
     creator = models.ForeignKey(User, related_name='created_groups', on_delete=models.CASCADE)
     members = models.ManyToManyField(User, related_name='joined_groups', through='GroupMembership')
     is_private = models.BooleanField(default=False)
+    member_count = models.PositiveIntegerField(default=0)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
+    deleted_at = models.DateTimeField(null=True, blank=True, db_index=True)
+    
+    objects = AliveManager()
+    all_objects = models.Manager()
     
     class Meta:
         ordering = ['-created_at']
@@ -107,7 +234,7 @@ class Group(models.Model):
         return self.name
     
     def members_count(self):
-        return self.members.count()
+        return self.member_count
 
 
 # -- учасники груп --
@@ -139,11 +266,17 @@ class GroupPost(models.Model):
     author = models.ForeignKey(User, on_delete=models.CASCADE)
     content = models.TextField()
     image = models.ImageField(upload_to='group_posts/', blank=True, null=True)
+    image_width = models.PositiveIntegerField(null=True, blank=True)
+    image_height = models.PositiveIntegerField(null=True, blank=True)
+    image_placeholder = models.TextField(blank=True)
+    image_variants = models.BooleanField(default=False)
+    comment_count = models.PositiveIntegerField(default=0)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     
     class Meta:
         ordering = ['-created_at']
+        indexes = [models.Index(fields=['group', 'id'])]
     
     def __str__(self):
         return f'{self.author.username} в {self.group.name}: {self.content[:30]}'
@@ -158,6 +291,7 @@ class GroupPostComment(models.Model):
     
     class Meta:
         ordering = ['created_at']
+        indexes = [models.Index(fields=['post', 'id'])]
     
     def __str__(self):
         return f'{self.author.username}: {self.content[:30]}'
@@ -171,6 +305,7 @@ class Notification(models.Model):
     GROUP_INVITE = 'group_invite'
     GROUP_POST = 'group_post'
     COMMENT = 'comment'
+    LIKE = 'like'
     REVIEW = 'review'
     
     TYPE_CHOICES = [
@@ -180,6 +315,7 @@ class Notification(models.Model):
         (GROUP_INVITE, 'Запрошення в групу'),
         (GROUP_POST, 'Новий пост в групі'),
         (COMMENT, 'Новий коментар'),
+        (LIKE, 'Вподобання'),
         (REVIEW, 'Новий відгук'),
     ]
     
@@ -189,15 +325,30 @@ class Notification(models.Model):
     text = models.TextField()
     link = models.CharField(max_length=200, blank=True)
     is_read = models.BooleanField(default=False)
-    created_at = models.DateTimeField(auto_now_add=True)
+    # агреговані сповіщення: один рядок на (отримувач, тип, обʼєкт), напр. 'post:42'
+    target_key = models.CharField(max_length=50, blank=True)
+    actor_count = models.PositiveIntegerField(default=1)
+    created_at = models.DateTimeField(auto_now_add=True, db_index=True)
+    updated_at = models.DateTimeField(auto_now=True)
     
     class Meta:
-        ordering = ['-created_at']
+        ordering = ['-updated_at']
+        indexes = [models.Index(fields=['recipient', 'notification_type', 'target_key'])]
     
     def __str__(self):
         return f'{self.recipient.username}: {self.text[:30]}'
 
 
+class NotificationActor(models.Model):
+    # різні автори дій агрегованого сповіщення: повторна дія того ж
+    # користувача не вставляє рядок і не збільшує actor_count
+    notification = models.ForeignKey(Notification, related_name='actors', on_delete=models.CASCADE)
+    actor = models.ForeignKey(User, related_name='+', on_delete=models.CASCADE)
+    
+    class Meta:
+        unique_together = ('notification', 'actor')
+
+
 # -- рейтинг --
 class Review(models.Model):
     reviewer = models.ForeignKey(User, related_name='reviews_given', on_delete=models.CASCADE)
@@ -215,12 +366,53 @@ class Review(models.Model):
         return f'{self.reviewer.username} → {self.reviewed_user.username}: {self.rating}★'
 
 
+class ReviewStats(models.Model):
+    # зведення відгуків користувача, оновлюється разом з Review
+    user = models.OneToOneField(User, primary_key=True, related_name='review_stats', on_delete=models.CASCADE)
+    count = models.PositiveIntegerField(default=0)
+    total = models.PositiveIntegerField(default=0)
+    rating_1 = models.PositiveIntegerField(default=0)
+    rating_2 = models.PositiveIntegerField(default=0)
+    rating_3 = models.PositiveIntegerField(default=0)
+    rating_4 = models.PositiveIntegerField(default=0)
+    rating_5 = models.PositiveIntegerField(default=0)
+    
+    @property
+    def average(self):
+        return round(self.total / self.count, 1) if self.count else None
+    
+    @property
+    def rounded_average(self):
+        return round(self.total / self.count) if self.count else 0
+    
+    def histogram(self):
+        return [
+            {
+                'rating': rating,
+                'count': getattr(self, f'rating_{rating}'),
+                'percent': round(getattr(self, f'rating_{rating}') * 100 / self.count) if self.count else 0,
+            }
+            for rating in range(5, 0, -1)
+        ]
+    
+    def __str__(self):
+        return f'{self.user.username}: {self.average}★ ({self.count})'
+
+
 class Post(models.Model):
     author = models.ForeignKey(User, related_name='posts', on_delete=models.CASCADE)
     content = models.TextField()
     image = models.ImageField(upload_to='posts/', blank=True, null=True)
-    created_at = models.DateTimeField(auto_now_add=True)
+    image_width = models.PositiveIntegerField(null=True, blank=True)
+    image_height = models.PositiveIntegerField(null=True, blank=True)
+    image_placeholder = models.TextField(blank=True)
+    image_variants = models.BooleanField(default=False)
+    created_at = models.DateTimeField(auto_now_add=True, db_index=True)
     updated_at = models.DateTimeField(auto_now=True)
+    deleted_at = models.DateTimeField(null=True, blank=True, db_index=True)
+    
+    objects = AliveManager()
+    all_objects = models.Manager()
     
     class Meta:
         ordering = ['-created_at']
@@ -229,7 +421,9 @@ class Post(models.Model):
         return f'{self.author.username}: {self.content[:30]}'
     
     def likes_count(self):
-        return self.likes.count()
+        if hasattr(self, 'like_total'):
+            return self.like_total
+        return self.like_counters.aggregate(total=models.Sum('count'))['total'] or 0
     
     def comments_count(self):
         return self.comments.count()
@@ -238,7 +432,7 @@ class Post(models.Model):
 class PostLike(models.Model):
     post = models.ForeignKey(Post, related_name='likes', on_delete=models.CASCADE)
     user = models.ForeignKey(User, related_name='liked_posts', on_delete=models.CASCADE)
-    created_at = models.DateTimeField(auto_now_add=True)
+    created_at = models.DateTimeField(auto_now_add=True, db_index=True)
     
     class Meta:
         unique_together = ('post', 'user')
@@ -248,11 +442,38 @@ class PostLike(models.Model):
         return f'{self.user.username} лайкнув {self.post.id}'
 
 
+class PostLikeCounter(models.Model):
+    # лічильник лайків розбитий на шарди, щоб паралельні записи йшли в різні рядки
+    SHARDS = 8
+    
+    post = models.ForeignKey(Post, related_name='like_counters', on_delete=models.CASCADE)
+    shard = models.PositiveSmallIntegerField()
+    count = models.IntegerField(default=0)
+    
+    class Meta:
+        unique_together = ('post', 'shard')
+    
+    def __str__(self):
+        return f'{self.post_id}[{self.shard}]: {self.count}'
+
+
+class PostScore(models.Model):
+    # попередньо обчислений рейтинг поста для стрічки "Для вас" і "Популярне"
+    post = models.OneToOneField(Post, primary_key=True, related_name='score', on_delete=models.CASCADE)
+    score = models.FloatField(db_index=True)
+    likes = models.PositiveIntegerField(default=0)
+    comments = models.PositiveIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    def __str__(self):
+        return f'{self.post_id}: {self.score:.3f}'
+
+
 class PostComment(models.Model):
     post = models.ForeignKey(Post, related_name='comments', on_delete=models.CASCADE)
     author = models.ForeignKey(User, on_delete=models.CASCADE)
     content = models.TextField()
-    created_at = models.DateTimeField(auto_now_add=True)
+    created_at = models.DateTimeField(auto_now_add=True, db_index=True)
     
     class Meta:
         ordering = ['created_at']
@@ -265,6 +486,10 @@ class News(models.Model):
     title = models.CharField(max_length=200)
     content = models.TextField()
     image = models.ImageField(upload_to='news/', blank=True, null=True)
+    image_width = models.PositiveIntegerField(null=True, blank=True)
+    image_height = models.PositiveIntegerField(null=True, blank=True)
+    image_placeholder = models.TextField(blank=True)
+    image_variants = models.BooleanField(default=False)
     author = models.ForeignKey(User, on_delete=models.CASCADE)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
@@ -0,0 +1,58 @@
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Case, DateTimeField, Value, When
+from django.utils import timezone
+
+from .buffers import WriteBehindBuffer
+from .models import Profile
+
+
+# -- присутність --
+# Кожен запит користувача оновлює в кеші presence:<id> - час останньої
+# активності, що живе PRESENCE_ONLINE_SECONDS: поки ключ є, користувач
+# онлайн. У БД (Profile.last_seen) час потрапляє не частіше ніж раз на
+# PRESENCE_FLUSH_SECONDS на користувача, і то пачкою через last_seen_buffer.
+
+LAST_SEEN_MAX_ITEMS = 500
+
+
+def presence_key(user_id):
+    return f'presence:{user_id}'
+
+
+def record_heartbeat(user_id):
+    now = timezone.now()
+    cache.set(presence_key(user_id), now, settings.PRESENCE_ONLINE_SECONDS)
+    if cache.add(f'presence:flushed:{user_id}', 1, settings.PRESENCE_FLUSH_SECONDS):
+        last_seen_buffer.put(user_id, now)
+
+
+def flush_last_seen(items):
+    Profile.objects.filter(user_id__in=items).update(last_seen=Case(
+        *[When(user_id=user_id, then=Value(seen)) for user_id, seen in items.items()],
+        output_field=DateTimeField(),
+    ))
+
+
+last_seen_buffer = WriteBehindBuffer(
+    'last_seen', flush_last_seen, settings.PRESENCE_FLUSH_SECONDS, LAST_SEEN_MAX_ITEMS
+)
+
+
+def online_users(user_ids):
+    """{user_id: час останньої активності} для тих, хто онлайн, одним запитом до кешу."""
+    keys = {presence_key(user_id): user_id for user_id in user_ids}
+    return {keys[key]: seen for key, seen in cache.get_many(keys).items()}
+
+
+def attach_presence(users):
+    """Проставляє user.is_online для сторінки користувачів."""
+    users = [user for user in users if user is not None]
+    online = online_users(user.id for user in users)
+    for user in users:
+        user.is_online = user.id in online
+    return users
+
+
+def presence_etag(user_ids):
+    return ','.join(str(user_id) for user_id in sorted(online_users(user_ids)))
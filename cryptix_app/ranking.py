@@ -0,0 +1,121 @@
+import math
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from .models import Post, PostComment, PostLike, PostScore
+from .utils import like_total
+
+
+# -- рейтинг постів --
+# score = log10(1 + залученість) + вік / DECAY: кожні DECAY секунд новизни
+# важать як десятикратна залученість. Час уже "вшитий" у score, тож
+# перераховувати треба лише пости з новими лайками/коментарями.
+
+RANKING_EPOCH = 1_700_000_000
+RANKING_DECAY = 45_000
+COMMENT_WEIGHT = 2
+LAST_RUN_KEY = 'ranking:last_run'
+AFFINITY_TIMEOUT = 10 * 60
+
+
+def hot_score(likes, comments, created_at):
+    engagement = likes + COMMENT_WEIGHT * comments
+    return math.log10(1 + engagement) + (created_at.timestamp() - RANKING_EPOCH) / RANKING_DECAY
+
+
+def _score_posts(post_ids, chunk_size=500):
+    post_ids = list(post_ids)
+    comments = PostComment.objects.filter(post=OuterRef('pk')).order_by().values('post').annotate(
+        total=Count('id')
+    ).values('total')
+    scored = 0
+    for start in range(0, len(post_ids), chunk_size):
+        rows = Post.objects.filter(id__in=post_ids[start:start + chunk_size]).annotate(
+            like_count=like_total(), comment_count=Coalesce(Subquery(comments), 0)
+        ).values_list('id', 'created_at', 'like_count', 'comment_count')
+        PostScore.objects.bulk_create(
+            [
+                PostScore(post_id=post_id, likes=likes, comments=comment_count,
+                          score=hot_score(likes, comment_count, created_at))
+                for post_id, created_at, likes, comment_count in rows
+            ],
+            update_conflicts=True,
+            unique_fields=['post'],
+            update_fields=['score', 'likes', 'comments', 'updated_at'],
+        )
+        scored += len(rows)
+    return scored
+
+
+def update_post_scores(full=False):
+    now = timezone.now()
+    window_start = now - timedelta(days=settings.RANKING_WINDOW_DAYS)
+    since = None if full else cache.get(LAST_RUN_KEY)
+
+    if since is None:
+        candidates = set(Post.objects.filter(created_at__gte=window_start).values_list('id', flat=True))
+        pruned, _ = PostScore.objects.filter(post__created_at__lt=window_start).delete()
+    else:
+        # невеликий перехлест, щоб не загубити записи, що комітились під час запуску
+        since -= timedelta(seconds=5)
+        candidates = set(Post.objects.filter(created_at__gte=since).values_list('id', flat=True))
+        candidates |= set(PostLike.objects.filter(created_at__gte=since).values_list('post_id', flat=True))
+        candidates |= set(PostComment.objects.filter(created_at__gte=since).values_list('post_id', flat=True))
+        pruned = 0
+
+    scored = _score_posts(candidates)
+    cache.set(LAST_RUN_KEY, now, None)
+    return {'scored': scored, 'pruned': pruned, 'full': since is None}
+
+
+# -- спорідненість з авторами --
+
+def author_affinity(user, author_ids):
+    """Кількість лайків і коментарів користувача під постами кожного автора."""
+    key = f'affinity:{user.id}'
+    affinity = cache.get(key)
+    if affinity is None:
+        since = timezone.now() - timedelta(days=settings.RANKING_AFFINITY_DAYS)
+        affinity = {}
+        for model, field in ((PostLike, 'user'), (PostComment, 'author')):
+            rows = model.objects.filter(**{field: user}, created_at__gte=since).exclude(post__author=user).values(
+                'post__author_id'
+            ).annotate(total=Count('id')).values_list('post__author_id', 'total')
+            for author_id, total in rows:
+                affinity[author_id] = affinity.get(author_id, 0) + total
+        cache.set(key, affinity, AFFINITY_TIMEOUT)
+    return {author_id: affinity.get(author_id, 0) for author_id in author_ids}
+
+
+def ranked_feed(user, author_ids, limit=50):
+    since = timezone.now() - timedelta(days=settings.RANKING_WINDOW_DAYS)
+    base = Post.objects.filter(author_id__in=author_ids, created_at__gte=since)
+    scored = list(base.filter(score__isnull=False).order_by('-score__score').values_list(
+        'id', 'author_id', 'score__score'
+    )[:limit * 2])
+    # пости, які задача ще не встигла оцінити
+    unscored = [
+        (post_id, author_id, hot_score(0, 0, created_at))
+        for post_id, author_id, created_at in base.filter(score__isnull=True).order_by('-created_at').values_list(
+            'id', 'author_id', 'created_at'
+        )[:limit]
+    ]
+
+    candidates = scored + unscored
+    affinity = author_affinity(user, {author_id for _, author_id, _ in candidates})
+    ranked = sorted(
+        candidates, key=lambda row: row[2] + math.log10(1 + affinity[row[1]]), reverse=True
+    )
+    return [post_id for post_id, _, _ in ranked[:limit]]
+
+
+def trending_post_ids(limit=50):
+    since = timezone.now() - timedelta(days=settings.RANKING_TRENDING_DAYS)
+    return list(PostScore.objects.filter(
+        post__created_at__gte=since, post__deleted_at__isnull=True
+    ).order_by('-score').values_list('post_id', flat=True)[:limit])
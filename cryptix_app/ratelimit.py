@@ -0,0 +1,99 @@
+import os
+import time
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.core.cache import DEFAULT_CACHE_ALIAS, cache, caches
+from django.core.cache.backends.filebased import FileBasedCache
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+
+# -- обмеження частоти записів --
+# Лічильники ковзного вікна у спільному кеші: ліміт на користувача і ширший
+# ліміт на IP (RATE_LIMIT_IP_FACTOR - за одним NAT буває багато людей).
+# Ліміт "<кількість>/<період>": скільки записів дозволено за період. Оцінка -
+# лічильник поточного вікна плюс частка попереднього, що ще в нього потрапляє.
+# cache.incr атомарний у redis і в межах процесу locmem; у файловому кеші це
+# читання і запис окремо, тож там перевірку лімітів разом зі збільшенням
+# лічильників виконуємо під flock (без fcntl, на Windows, - без блокування).
+# Так паралельні запити не перевищать ліміт; до БД справа не доходить.
+
+PERIODS = {'sec': 1, 'min': 60, 'hour': 60 * 60, 'day': 24 * 60 * 60}
+
+
+def parse_rate(rate):
+    count, period = rate.split('/')
+    return int(count), PERIODS[period]
+
+
+def client_ip(request):
+    """Адреса клієнта з урахуванням RATE_LIMIT_TRUSTED_PROXIES проксі перед застосунком.
+
+    Кожен проксі дописує в X-Forwarded-For адресу, з якої до нього прийшов
+    запит, тож клієнт - адреса, записана першим довіреним проксі; те, що лівіше,
+    міг підробити сам клієнт.
+    """
+    addresses = [request.META.get('REMOTE_ADDR', '')]
+    trusted = settings.RATE_LIMIT_TRUSTED_PROXIES
+    if trusted:
+        forwarded = request.META.get('HTTP_X_FORWARDED_FOR', '')
+        addresses = [address.strip() for address in forwarded.split(',') if address.strip()] + addresses
+    return addresses[max(len(addresses) - 1 - trusted, 0)]
+
+
+@contextmanager
+def _counters_lock():
+    backend = caches[DEFAULT_CACHE_ALIAS]
+    if fcntl is None or not isinstance(backend, FileBasedCache):
+        yield
+        return
+    os.makedirs(backend._dir, exist_ok=True)
+    with open(os.path.join(backend._dir, 'ratelimit.lock'), 'a') as lock:
+        fcntl.flock(lock, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock, fcntl.LOCK_UN)
+
+
+def _increment(key, timeout):
+    cache.add(key, 0, timeout)
+    try:
+        return cache.incr(key)
+    except ValueError:
+        # ключ щойно застарів
+        cache.set(key, 1, timeout)
+        return 1
+
+
+def take_token(scope, request):
+    """Зараховує запит до лімітів scope; 0 або скільки секунд чекати."""
+    capacity, period = parse_rate(settings.RATE_LIMITS[scope])
+    limits = {f'ratelimit:{scope}:ip:{client_ip(request)}': capacity * settings.RATE_LIMIT_IP_FACTOR}
+    if request.user.is_authenticated:
+        limits[f'ratelimit:{scope}:user:{request.user.id}'] = capacity
+
+    now = time.time()
+    window, elapsed = divmod(now, period)
+    with _counters_lock():
+        previous = cache.get_many([f'{key}:{window - 1:.0f}' for key in limits])
+        over = False
+        for key, limit in limits.items():
+            current = _increment(f'{key}:{window:.0f}', period * 2)
+            estimate = previous.get(f'{key}:{window - 1:.0f}', 0) * (1 - elapsed / period) + current
+            over = over or estimate > limit
+        if over:
+            # відхилений запит не рахується
+            for key in limits:
+                try:
+                    cache.decr(f'{key}:{window:.0f}')
+                except ValueError:
+                    # ключ застарів між incr і decr - віднімати вже нічого
+                    pass
+    if not over:
+        return 0
+    return max(period - elapsed, 1)
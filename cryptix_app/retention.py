@@ -0,0 +1,103 @@
+import gzip
+import json
+import os
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.db.models import Count
+from django.utils import timezone
+
+from .cache import touch_watermark
+from .models import Notification
+
+
+# -- очищення старих сповіщень --
+# Видаляємо невеликими порціями за id: кожна порція - окрема коротка
+# транзакція, тож SQLite не тримає блокування запису надовго.
+
+ARCHIVE_FIELDS = [
+    'id', 'recipient_id', 'sender_id', 'notification_type', 'target_key', 'text', 'link',
+    'is_read', 'actor_count', 'created_at', 'updated_at',
+]
+
+
+class NotificationArchive:
+    def __init__(self, directory):
+        os.makedirs(directory, exist_ok=True)
+        name = f'notifications-{timezone.now():%Y%m%d-%H%M%S}.jsonl.gz'
+        self.path = os.path.join(directory, name)
+        self.file = None
+
+    def write(self, rows):
+        if self.file is None:
+            self.file = gzip.open(self.path, 'at', encoding='utf-8')
+        for row in rows:
+            self.file.write(json.dumps(row, ensure_ascii=False, default=str) + '\n')
+
+    def close(self):
+        if self.file is not None:
+            self.file.close()
+
+
+def _delete_chunk(queryset, chunk_size, archive):
+    fields = ARCHIVE_FIELDS if archive is not None else ['id', 'recipient_id']
+    rows = list(queryset.values(*fields)[:chunk_size])
+    if not rows:
+        return 0
+
+    if archive is not None:
+        archive.write(rows)
+    deleted, _ = Notification.objects.filter(id__in=[row['id'] for row in rows]).delete()
+    touch_watermark('notifications', *{row['recipient_id'] for row in rows})
+    return deleted
+
+
+def _purge(queryset, chunk_size, archive, pause):
+    total = 0
+    while True:
+        deleted = _delete_chunk(queryset, chunk_size, archive)
+        total += deleted
+        if deleted < chunk_size:
+            return total
+        if pause:
+            time.sleep(pause)
+
+
+def purge_notifications(days=None, keep_per_user=None, chunk_size=None, archive_dir=None, pause=0):
+    days = settings.NOTIFICATION_RETENTION_DAYS if days is None else days
+    keep_per_user = settings.NOTIFICATION_MAX_PER_USER if keep_per_user is None else keep_per_user
+    chunk_size = chunk_size or settings.NOTIFICATION_PURGE_CHUNK
+    archive_dir = archive_dir or settings.NOTIFICATION_ARCHIVE_DIR
+    archive = NotificationArchive(archive_dir) if archive_dir else None
+
+    try:
+        # прочитані сповіщення, старші за термін зберігання
+        expired = Notification.objects.filter(
+            is_read=True, updated_at__lt=timezone.now() - timedelta(days=days)
+        ).order_by('id')
+        result = {'expired': _purge(expired, chunk_size, archive, pause), 'over_cap': 0}
+
+        # ліміт на користувача: лишаємо keep_per_user найновіших
+        if keep_per_user:
+            over_cap = Notification.objects.values('recipient_id').annotate(
+                total=Count('id')
+            ).filter(total__gt=keep_per_user).values_list('recipient_id', flat=True)
+            for recipient_id in list(over_cap):
+                oldest = Notification.objects.filter(recipient_id=recipient_id).order_by('-updated_at', '-id')
+                while True:
+                    ids = list(oldest.values_list('id', flat=True)[keep_per_user:keep_per_user + chunk_size])
+                    if not ids:
+                        break
+                    result['over_cap'] += _delete_chunk(
+                        Notification.objects.filter(id__in=ids), chunk_size, archive
+                    )
+                    if pause:
+                        time.sleep(pause)
+    finally:
+        if archive is not None:
+            archive.close()
+
+    if archive is not None and archive.file is not None:
+        result['archive'] = archive.path
+    return result
@@ -0,0 +1,89 @@
+import logging
+import re
+
+from django.db import connections
+from django.db.models.expressions import RawSQL
+
+from .models import Message, Notification, Post, PostComment
+
+
+logger = logging.getLogger(__name__)
+
+
+# -- повнотекстовий пошук --
+# Для текстових полів великих таблиць тримаємо FTS5-таблицю <таблиця>_fts
+# (external content: зберігає лише індекс, текст читається з основної
+# таблиці). Тригери оновлюють її разом з основною таблицею, зокрема при
+# сирих DELETE з deletion.py і retention.py.
+#
+# SQLite при перебудові таблиці в міграціях видаляє її тригери, тому індекси
+# не створюються міграцією, а перевіряються після кожного migrate
+# (apps.py, post_migrate) і перебудовуються, якщо чогось бракує.
+
+FTS_FIELDS = {
+    Message: 'content',
+    Notification: 'text',
+    Post: 'content',
+    PostComment: 'content',
+}
+
+
+def fts_table(model):
+    return f'{model._meta.db_table}_fts'
+
+
+def _fts_statements(model, column):
+    table = model._meta.db_table
+    fts = fts_table(model)
+    return {
+        fts: (
+            f"CREATE VIRTUAL TABLE IF NOT EXISTS {fts} USING fts5("
+            f"{column}, content='{table}', content_rowid='id', tokenize='unicode61 remove_diacritics 2')"
+        ),
+        f'{fts}_ai': (
+            f"CREATE TRIGGER IF NOT EXISTS {fts}_ai AFTER INSERT ON {table} BEGIN "
+            f"INSERT INTO {fts}(rowid, {column}) VALUES (new.id, new.{column}); END"
+        ),
+        f'{fts}_ad': (
+            f"CREATE TRIGGER IF NOT EXISTS {fts}_ad AFTER DELETE ON {table} BEGIN "
+            f"INSERT INTO {fts}({fts}, rowid, {column}) VALUES ('delete', old.id, old.{column}); END"
+        ),
+        f'{fts}_au': (
+            f"CREATE TRIGGER IF NOT EXISTS {fts}_au AFTER UPDATE OF {column} ON {table} BEGIN "
+            f"INSERT INTO {fts}({fts}, rowid, {column}) VALUES ('delete', old.id, old.{column}); "
+            f"INSERT INTO {fts}(rowid, {column}) VALUES (new.id, new.{column}); END"
+        ),
+    }
+
+
+def ensure_fts_indexes(using='default'):
+    connection = connections[using]
+    if connection.vendor != 'sqlite':
+        return []
+    rebuilt = []
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT name FROM sqlite_master WHERE type IN ('table', 'trigger')")
+        existing = {row[0] for row in cursor.fetchall()}
+        for model, column in FTS_FIELDS.items():
+            statements = _fts_statements(model, column)
+            if statements.keys() <= existing:
+                continue
+            for sql in statements.values():
+                cursor.execute(sql)
+            fts = fts_table(model)
+            cursor.execute(f"INSERT INTO {fts}({fts}) VALUES ('rebuild')")
+            rebuilt.append(fts)
+    if rebuilt:
+        logger.info('Перебудовано FTS-індекси: %s', ', '.join(rebuilt))
+    return rebuilt
+
+
+def fts_query(term):
+    """Кожне слово запиту як префікс: "прив" знайде "привіт"."""
+    return ' '.join(f'"{word}"*' for word in re.findall(r'\w+', term))
+
+
+def fts_matches(model, term):
+    """Підзапит id рядків, текст яких містить усі слова term, для pk__in."""
+    fts = fts_table(model)
+    return RawSQL(f'SELECT rowid FROM {fts} WHERE {fts} MATCH %s', (fts_query(term),))
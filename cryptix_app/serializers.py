@@ -0,0 +1,131 @@
+from django.contrib.auth.models import User
+from django.core.exceptions import ValidationError as DjangoValidationError
+from rest_framework import serializers
+
+from .models import Profile, Friendship, Conversation, Message, Group, Notification, Post, PostComment
+from .uploads import check_image, check_not_rejected
+
+
+# -- короткі представлення, що вбудовуються в інші відповіді --
+class UserShortSerializer(serializers.ModelSerializer):
+    avatar = serializers.SerializerMethodField()
+
+    class Meta:
+        model = User
+        fields = ['id', 'username', 'avatar']
+
+    def get_avatar(self, user):
+        profile = getattr(user, 'profile', None)
+        if profile is not None and profile.avatar:
+            return profile.avatar.url
+        return None
+
+
+class ProfileSerializer(serializers.ModelSerializer):
+    id = serializers.IntegerField(source='user.id')
+    username = serializers.CharField(source='user.username')
+    first_name = serializers.CharField(source='user.first_name')
+    last_name = serializers.CharField(source='user.last_name')
+    avatar = serializers.ImageField(use_url=True)
+    friends_count = serializers.IntegerField(read_only=True)
+    followers_count = serializers.IntegerField(read_only=True)
+    following_count = serializers.IntegerField(read_only=True)
+    groups_count = serializers.IntegerField(read_only=True)
+
+    class Meta:
+        model = Profile
+        fields = [
+            'id', 'username', 'first_name', 'last_name', 'bio', 'avatar', 'location', 'website',
+            'friends_count', 'followers_count', 'following_count', 'groups_count',
+        ]
+
+
+class FriendRequestSerializer(serializers.ModelSerializer):
+    from_user = UserShortSerializer(read_only=True)
+
+    class Meta:
+        model = Friendship
+        fields = ['id', 'from_user', 'created_at']
+
+
+# -- стрічка --
+class PostSerializer(serializers.ModelSerializer):
+    author = UserShortSerializer(read_only=True)
+    # FileField замість ImageField: у запиті перевіряється лише заголовок (uploads.check_image)
+    image = serializers.FileField(use_url=True, required=False, allow_null=True)
+    likes_count = serializers.IntegerField(source='num_likes', read_only=True)
+    comments_count = serializers.IntegerField(source='num_comments', read_only=True)
+    liked = serializers.BooleanField(read_only=True)
+
+    class Meta:
+        model = Post
+        fields = ['id', 'author', 'content', 'image', 'created_at', 'likes_count', 'comments_count', 'liked']
+        read_only_fields = ['created_at']
+
+    def validate(self, attrs):
+        try:
+            check_not_rejected(self.context['request'], 'image')
+            if attrs.get('image'):
+                check_image(attrs['image'])
+        except DjangoValidationError as error:
+            raise serializers.ValidationError({'image': error.messages})
+        return attrs
+
+
+class PostCommentSerializer(serializers.ModelSerializer):
+    author = UserShortSerializer(read_only=True)
+
+    class Meta:
+        model = PostComment
+        fields = ['id', 'author', 'content', 'created_at']
+        read_only_fields = ['created_at']
+
+
+# -- чат --
+class MessageSerializer(serializers.ModelSerializer):
+    sender_id = serializers.IntegerField(read_only=True)
+
+    class Meta:
+        model = Message
+        fields = ['id', 'sender_id', 'content', 'created_at', 'is_read']
+        read_only_fields = ['created_at', 'is_read']
+
+
+class ConversationSerializer(serializers.ModelSerializer):
+    other_user = serializers.SerializerMethodField()
+    last_message = serializers.CharField(read_only=True)
+    last_message_at = serializers.DateTimeField(read_only=True)
+    unread_count = serializers.IntegerField(read_only=True)
+
+    class Meta:
+        model = Conversation
+        fields = ['id', 'other_user', 'last_message', 'last_message_at', 'unread_count', 'updated_at']
+
+    def get_other_user(self, conversation):
+        request_user_id = self.context['request'].user.id
+        for user in conversation.participants.all():
+            if user.id != request_user_id:
+                return UserShortSerializer(user).data
+        return None
+
+
+# -- сповіщення --
+class NotificationSerializer(serializers.ModelSerializer):
+    sender = serializers.CharField(source='sender.username', default=None, read_only=True)
+
+    class Meta:
+        model = Notification
+        fields = ['id', 'notification_type', 'sender', 'text', 'link', 'is_read', 'actor_count', 'created_at', 'updated_at']
+
+
+# -- групи --
+class GroupSerializer(serializers.ModelSerializer):
+    avatar = serializers.ImageField(use_url=True, read_only=True)
+    role = serializers.SerializerMethodField()
+
+    class Meta:
+        model = Group
+        fields = ['id', 'name', 'description', 'avatar', 'is_private', 'member_count', 'created_at', 'role']
+
+    def get_role(self, group):
+        return self.context.get('group_roles', {}).get(group.id)
@@ -0,0 +1,12 @@
+from whitenoise.storage import CompressedManifestStaticFilesStorage
+
+
+class StaticFilesStorage(CompressedManifestStaticFilesStorage):
+    """Файли з хешем вмісту в назві (кешуються браузером назавжди) і .gz/.br копіями."""
+
+    def stored_name(self, name):
+        try:
+            return super().stored_name(name)
+        except ValueError:
+            # collectstatic ще не запускався (тести, локальний запуск) - віддаємо назву без хешу
+            return name
@@ -0,0 +1,96 @@
+import logging
+import time
+from datetime import timedelta
+
+from django.utils import timezone
+
+from .archive import archive_messages
+from .deletion import purge_tombstones
+from .models import JobSchedule
+from .ranking import update_post_scores
+from .retention import purge_notifications
+from .uploads import process_pending_images
+
+
+logger = logging.getLogger(__name__)
+
+
+# -- періодичні задачі --
+# Реєстр задач, які виконує команда run_worker. Перед запуском задача
+# переносить свій JobSchedule.next_run_at на інтервал вперед умовним UPDATE,
+# тож кілька воркерів (або cron разом з воркером) не запустять її двічі.
+
+PERIODIC_JOBS = {}
+
+
+def periodic(interval):
+    def register(func):
+        PERIODIC_JOBS[func.__name__] = (func, interval)
+        return func
+    return register
+
+
+def run_job(name):
+    func, interval = PERIODIC_JOBS[name]
+    started = time.monotonic()
+    result = func()
+    logger.info('Задача %s виконана за %.2f с: %s', name, time.monotonic() - started, result)
+    return result
+
+
+def claim_job(name, interval, now):
+    """True, якщо цей процес забрав запуск задачі, що настав."""
+    return bool(JobSchedule.objects.filter(name=name, next_run_at__lte=now).update(
+        next_run_at=now + timedelta(seconds=interval)
+    ))
+
+
+def run_due_jobs():
+    now = timezone.now()
+    schedule = dict(JobSchedule.objects.values_list('name', 'next_run_at'))
+    new_jobs = [JobSchedule(name=name, next_run_at=now) for name in PERIODIC_JOBS if name not in schedule]
+    if new_jobs:
+        JobSchedule.objects.bulk_create(new_jobs, ignore_conflicts=True)
+
+    results = {}
+    for name, (func, interval) in PERIODIC_JOBS.items():
+        if schedule.get(name, now) > now or not claim_job(name, interval, now):
+            continue
+        try:
+            results[name] = run_job(name)
+        except Exception:
+            logger.exception('Задача %s завершилась помилкою', name)
+            # повторимо на наступній перевірці
+            JobSchedule.objects.filter(name=name).update(next_run_at=now)
+    return results
+
+
+@periodic(60 * 60)
+def notification_retention():
+    return purge_notifications(pause=0.05)
+
+
+@periodic(60 * 60)
+def message_archival():
+    return archive_messages(pause=0.05)
+
+
+@periodic(60)
+def purge_deleted():
+    return purge_tombstones()
+
+
+@periodic(5 * 60)
+def score_posts():
+    return update_post_scores()
+
+
+@periodic(24 * 60 * 60)
+def rebuild_post_scores():
+    # повний перерахунок враховує зняті лайки і прибирає старі оцінки
+    return update_post_scores(full=True)
+
+
+@periodic(10)
+def process_images():
+    return process_pending_images()
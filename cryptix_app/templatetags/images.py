@@ -0,0 +1,40 @@
+from django import template
+from django.forms.utils import flatatt
+from django.utils.html import format_html
+
+from ..uploads import SRCSET_WIDTHS, variant_name
+
+
+register = template.Library()
+
+
+@register.simple_tag
+def lazy_image(file, alt='', sizes='100vw', loading='lazy', style='', **attrs):
+    """<img> з розмірами, srcset і розмитим превʼю замість повного завантаження.
+
+    {% lazy_image post.image alt="..." sizes="40px" style="..." class="..." %}
+    """
+    if not file:
+        return ''
+    field = file.field.name
+    width = getattr(file.instance, f'{field}_width', None)
+    height = getattr(file.instance, f'{field}_height', None)
+    preview = getattr(file.instance, f'{field}_placeholder', '')
+    variants = getattr(file.instance, f'{field}_variants', False)
+
+    img = {'src': file.url, 'alt': alt}
+    # до обробки воркером розміри невідомі, тож і копій для srcset ще немає
+    if width and height:
+        img.update(width=width, height=height)
+        if variants:
+            candidates = [f'{file.storage.url(variant_name(file.name, w))} {w}w' for w in SRCSET_WIDTHS if w < width]
+            if candidates:
+                img['srcset'] = ', '.join(candidates + [f'{file.url} {width}w'])
+                img['sizes'] = sizes
+    img.update(loading=loading, decoding='async')
+    if preview:
+        style = f'background: center / cover no-repeat url("{preview}"); {style}'
+    if style:
+        img['style'] = style
+    img.update(attrs)
+    return format_html('<img{}>', flatatt(img))
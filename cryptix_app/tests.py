@@ -1,7 +1,1203 @@
-from django.test import TestCase
+import asyncio
+import base64
+import gzip
+import json
+import tempfile
+import threading
+import zlib
+from datetime import timedelta
+from io import BytesIO, StringIO
+from unittest import mock
+
+from PIL import Image
+from asgiref.sync import sync_to_async
+from django.contrib.auth.models import AnonymousUser, User
+from django.core.cache import caches
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.db import DatabaseError, connection
+from django.http import HttpResponse, StreamingHttpResponse
+from django.test import Client, RequestFactory, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.authentication import BasicAuthentication
+from rest_framework.views import APIView
+
+from .archive import archive_messages, message_page
+from . import deletion
+from .cache import group_roles
+from .deletion import purge_tombstones, soft_delete_post, soft_delete_user
+from .search import fts_matches
+from .events import broker
+from .middleware import CompressionMiddleware, choose_encoding
+from .presence import last_seen_buffer, online_users
+from .ranking import update_post_scores
+from .ratelimit import client_ip, take_token
+from .tasks import run_due_jobs
+from .models import (
+    Conversation, Follow, Friendship, Group, GroupMembership, GroupPost, GroupPostComment, JobSchedule, Message, MessageArchive,
+    News, Notification, NotificationActor, Post, PostLike, PostLikeCounter, PendingImage, PostComment, PostScore, Profile, Review, ReviewStats, Tombstone,
+)
+from .uploads import process_pending_images, variant_name
+from .utils import add_like_delta, add_post_comment, create_notification, like_buffer, notify_post_likes, remove_review
 
 
 class CryptixTest(TestCase):
     def test_main(self):
         response = self.client.get("/")
-        self.assertEqual(response.status_code, 200)
\ No newline at end of file
+        self.assertEqual(response.status_code, 200)
+
+
+class CachedTestCase(TestCase):
+    def _pre_setup(self):
+        super()._pre_setup()
+        for cache in caches.all():
+            cache.clear()
+
+    def _post_teardown(self):
+        # відкладені last_seen пишемо до відкату транзакції тесту, а не таймером
+        last_seen_buffer.flush()
+        super()._post_teardown()
+
+
+class ReadinessTest(TestCase):
+    def test_ready_without_login(self):
+        response = self.client.get('/ready/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['status'], 'ok')
+
+
+class SeedBenchmarkTest(TestCase):
+    def test_seed_creates_dataset(self):
+        call_command(
+            'seed_benchmark', users=12, friends=3, follows=3, posts=2, likes=2,
+            comments=1, conversations=1, messages=4, groups=2, members=4, group_posts=1,
+            stdout=StringIO(),
+        )
+        self.assertEqual(User.objects.filter(username__startswith='bench_').count(), 12)
+        self.assertEqual(Post.objects.count(), 24)
+        self.assertEqual(PostLike.objects.count(), 48)
+        self.assertTrue(Friendship.objects.filter(status=Friendship.ACCEPTED).exists())
+        self.assertEqual(GroupMembership.objects.filter(role=GroupMembership.ADMIN).count(), 2)
+        self.assertTrue(self.client.login(username='bench_0', password='bench-pass-123'))
+
+
+class FragmentCacheTest(CachedTestCase):
+    def setUp(self):
+        self.user = User.objects.create_user('author', password='pass-12345')
+        self.post = Post.objects.create(author=self.user, content='Перший пост')
+        self.client.login(username='author', password='pass-12345')
+
+    def test_like_invalidates_cached_card(self):
+        response = self.client.get('/app/feed/')
+        self.assertContains(response, '👍 0')
+
+        self.client.post(f'/app/post/{self.post.id}/like/')
+        response = self.client.get('/app/feed/')
+        self.assertContains(response, '👍 1')
+
+    def test_comment_routes_to_feed_post(self):
+        self.client.get('/app/feed/')
+        self.client.post(f'/app/post/{self.post.id}/comment/', {'content': 'Новий коментар'})
+        self.assertContains(self.client.get('/app/feed/'), 'Новий коментар')
+
+
+class PagesTest(CachedTestCase):
+    def setUp(self):
+        self.user = User.objects.create_user('viewer', password='pass-12345')
+        self.other = User.objects.create_user('other', password='pass-12345')
+        self.group = Group.objects.create(name='Група', creator=self.user)
+        GroupMembership.objects.create(user=self.user, group=self.group, role=GroupMembership.ADMIN)
+        News.objects.create(title='Новина', content='Текст', author=self.other)
+        Review.objects.create(reviewer=self.other, reviewed_user=self.user, rating=4, comment='Добре')
+        self.client.login(username='viewer', password='pass-12345')
+
+    def test_pages_render(self):
+        for url in [
+            '/app/', '/app/feed/', '/app/users/', '/app/friends/', '/app/followers/',
+            '/app/following/', '/app/conversations/', '/app/groups/', f'/app/group/{self.group.id}/',
+            '/app/notifications/', '/app/user/viewer/', '/app/profile/', '/app/my-posts/',
+        ]:
+            with self.subTest(url=url):
+                self.assertEqual(self.client.get(url).status_code, 200)
+
+
+class NewsPageCacheTest(CachedTestCase):
+    def setUp(self):
+        self.admin = User.objects.create_superuser('admin', password='pass-12345')
+        self.user = User.objects.create_user('reader', password='pass-12345')
+        self.news = News.objects.create(title='Стара новина', content='Текст', author=self.admin)
+        self.client.login(username='reader', password='pass-12345')
+
+    def test_conditional_get_and_invalidation(self):
+        response = self.client.get('/app/')
+        self.assertContains(response, 'Стара новина')
+        etag = response['ETag']
+
+        response = self.client.get('/app/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+        admin_client = self.client_class()
+        admin_client.login(username='admin', password='pass-12345')
+        admin_client.post(f'/app/news/{self.news.id}/edit/', {'title': 'Нова назва', 'content': 'Текст'})
+
+        response = self.client.get('/app/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, 'Нова назва')
+        self.assertNotEqual(response['ETag'], etag)
+
+
+class ConditionalListTest(CachedTestCase):
+    def setUp(self):
+        self.user = User.objects.create_user('alice', password='pass-12345')
+        self.other = User.objects.create_user('bob', password='pass-12345')
+        self.client.login(username='alice', password='pass-12345')
+
+    def test_friends_list_returns_304_until_friendship_changes(self):
+        etag = self.client.get('/app/friends/')['ETag']
+        self.assertEqual(self.client.get('/app/friends/', HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+        friendship = Friendship.objects.create(from_user=self.other, to_user=self.user)
+        self.client.get(f'/app/accept-request/{friendship.id}/')
+        response = self.client.get('/app/friends/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, 'bob')
+
+    def test_new_notification_invalidates_list(self):
+        etag = self.client.get('/app/notifications/')['ETag']
+        bob = self.client_class()
+        bob.login(username='bob', password='pass-12345')
+        bob.get(f'/app/send-request/{self.user.id}/')
+        self.assertEqual(self.client.get('/app/notifications/', HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+    def test_page_with_unread_markers_is_not_revalidated(self):
+        create_notification(self.user, Notification.MESSAGE, 'Привіт', sender=self.other)
+        with_unread = self.client.get('/app/notifications/')
+        self.assertEqual(with_unread.context['unread_count'], 1)
+        response = self.client.get('/app/notifications/', HTTP_IF_NONE_MATCH=with_unread['ETag'])
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context['unread_count'], 0)
+        self.assertEqual(self.client.get('/app/notifications/', HTTP_IF_NONE_MATCH=response['ETag']).status_code, 304)
+
+
+class GroupMembershipTest(CachedTestCase):
+    def setUp(self):
+        self.owner = User.objects.create_user('owner', password='pass-12345')
+        self.user = User.objects.create_user('member', password='pass-12345')
+        self.client.login(username='owner', password='pass-12345')
+        self.client.post('/app/group/create/', {'name': 'Клуб', 'description': ''})
+        self.group = Group.objects.get(name='Клуб')
+
+    def test_member_count_follows_join_and_leave(self):
+        self.assertEqual(self.group.member_count, 1)
+        member = self.client_class()
+        member.login(username='member', password='pass-12345')
+
+        member.post(f'/app/group/{self.group.id}/join/')
+        member.post(f'/app/group/{self.group.id}/join/')
+        self.group.refresh_from_db()
+        self.assertEqual(self.group.member_count, 2)
+
+        member.post(f'/app/group/{self.group.id}/leave/')
+        self.group.refresh_from_db()
+        self.assertEqual(self.group.member_count, 1)
+
+    def test_groups_list_query_count_is_constant(self):
+        for n in range(30):
+            Group.objects.create(name=f'Група {n}', creator=self.user)
+        self.client.get('/app/groups/')
+        with self.assertNumQueries(4):
+            response = self.client.get('/app/groups/?page=2')
+        self.assertContains(response, 'Сторінка 2 з 2')
+
+    def test_group_detail_uses_cached_roles(self):
+        url = f'/app/group/{self.group.id}/'
+        self.client.get(url)
+        with self.assertNumQueries(3):
+            response = self.client.get(url)
+        self.assertContains(response, 'Видалити групу')
+
+        self.client.post(f'/app/group/{self.group.id}/delete/')
+        self.assertFalse(Group.objects.filter(id=self.group.id).exists())
+        self.assertEqual(self.client.get(url).status_code, 404)
+
+
+class GroupStreamTest(CachedTestCase):
+    def setUp(self):
+        self.user = User.objects.create_user('member', password='pass-12345')
+        self.group = Group.objects.create(name='Стрім', creator=self.user, member_count=1)
+        GroupMembership.objects.create(user=self.user, group=self.group, role=GroupMembership.ADMIN)
+        self.posts = [GroupPost.objects.create(group=self.group, author=self.user, content=f'Пост {n}') for n in range(12)]
+        self.client.login(username='member', password='pass-12345')
+
+    def test_posts_are_paginated_with_cursor(self):
+        response = self.client.get(f'/app/group/{self.group.id}/')
+        self.assertContains(response, 'Пост 11')
+        self.assertNotContains(response, 'Пост 1<')
+        next_before = response.context['next_before']
+        response = self.client.get(f'/app/group/{self.group.id}/?before={next_before}')
+        self.assertContains(response, 'Пост 0')
+        self.assertIsNone(response.context['next_before'])
+
+    def test_comment_preview_and_load_more(self):
+        post = self.posts[-1]
+        for n in range(5):
+            self.client.post(f'/app/group/post/{post.id}/comment/', {'content': f'Коментар {n}'})
+        post.refresh_from_db()
+        self.assertEqual(post.comment_count, 5)
+
+        response = self.client.get(f'/app/group/{self.group.id}/')
+        latest = response.context['posts'][0].latest_comments
+        self.assertEqual([c.content for c in latest], ['Коментар 2', 'Коментар 3', 'Коментар 4'])
+
+        data = self.client.get(f'/app/group/post/{post.id}/comments/?before={latest[0].id}').json()
+        self.assertEqual([c['content'] for c in data['comments']], ['Коментар 0', 'Коментар 1'])
+        self.assertFalse(data['has_more'])
+
+
+class ApiTest(CachedTestCase):
+    def setUp(self):
+        self.user = User.objects.create_user('api_user', password='pass-12345')
+        self.friend = User.objects.create_user('api_friend', password='pass-12345')
+        Friendship.objects.create(from_user=self.user, to_user=self.friend, status=Friendship.ACCEPTED)
+        self.client.login(username='api_user', password='pass-12345')
+
+    def test_requires_authentication(self):
+        self.client.logout()
+        self.assertEqual(self.client.get('/api/v1/feed/').status_code, 403)
+
+    def test_feed_uses_cursor_pagination(self):
+        for n in range(25):
+            Post.objects.create(author=self.friend, content=f'Пост {n}')
+        data = self.client.get('/api/v1/feed/').json()
+        self.assertEqual(len(data['results']), 20)
+        self.assertEqual(data['results'][0]['content'], 'Пост 24')
+        self.assertEqual(data['results'][0]['author']['username'], 'api_friend')
+        data = self.client.get(data['next']).json()
+        self.assertEqual(len(data['results']), 5)
+        self.assertIsNone(data['next'])
+
+    def test_like_toggle_and_unread_notifications(self):
+        post = Post.objects.create(author=self.friend, content='Пост')
+        data = self.client.post(f'/api/v1/posts/{post.id}/like/').json()
+        self.assertEqual(data, {'liked': True, 'likes_count': 1})
+        data = self.client.post(f'/api/v1/posts/{post.id}/like/').json()
+        self.assertEqual(data, {'liked': False, 'likes_count': 0})
+
+        self.client.login(username='api_friend', password='pass-12345')
+        self.assertEqual(self.client.get('/api/v1/notifications/unread/').json(), {'unread': 1})
+        self.client.post('/api/v1/notifications/read/')
+        self.assertEqual(self.client.get('/api/v1/notifications/unread/').json(), {'unread': 0})
+
+    def test_private_group_hidden_from_non_members(self):
+        group = Group.objects.create(name='Закрита', creator=self.friend, is_private=True)
+        self.assertEqual(self.client.get(f'/api/v1/groups/{group.id}/').status_code, 403)
+
+
+class ApiBatchTest(CachedTestCase):
+    def setUp(self):
+        self.user = User.objects.create_user('batch_user', password='pass-12345')
+        self.friend = User.objects.create_user('batch_friend', password='pass-12345')
+        self.stranger = User.objects.create_user('batch_stranger', password='pass-12345')
+        Friendship.objects.create(from_user=self.user, to_user=self.friend, status=Friendship.ACCEPTED)
+        Friendship.objects.create(from_user=self.stranger, to_user=self.user)
+        Post.objects.create(author=self.friend, content='Пост друга')
+        self.client.login(username='batch_user', password='pass-12345')
+
+    def batch(self, *requests):
+        return self.client.post('/api/v1/batch/', {'requests': list(requests)}, content_type='application/json')
+
+    def test_startup_bundle_in_one_call(self):
+        response = self.batch(
+            {'id': 'me', 'path': '/api/v1/profiles/me/'},
+            {'id': 'notifications', 'path': '/api/v1/notifications/unread/'},
+            {'id': 'inbox', 'path': '/api/v1/conversations/unread/'},
+            {'id': 'requests', 'path': '/api/v1/friends/requests/'},
+            {'id': 'feed', 'path': '/api/v1/feed/?page_size=5'},
+        )
+        self.assertEqual(response.status_code, 200)
+        results = {r['id']: r for r in response.json()['responses']}
+        self.assertEqual({r['status'] for r in results.values()}, {200})
+        self.assertEqual(results['me']['body']['username'], 'batch_user')
+        self.assertEqual(results['inbox']['body'], {'messages': 0, 'conversations': 0})
+        self.assertEqual(results['requests']['body']['results'][0]['from_user']['username'], 'batch_stranger')
+        self.assertEqual(results['feed']['body']['results'][0]['content'], 'Пост друга')
+
+    def test_social_graph_is_read_once(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.batch({'path': '/api/v1/feed/'}, {'path': '/api/v1/feed/?page_size=1'})
+        self.assertEqual([r['status'] for r in response.json()['responses']], [200, 200])
+        graph_queries = [q for q in queries if 'cryptix_app_friendship' in q['sql']]
+        self.assertEqual(len(graph_queries), 1)
+
+    def test_sub_requests_reuse_batch_authentication(self):
+        self.client.logout()
+        credentials = base64.b64encode(b'batch_user:pass-12345').decode()
+        authenticate = BasicAuthentication.authenticate_credentials
+        # без SessionAuthentication, яка підхопила б користувача з Django-запиту
+        with mock.patch.object(APIView, 'authentication_classes', [BasicAuthentication]), \
+                mock.patch.object(BasicAuthentication, 'authenticate_credentials', autospec=True, side_effect=authenticate) as check:
+            response = self.client.post(
+                '/api/v1/batch/', {'requests': [{'path': '/api/v1/profiles/me/'}, {'path': '/api/v1/feed/'}]},
+                content_type='application/json', HTTP_AUTHORIZATION=f'Basic {credentials}'
+            )
+        self.assertEqual([r['status'] for r in response.json()['responses']], [200, 200])
+        self.assertEqual(check.call_count, 1)
+
+    def test_rejects_writes_and_foreign_paths(self):
+        response = self.batch(
+            {'id': 1, 'method': 'POST', 'path': '/api/v1/notifications/read/'},
+            {'id': 2, 'path': '/app/feed/'},
+            {'id': 3, 'path': '/api/v1/batch/'},
+            {'id': 4, 'path': '/api/v1/nope/'},
+        )
+        self.assertEqual([r['status'] for r in response.json()['responses']], [405, 400, 400, 404])
+        self.assertEqual(self.batch().status_code, 400)
+
+
+class NotificationAggregationTest(CachedTestCase):
+    def setUp(self):
+        self.author = User.objects.create_user('agg_author', password='pass-12345')
+        self.fans = [User.objects.create_user(f'agg_fan{n}', password='pass-12345') for n in range(3)]
+        self.post = Post.objects.create(author=self.author, content='Пост')
+
+    def like(self, user):
+        self.client.login(username=user.username, password='pass-12345')
+        self.client.post(f'/app/post/{self.post.id}/like/')
+
+    def test_likes_collapse_into_one_row(self):
+        for fan in self.fans:
+            self.like(fan)
+        notification = Notification.objects.get(recipient=self.author)
+        self.assertEqual(notification.notification_type, Notification.LIKE)
+        self.assertEqual(notification.actor_count, 3)
+        self.assertEqual(notification.text, 'agg_fan2 та ще 2 користувачі вподобали ваш пост')
+
+        # повторний лайк того ж користувача не збільшує лічильник
+        self.like(self.fans[2])
+        self.like(self.fans[2])
+        self.assertEqual(Notification.objects.get(recipient=self.author).actor_count, 3)
+
+    def test_repeat_actors_are_counted_once(self):
+        first, second, _ = self.fans
+        for likers in ([first], [second], [first], [first, second]):
+            notify_post_likes(self.post, likers)
+        notification = Notification.objects.get(recipient=self.author)
+        self.assertEqual(notification.actor_count, 2)
+        self.assertEqual(set(notification.actors.values_list('actor_id', flat=True)), {first.id, second.id})
+        self.assertEqual(notification.text, 'agg_fan1 та ще 1 користувач вподобали ваш пост')
+
+    def test_purged_actor_leaves_no_rows_behind(self):
+        notify_post_likes(self.post, self.fans[:2])
+        soft_delete_user(self.fans[0])
+        purge_tombstones(pause=0)
+        self.assertFalse(NotificationActor.objects.filter(actor=self.fans[0]).exists())
+        soft_delete_user(self.author)
+        purge_tombstones(pause=0)
+        self.assertFalse(NotificationActor.objects.exists())
+
+    def test_read_notification_starts_new_row(self):
+        self.like(self.fans[0])
+        Notification.objects.update(is_read=True)
+        self.like(self.fans[1])
+        self.assertEqual(Notification.objects.filter(recipient=self.author).count(), 2)
+
+
+class NotificationRetentionTest(CachedTestCase):
+    def setUp(self):
+        self.user = User.objects.create_user('keeper', password='pass-12345')
+        old = timezone.now() - timedelta(days=100)
+        for n in range(7):
+            Notification.objects.create(recipient=self.user, notification_type=Notification.MESSAGE, text=f'Старе {n}', is_read=n < 5)
+        Notification.objects.update(updated_at=old)
+        for n in range(4):
+            Notification.objects.create(recipient=self.user, notification_type=Notification.MESSAGE, text=f'Нове {n}')
+
+    def test_purges_old_read_rows_in_chunks_with_archive(self):
+        with tempfile.TemporaryDirectory() as archive_dir:
+            out = StringIO()
+            call_command('purge_notifications', days=30, keep_per_user=0, chunk_size=2,
+                         archive_dir=archive_dir, pause=0, stdout=out)
+            self.assertIn('Видалено прострочених: 5', out.getvalue())
+            archive = out.getvalue().split('Архів: ')[1].strip()
+            with gzip.open(archive, 'rt', encoding='utf-8') as f:
+                archived = [json.loads(line)['text'] for line in f]
+        self.assertEqual(sorted(archived), [f'Старе {n}' for n in range(5)])
+        self.assertEqual(Notification.objects.count(), 6)
+
+    def test_per_user_cap_keeps_newest(self):
+        call_command('purge_notifications', days=365, keep_per_user=3, chunk_size=2, pause=0, stdout=StringIO())
+        self.assertEqual(
+            sorted(Notification.objects.values_list('text', flat=True)), ['Нове 1', 'Нове 2', 'Нове 3']
+        )
+
+    def test_worker_runs_due_jobs_once_per_interval(self):
+        out = StringIO()
+        with self.settings(NOTIFICATION_RETENTION_DAYS=30, NOTIFICATION_MAX_PER_USER=0):
+            call_command('run_worker', once=True, stdout=out)
+            call_command('run_worker', once=True, stdout=out)
+        self.assertEqual(out.getvalue().count('notification_retention'), 1)
+        self.assertEqual(Notification.objects.count(), 6)
+
+
+class NotificationStreamTest(CachedTestCase):
+    def setUp(self):
+        self.user = User.objects.create_user('listener', password='pass-12345')
+        self.sender = User.objects.create_user('sender', password='pass-12345')
+
+    def notify(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            create_notification(self.user, Notification.MESSAGE, 'Привіт', sender=self.sender, link='/app/')
+
+    async def test_stream_pushes_notification_and_unread_count(self):
+        await self.async_client.aforce_login(self.user)
+        response = await self.async_client.get('/app/notifications/stream/')
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+        chunks = aiter(response.streaming_content)
+        self.assertIn(b'event: unread\ndata: {"unread": 0}', await anext(chunks))
+
+        await sync_to_async(self.notify)()
+        notification = await anext(chunks)
+        self.assertIn(b'event: notification', notification)
+        self.assertIn('"text": "Привіт"'.encode(), notification)
+        self.assertIn(b'data: {"unread": 1}', await anext(chunks))
+
+        # відключення клієнта скасовує очікування - підписка знімається
+        pending = asyncio.ensure_future(anext(chunks))
+        await asyncio.sleep(0)
+        pending.cancel()
+        with self.assertRaises(asyncio.CancelledError):
+            await pending
+        self.assertFalse(broker.has_subscribers(self.user.id))
+
+    async def test_stream_polls_unread_count_from_other_workers(self):
+        await self.async_client.aforce_login(self.user)
+        with mock.patch('cryptix_app.views.SSE_KEEPALIVE', 0.01):
+            response = await self.async_client.get('/app/notifications/stream/')
+            chunks = aiter(response.streaming_content)
+            self.assertIn(b'data: {"unread": 0}', await anext(chunks))
+            self.assertEqual(await anext(chunks), b': keepalive\n\n')
+
+            # сповіщення від іншого воркера: в брокер цього процесу не потрапляє
+            await Notification.objects.acreate(recipient=self.user, notification_type=Notification.MESSAGE, text='Привіт')
+            self.assertIn(b'event: unread\ndata: {"unread": 1}', await anext(chunks))
+            self.assertEqual(await anext(chunks), b': keepalive\n\n')
+            await response.streaming_content.aclose()
+
+
+class ReviewStatsTest(CachedTestCase):
+    def setUp(self):
+        self.target = User.objects.create_user('rated', password='pass-12345')
+        self.reviewers = [User.objects.create_user(f'rater{n}', password='pass-12345') for n in range(12)]
+
+    def review(self, reviewer, rating):
+        self.client.login(username=reviewer.username, password='pass-12345')
+        return self.client.post(f'/app/review/{self.target.username}/', {'rating': rating, 'comment': 'Відгук'})
+
+    def test_stats_follow_create_update_and_delete(self):
+        self.review(self.reviewers[0], 5)
+        self.review(self.reviewers[1], 3)
+        self.review(self.reviewers[1], 1)
+        stats = ReviewStats.objects.get(user=self.target)
+        self.assertEqual((stats.count, stats.total, stats.average), (2, 6, 3.0))
+        self.assertEqual([row['count'] for row in stats.histogram()], [1, 0, 0, 0, 1])
+
+        review = Review.objects.get(reviewer=self.reviewers[0])
+        self.client.login(username='rater0', password='pass-12345')
+        self.client.post(f'/app/review/{review.id}/delete/')
+        stats.refresh_from_db()
+        self.assertEqual((stats.count, stats.total, stats.rating_5, stats.rating_1), (1, 1, 0, 1))
+
+    def test_delete_uses_current_rating(self):
+        self.review(self.reviewers[0], 5)
+        stale = Review.objects.get(reviewer=self.reviewers[0])
+        # оцінку змінили між читанням відгуку і його видаленням
+        self.review(self.reviewers[0], 2)
+        self.assertTrue(remove_review(stale))
+        self.assertFalse(remove_review(stale))
+        stats = ReviewStats.objects.get(user=self.target)
+        self.assertEqual((stats.count, stats.total, stats.rating_5, stats.rating_2), (0, 0, 0, 0))
+
+    def test_invalid_rating_is_rejected(self):
+        self.review(self.reviewers[0], 9)
+        self.assertFalse(Review.objects.exists())
+
+    def test_profile_paginates_reviews(self):
+        for reviewer in self.reviewers:
+            self.review(reviewer, 4)
+        response = self.client.get('/app/user/rated/')
+        self.assertEqual(len(response.context['reviews_page']), 10)
+        self.assertContains(response, '<strong>4.0</strong>', html=True)
+        response = self.client.get('/app/user/rated/?reviews_page=2')
+        self.assertEqual(len(response.context['reviews_page']), 2)
+
+
+class HotPostLikeTest(CachedTestCase):
+    def setUp(self):
+        self.author = User.objects.create_user('star', password='pass-12345')
+        self.fans = [User.objects.create_user(f'hot_fan{n}', password='pass-12345') for n in range(3)]
+        self.post = Post.objects.create(author=self.author, content='Вірусний пост')
+        Follow.objects.bulk_create([Follow(follower=fan, following=self.author) for fan in self.fans])
+        patcher = mock.patch.object(like_buffer, 'interval', 3600)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.addCleanup(like_buffer.flush)
+
+    def like(self, user):
+        self.client.login(username=user.username, password='pass-12345')
+        return self.client.post(f'/api/v1/posts/{self.post.id}/like/').json()
+
+    def test_cold_post_writes_through(self):
+        self.assertTrue(self.like(self.fans[0])['liked'])
+        self.assertEqual(PostLike.objects.count(), 1)
+        self.assertEqual(self.post.likes_count(), 1)
+
+    def test_hot_post_buffers_and_flushes_in_batch(self):
+        with self.settings(LIKE_HOT_THRESHOLD=0):
+            self.assertTrue(self.like(self.fans[0])['liked'])
+            self.assertFalse(self.like(self.fans[0])['liked'])
+            self.assertTrue(self.like(self.fans[0])['liked'])
+            self.like(self.fans[1])
+            self.like(self.fans[2])
+            self.like(self.fans[2])
+        self.assertEqual(PostLike.objects.count(), 0)
+
+        # власний лайк видно ще до скидання буфера
+        response = self.client.get('/app/feed/')
+        self.assertNotIn(self.post.id, response.context['liked_posts_ids'])
+        self.client.login(username='hot_fan0', password='pass-12345')
+        self.assertIn(self.post.id, self.client.get('/app/feed/').context['liked_posts_ids'])
+
+        self.assertEqual(like_buffer.flush(), 3)
+        self.assertEqual(set(PostLike.objects.values_list('user__username', flat=True)), {'hot_fan0', 'hot_fan1'})
+        self.assertEqual(self.post.likes_count(), 2)
+        self.assertLessEqual(PostLikeCounter.objects.filter(post=self.post).count(), PostLikeCounter.SHARDS)
+        notification = Notification.objects.get(recipient=self.author)
+        self.assertEqual(notification.actor_count, 2)
+
+    def test_pending_state_is_shared_between_workers(self):
+        with self.settings(LIKE_HOT_THRESHOLD=0):
+            self.assertTrue(self.like(self.fans[0])['liked'])
+            # інший воркер: свій порожній буфер, але спільний кеш
+            with mock.patch.object(like_buffer, '_pending', {}):
+                self.assertIn(self.post.id, self.client.get('/app/feed/').context['liked_posts_ids'])
+                self.assertFalse(self.like(self.fans[0])['liked'])
+                like_buffer.flush()
+        # запізніле скидання першого воркера бере останній стан з кешу
+        like_buffer.flush()
+        self.assertFalse(PostLike.objects.exists())
+        self.assertEqual(self.post.likes_count(), 0)
+
+    def test_concurrent_direct_like_is_not_counted_twice(self):
+        with self.settings(LIKE_HOT_THRESHOLD=0):
+            self.like(self.fans[0])
+            self.like(self.fans[1])
+        # прямий лайк іншого воркера встиг раніше за скидання буфера
+        PostLike.objects.create(post=self.post, user=self.fans[0])
+        add_like_delta(self.post.id, 1)
+        # конфлікт відкочує лише свою вставку, наступний рядок усе одно пишеться
+        like_buffer.flush()
+        self.assertEqual(set(PostLike.objects.values_list('user__username', flat=True)), {'hot_fan0', 'hot_fan1'})
+        self.assertEqual(self.post.likes_count(), 2)
+        notification = Notification.objects.get(recipient=self.author)
+        self.assertEqual(list(notification.actors.values_list('actor_id', flat=True)), [self.fans[1].id])
+
+
+class SoftDeleteTest(CachedTestCase):
+    def setUp(self):
+        self.owner = User.objects.create_user('owner', password='pass-12345')
+        self.other = User.objects.create_user('bystander', password='pass-12345')
+        self.group = Group.objects.create(name='Тимчасова', creator=self.owner, member_count=2)
+        GroupMembership.objects.create(user=self.owner, group=self.group, role=GroupMembership.ADMIN)
+        GroupMembership.objects.create(user=self.other, group=self.group)
+        for n in range(3):
+            post = GroupPost.objects.create(group=self.group, author=self.other, content=f'Пост {n}', comment_count=1)
+            GroupPostComment.objects.create(post=post, author=self.owner, content='Коментар')
+
+    def test_group_is_hidden_then_purged_in_chunks(self):
+        self.client.login(username='owner', password='pass-12345')
+        self.client.post(f'/app/group/{self.group.id}/delete/')
+        self.assertFalse(Group.objects.filter(id=self.group.id).exists())
+        self.assertEqual(self.client.get(f'/app/group/{self.group.id}/').status_code, 404)
+        self.assertEqual(GroupPost.objects.count(), 3)
+
+        # бюджет вичерпано до завершення - надгробок лишається
+        self.assertEqual(purge_tombstones(chunk_size=2, time_budget=0, pause=0)['pending'], 1)
+        result = purge_tombstones(chunk_size=2, pause=0)
+        self.assertEqual((result['rows'], result['pending']), (3 + 3 + 2 + 1, 0))
+        self.assertFalse(Group.all_objects.exists())
+        self.assertFalse(GroupMembership.objects.exists())
+
+    def test_deleted_group_takes_member_roles_and_comments_with_it(self):
+        post = GroupPost.objects.first()
+        member = Client()
+        member.login(username='bystander', password='pass-12345')
+        self.assertEqual(member.get(f'/app/group/post/{post.id}/comments/').status_code, 200)
+
+        self.client.login(username='owner', password='pass-12345')
+        self.client.post('/app/account/delete/')
+        self.assertNotIn(self.group.id, group_roles(self.other.id))
+        self.assertEqual(member.get(f'/app/group/post/{post.id}/comments/').status_code, 404)
+        self.assertEqual(member.post(f'/app/group/post/{post.id}/comment/', {'content': 'Пізно'}).status_code, 404)
+        self.assertEqual(GroupPostComment.objects.count(), 3)
+
+    def test_post_purge_removes_only_its_notifications(self):
+        doomed = Post.objects.create(author=self.other, content='Видалю')
+        kept = Post.objects.create(author=self.other, content='Лишу')
+        for post in (doomed, kept):
+            notify_post_likes(post, [self.owner])
+            add_post_comment(post, self.owner, 'Коментар')
+        soft_delete_post(doomed)
+        purge_tombstones(pause=0)
+        self.assertEqual(set(Notification.objects.values_list('target_key', flat=True)), {f'post:{kept.id}'})
+        self.assertEqual(Notification.objects.count(), 2)
+        self.assertEqual(NotificationActor.objects.count(), 2)
+
+    def test_account_deletion_fixes_counters_elsewhere(self):
+        other_group = Group.objects.create(name='Чужа', creator=self.other, member_count=2)
+        GroupMembership.objects.create(user=self.owner, group=other_group)
+        other_post = GroupPost.objects.create(group=other_group, author=self.other, content='Пост', comment_count=1)
+        GroupPostComment.objects.create(post=other_post, author=self.owner, content='Коментар')
+        liked = Post.objects.create(author=self.other, content='Лайкни')
+        own = Post.objects.create(author=self.owner, content='Мій пост')
+        self.client.login(username='owner', password='pass-12345')
+        self.client.post(f'/api/v1/posts/{liked.id}/like/')
+        self.client.post(f'/app/review/{self.other.username}/', {'rating': 5, 'comment': 'Супер'})
+
+        self.client.post('/app/account/delete/')
+        self.assertFalse(User.objects.get(id=self.owner.id).is_active)
+        self.assertFalse(Post.objects.filter(id=own.id).exists())
+        self.assertEqual(self.client.get('/app/feed/').status_code, 302)
+
+        purge_tombstones(chunk_size=2, pause=0)
+        self.assertFalse(User.objects.filter(id=self.owner.id).exists())
+        self.assertFalse(Tombstone.objects.exists())
+        self.assertEqual(liked.likes_count(), 0)
+        other_group.refresh_from_db()
+        other_post.refresh_from_db()
+        self.assertEqual((other_group.member_count, other_post.comment_count), (1, 0))
+        self.assertEqual(ReviewStats.objects.get(user=self.other).count, 0)
+
+    def test_counter_fix_rolls_back_with_failed_delete(self):
+        liked = Post.objects.create(author=self.other, content='Лайкни')
+        self.client.login(username='owner', password='pass-12345')
+        self.client.post(f'/api/v1/posts/{liked.id}/like/')
+        self.client.post('/app/account/delete/')
+
+        raw_delete = deletion._raw_delete
+
+        def failing_delete(model, ids):
+            if model is PostLike:
+                raise DatabaseError('disk I/O error')
+            raw_delete(model, ids)
+        with mock.patch('cryptix_app.deletion._raw_delete', failing_delete), self.assertRaises(DatabaseError):
+            purge_tombstones(pause=0)
+        self.assertEqual(liked.likes_count(), 1)
+
+        purge_tombstones(pause=0)
+        self.assertEqual(liked.likes_count(), 0)
+
+
+class RankingTest(CachedTestCase):
+    def setUp(self):
+        self.viewer = User.objects.create_user('ranker', password='pass-12345')
+        self.close = User.objects.create_user('close_friend', password='pass-12345')
+        self.far = User.objects.create_user('far_friend', password='pass-12345')
+        self.fans = [User.objects.create_user(f'rank_fan{n}', password='pass-12345') for n in range(4)]
+        for friend in (self.close, self.far):
+            Follow.objects.create(follower=self.viewer, following=friend)
+        self.quiet = Post.objects.create(author=self.close, content='Тихий пост')
+        self.popular = Post.objects.create(author=self.far, content='Популярний пост')
+        Post.objects.update(created_at=timezone.now() - timedelta(hours=1))
+        self.client.login(username='ranker', password='pass-12345')
+
+    def test_scores_are_updated_incrementally(self):
+        self.assertEqual(update_post_scores()['scored'], 2)
+        self.assertEqual(update_post_scores()['scored'], 0)
+        for fan in self.fans:
+            self.client.login(username=fan.username, password='pass-12345')
+            self.client.post(f'/app/post/{self.popular.id}/like/')
+        PostComment.objects.create(post=self.popular, author=self.fans[0], content='Вау')
+        self.assertEqual(update_post_scores()['scored'], 1)
+        score = PostScore.objects.get(post=self.popular)
+        self.assertEqual((score.likes, score.comments), (4, 1))
+        self.assertGreater(score.score, PostScore.objects.get(post=self.quiet).score)
+
+    def test_trending_and_ranked_feed(self):
+        for fan in self.fans:
+            PostLike.objects.create(post=self.popular, user=fan)
+        self.popular.like_counters.create(shard=0, count=len(self.fans))
+        update_post_scores()
+
+        response = self.client.get('/app/trending/')
+        self.assertEqual([post.id for post in response.context['posts']], [self.popular.id, self.quiet.id])
+        self.assertEqual(response.context['mode'], 'trending')
+
+        # спорідненість: глядач часто взаємодіє з close_friend
+        older = Post.objects.create(author=self.close, content='Старіший пост')
+        for n in range(30):
+            PostComment.objects.create(post=older, author=self.viewer, content=f'Коментар {n}')
+        response = self.client.get('/app/feed/?mode=ranked')
+        self.assertEqual(response.context['posts'][0].author_id, self.close.id)
+        self.assertEqual(len(response.context['posts']), 3)
+
+
+class CachedAuthTest(CachedTestCase):
+    def setUp(self):
+        self.user = User.objects.create_user('cached_auth', password='pass-12345')
+        Profile.objects.create(user=self.user, bio='Старе біо')
+        self.client.login(username='cached_auth', password='pass-12345')
+
+    def profile_queries(self):
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get('/app/profile/')
+        self.assertEqual(response.status_code, 200)
+        return [q['sql'] for q in ctx.captured_queries if 'auth_user' in q['sql'] or 'cryptix_app_profile' in q['sql']]
+
+    def test_user_and_profile_come_from_cache(self):
+        self.profile_queries()
+        self.assertEqual(self.profile_queries(), [])
+
+    def test_profile_update_invalidates_cache(self):
+        self.profile_queries()
+        self.client.post('/app/profile/', {'username': 'cached_auth', 'email': 'cached@example.com', 'bio': 'Нове біо'})
+        self.assertEqual(Profile.objects.get(user=self.user).bio, 'Нове біо')
+        response = self.client.get('/app/profile/')
+        self.assertContains(response, 'Нове біо')
+
+    def test_password_change_and_deactivation_end_other_sessions(self):
+        other = Client()
+        other.login(username='cached_auth', password='pass-12345')
+        self.assertEqual(other.get('/app/profile/').status_code, 200)
+
+        self.user.set_password('new-pass-12345')
+        self.user.save()
+        self.assertEqual(other.get('/app/profile/').status_code, 302)
+
+        self.client.login(username='cached_auth', password='new-pass-12345')
+        self.client.get('/app/profile/')
+        self.client.post('/app/account/delete/')
+        self.client.force_login(self.user)
+        self.assertEqual(self.client.get('/app/profile/').status_code, 302)
+
+    @override_settings(SESSION_ENGINE='django.contrib.sessions.backends.cached_db')
+    def test_cached_db_sessions(self):
+        self.client.login(username='cached_auth', password='pass-12345')
+        self.client.get('/app/profile/')
+        with CaptureQueriesContext(connection) as ctx:
+            self.assertEqual(self.client.get('/app/profile/').status_code, 200)
+        self.assertFalse([q for q in ctx.captured_queries if 'django_session' in q['sql']])
+
+
+class AdminTest(CachedTestCase):
+    def setUp(self):
+        self.admin = User.objects.create_superuser('site_admin', 'admin@example.com', 'pass-12345')
+        self.author = User.objects.create_user('admin_author', password='pass-12345')
+        self.client.login(username='site_admin', password='pass-12345')
+
+    def test_fts_index_follows_inserts_updates_and_deletes(self):
+        greeting = Post.objects.create(author=self.author, content='Привіт усім у Криптиксі')
+        other = Post.objects.create(author=self.author, content='Зовсім інша тема')
+        matches = lambda term: set(Post.all_objects.filter(pk__in=fts_matches(Post, term)).values_list('id', flat=True))
+        self.assertEqual(matches('прив'), {greeting.id})
+
+        Post.all_objects.filter(id=other.id).update(content='Ще один привіт')
+        self.assertEqual(matches('привіт'), {greeting.id, other.id})
+        greeting.delete()
+        self.assertEqual(matches('привіт'), {other.id})
+
+        response = self.client.get('/admin/cryptix_app/post/', {'q': 'ще прив'})
+        self.assertEqual(response.context['cl'].result_count, 1)
+        response = self.client.get('/admin/cryptix_app/post/', {'q': 'admin_author'})
+        self.assertEqual(response.context['cl'].result_count, 1)
+        for term in ('?', '-', '"'):
+            response = self.client.get('/admin/cryptix_app/post/', {'q': term})
+            self.assertEqual(response.context['cl'].result_count, 0)
+
+    def test_changelist_queries_do_not_grow_with_rows(self):
+        def changelist_queries():
+            with CaptureQueriesContext(connection) as ctx:
+                self.assertEqual(self.client.get('/admin/cryptix_app/notification/').status_code, 200)
+            return len(ctx.captured_queries)
+
+        create_notification(self.author, Notification.MESSAGE, 'Перше', sender=self.admin)
+        changelist_queries()
+        baseline = changelist_queries()
+        for n in range(5):
+            sender = User.objects.create_user(f'admin_sender{n}', password='pass-12345')
+            create_notification(self.author, Notification.MESSAGE, f'Сповіщення {n}', sender=sender)
+        self.assertEqual(changelist_queries(), baseline)
+
+    def test_unfiltered_changelist_uses_estimated_count(self):
+        for n in range(3):
+            PostLike.objects.create(post=Post.objects.create(author=self.author, content=f'Пост {n}'), user=self.admin)
+        PostLike.objects.order_by('id').first().delete()
+        with mock.patch('cryptix_app.admin.ESTIMATED_COUNT_THRESHOLD', 0):
+            response = self.client.get('/admin/cryptix_app/postlike/')
+            self.assertEqual(response.context['cl'].result_count, PostLike.objects.order_by('-id').first().id)
+            response = self.client.get('/admin/cryptix_app/postlike/', {'user__id__exact': self.admin.id})
+            self.assertEqual(response.context['cl'].result_count, 2)
+            # менеджер живих постів додає власний фільтр - це теж запит без фільтрів
+            Post.objects.filter(id=Post.objects.order_by('id').first().id).update(deleted_at=timezone.now())
+            response = self.client.get('/admin/cryptix_app/post/')
+            self.assertEqual(response.context['cl'].result_count, Post.all_objects.order_by('-id').first().id)
+            response = self.client.get('/admin/cryptix_app/post/', {'author__id__exact': self.author.id})
+            self.assertEqual(response.context['cl'].result_count, 2)
+
+
+def image_upload(name='photo.png', size=(200, 100), image_format='PNG'):
+    buffer = BytesIO()
+    Image.new('RGB', size, (200, 30, 30)).save(buffer, image_format)
+    return SimpleUploadedFile(name, buffer.getvalue(), content_type='image/png')
+
+
+class ImageUploadTest(CachedTestCase):
+    def setUp(self):
+        media = tempfile.TemporaryDirectory()
+        self.addCleanup(media.cleanup)
+        settings_override = self.settings(MEDIA_ROOT=media.name, UPLOAD_MAX_DIMENSION=64)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        self.user = User.objects.create_user('uploader', password='pass-12345')
+        self.client.login(username='uploader', password='pass-12345')
+
+    def test_upload_is_stored_and_reencoded_by_worker(self):
+        response = self.client.post('/app/feed/', {'post_content': 'З фото', 'post_image': image_upload()})
+        self.assertEqual(response.status_code, 302)
+        post = Post.objects.get(author=self.user)
+        original = post.image.name
+        self.assertRegex(original, r'^posts/[0-9a-f]{32}\.png$')
+        self.assertEqual(PendingImage.objects.get().name, original)
+
+        self.assertEqual(process_pending_images(), {'processed': 1, 'failed': 0, 'stale': 0})
+        post.refresh_from_db()
+        self.assertTrue(post.image.name.endswith('.jpg'))
+        self.assertFalse(post.image.storage.exists(original))
+        with Image.open(post.image) as image:
+            self.assertEqual(image.size, (64, 32))
+        self.assertFalse(PendingImage.objects.exists())
+
+    def test_profile_edit_after_processing_keeps_new_avatar(self):
+        form = {'username': 'uploader', 'email': 'uploader@example.com', 'bio': ''}
+        self.client.post('/app/profile/', {**form, 'avatar': image_upload()})
+        self.client.get('/app/profile/')
+        process_pending_images()
+        self.client.post('/app/profile/', {**form, 'bio': 'Нове біо'})
+        profile = Profile.objects.get(user=self.user)
+        self.assertEqual(profile.bio, 'Нове біо')
+        self.assertTrue(profile.avatar.name.endswith('.jpg'))
+        self.assertEqual((profile.avatar_width, profile.avatar_height), (64, 32))
+        self.assertTrue(profile.avatar.storage.exists(profile.avatar.name))
+
+    def test_group_avatar_processing_refreshes_groups_list(self):
+        # сторінка групи після редиректу забирає повідомлення про створення,
+        # з яким список груп відповів би без ETag
+        self.client.post('/app/group/create/', {'name': 'З аватаром', 'avatar': image_upload()}, follow=True)
+        etag = self.client.get('/app/groups/')['ETag']
+        self.assertEqual(self.client.get('/app/groups/', HTTP_IF_NONE_MATCH=etag).status_code, 304)
+        process_pending_images()
+        response = self.client.get('/app/groups/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, Group.objects.get().avatar.url)
+
+    def test_processed_image_renders_lazy_dimensioned_markup(self):
+        Follow.objects.create(follower=self.user, following=self.user)
+        self.client.post('/app/feed/', {'post_content': 'Широке фото', 'post_image': image_upload(size=(1200, 600))})
+        response = self.client.get('/app/feed/')
+        self.assertContains(response, 'loading="lazy"')
+        self.assertNotContains(response, 'srcset=')
+
+        with self.settings(UPLOAD_MAX_DIMENSION=1000):
+            process_pending_images()
+        post = Post.objects.get(author=self.user)
+        self.assertEqual((post.image_width, post.image_height, post.image_variants), (1000, 500, True))
+        self.assertTrue(post.image_placeholder.startswith('data:image/jpeg;base64,'))
+        for width in (160, 480, 960):
+            self.assertTrue(post.image.storage.exists(variant_name(post.image.name, width)))
+
+        # кешований фрагмент поста скинуто воркером
+        response = self.client.get('/app/feed/')
+        self.assertContains(response, 'height="500" loading="lazy"')
+        self.assertContains(response, 'width="1000"')
+        self.assertContains(response, f'{variant_name(post.image.url, 480)} 480w')
+        self.assertContains(response, f'{post.image.url} 1000w')
+        self.assertContains(response, 'url(&quot;data:image/jpeg;base64,')
+
+    def test_animated_png_gets_no_srcset(self):
+        buffer = BytesIO()
+        frames = [Image.new('RGB', (600, 300), color) for color in ((200, 30, 30), (30, 200, 30))]
+        frames[0].save(buffer, 'PNG', save_all=True, append_images=frames[1:])
+        upload = SimpleUploadedFile('anim.png', buffer.getvalue(), content_type='image/png')
+        self.client.post('/app/feed/', {'post_content': 'Анімація', 'post_image': upload})
+        process_pending_images()
+        post = Post.objects.get(author=self.user)
+        self.assertEqual((post.image_width, post.image_height, post.image_variants), (600, 300, False))
+        response = self.client.get('/app/feed/')
+        self.assertContains(response, 'width="600"')
+        self.assertNotContains(response, 'srcset=')
+
+    def test_oversized_and_invalid_uploads_are_rejected(self):
+        with self.settings(UPLOAD_MAX_BYTES=500):
+            response = self.client.post('/app/feed/', {'post_content': 'Завеликий', 'post_image': image_upload(size=(400, 400))}, follow=True)
+        self.assertContains(response, 'Файл завеликий')
+        with self.settings(UPLOAD_MAX_PIXELS=100):
+            response = self.client.post('/app/feed/', {'post_content': 'Пікселі', 'post_image': image_upload()}, follow=True)
+        self.assertContains(response, 'завелику роздільність')
+        fake = SimpleUploadedFile('page.png', b'<html>not an image</html>', content_type='image/png')
+        response = self.client.post('/api/v1/posts/', {'content': 'Не фото', 'image': fake})
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('image', response.json())
+        self.assertFalse(Post.objects.exists())
+
+    def test_oversized_body_is_rejected_before_reading(self):
+        with self.settings(UPLOAD_MAX_BYTES=500, DATA_UPLOAD_MAX_MEMORY_SIZE=500):
+            response = self.client.post('/app/feed/', {'post_content': 'Завеликий', 'post_image': image_upload(size=(400, 400))})
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(Post.objects.exists())
+
+    def test_undecodable_image_is_dropped_by_worker(self):
+        data = image_upload(size=(300, 300)).read()
+        truncated = SimpleUploadedFile('broken.png', data[:len(data) // 2], content_type='image/png')
+        self.client.post('/app/feed/', {'post_content': 'Бите фото', 'post_image': truncated})
+        post = Post.objects.get(author=self.user)
+        name = post.image.name
+        self.assertEqual(process_pending_images()['failed'], 1)
+        post.refresh_from_db()
+        self.assertFalse(post.image)
+        self.assertFalse(post.image.storage.exists(name))
+
+
+class CompressionTest(CachedTestCase):
+    def setUp(self):
+        self.user = User.objects.create_user('viewer', password='pass-12345')
+        self.client.login(username='viewer', password='pass-12345')
+
+    def test_html_is_gzipped_when_accepted(self):
+        plain = self.client.get('/app/feed/')
+        self.assertNotIn('Content-Encoding', plain)
+        self.assertIn('Accept-Encoding', plain['Vary'])
+
+        response = self.client.get('/app/feed/', HTTP_ACCEPT_ENCODING='gzip, deflate')
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertIn('Accept-Encoding', response['Vary'])
+        self.assertEqual(int(response['Content-Length']), len(response.content))
+        self.assertIn('<link rel="stylesheet"', gzip.decompress(response.content).decode())
+
+    def test_encoding_negotiation(self):
+        self.assertEqual(choose_encoding('gzip;q=0, identity'), None)
+        self.assertEqual(choose_encoding('GZIP;q=0.5'), 'gzip')
+        with mock.patch('cryptix_app.middleware.brotli', None):
+            self.assertEqual(choose_encoding('br'), None)
+            self.assertEqual(choose_encoding('br, gzip'), 'gzip')
+            response = self.client.get('/app/feed/', HTTP_ACCEPT_ENCODING='br')
+            self.assertNotIn('Content-Encoding', response)
+
+    def test_base_css_is_a_static_bundle(self):
+        head = self.client.get('/app/feed/').content.decode().split('</head>')[0]
+        self.assertIn('cryptix_app/css/base.css', head)
+        self.assertNotIn('<style>', head)
+
+    async def test_async_stream_is_one_gzip_member(self):
+        async def lines():
+            for n in range(50):
+                yield f'рядок {n}\n'.encode()
+
+        request = RequestFactory().get('/', HTTP_ACCEPT_ENCODING='gzip')
+        response = StreamingHttpResponse(lines(), content_type='text/plain')
+        response = CompressionMiddleware(lambda request: response)(request)
+        body = b''.join([chunk async for chunk in response.streaming_content])
+        decompressor = zlib.decompressobj(31)
+        text = decompressor.decompress(body).decode()
+        self.assertEqual(text, ''.join(f'рядок {n}\n' for n in range(50)))
+        self.assertTrue(decompressor.eof)
+        self.assertEqual(decompressor.unused_data, b'')
+
+    def test_media_and_event_streams_are_not_compressed(self):
+        request = RequestFactory().get('/', HTTP_ACCEPT_ENCODING='gzip')
+        for response in [
+            HttpResponse(image_upload(size=(400, 400)).read(), content_type='image/png'),
+            StreamingHttpResponse(iter(['data: x\n\n'] * 100), content_type='text/event-stream'),
+        ]:
+            with self.subTest(content_type=response['Content-Type']):
+                response = CompressionMiddleware(lambda request: response)(request)
+                self.assertNotIn('Content-Encoding', response)
+
+
+class PresenceTest(CachedTestCase):
+    def setUp(self):
+        self.user = User.objects.create_user('viewer', password='pass-12345')
+        self.friend = User.objects.create_user('friend', password='pass-12345')
+        Profile.objects.bulk_create([Profile(user=self.user), Profile(user=self.friend)])
+        Friendship.objects.create(from_user=self.user, to_user=self.friend, status=Friendship.ACCEPTED)
+        patcher = mock.patch.object(last_seen_buffer, 'interval', 3600)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_heartbeats_are_coalesced(self):
+        self.client.login(username='viewer', password='pass-12345')
+        for _ in range(3):
+            self.client.get('/app/friends/')
+        self.assertIn(self.user.id, online_users([self.user.id, self.friend.id]))
+        self.assertNotIn(self.friend.id, online_users([self.user.id, self.friend.id]))
+        self.assertIsNone(Profile.objects.get(user=self.user).last_seen)
+        self.assertEqual(list(last_seen_buffer.pending()), [self.user.id])
+
+        self.client.login(username='friend', password='pass-12345')
+        self.client.get('/app/friends/')
+        with self.assertNumQueries(1):
+            self.assertEqual(last_seen_buffer.flush(), 2)
+        self.assertEqual(Profile.objects.filter(last_seen__isnull=False).count(), 2)
+
+        # наступний запис у БД - не раніше ніж за PRESENCE_FLUSH_SECONDS
+        self.client.get('/app/friends/')
+        self.assertEqual(last_seen_buffer.pending(), {})
+
+    def test_lists_and_profile_show_presence(self):
+        self.client.login(username='viewer', password='pass-12345')
+        offline = self.client.get('/app/friends/')
+        self.assertNotContains(offline, 'presence-dot online')
+        self.assertNotContains(self.client.get('/app/user/friend/'), 'presence-status')
+
+        friend = Client()
+        friend.login(username='friend', password='pass-12345')
+        friend.get('/app/')
+        online = self.client.get('/app/friends/', HTTP_IF_NONE_MATCH=offline['ETag'])
+        self.assertEqual(online.status_code, 200)
+        self.assertContains(online, 'presence-dot online')
+        self.assertContains(self.client.get('/app/user/friend/'), 'онлайн')
+
+        conversation = Conversation.objects.create()
+        conversation.participants.add(self.user, self.friend)
+        self.assertContains(self.client.get('/app/conversations/'), 'presence-dot online')
+
+
+@override_settings(RATE_LIMITS={'comment': '2/min', 'like': '100/min'}, RATE_LIMIT_IP_FACTOR=2)
+class RateLimitTest(CachedTestCase):
+    def setUp(self):
+        self.user = User.objects.create_user('viewer', password='pass-12345')
+        self.other = User.objects.create_user('other', password='pass-12345')
+        self.post = Post.objects.create(author=self.other, content='Пост')
+        self.client.login(username='viewer', password='pass-12345')
+
+    def comment(self, client, path=None):
+        return client.post(path or f'/app/post/{self.post.id}/comment/', {'content': 'Спам'})
+
+    def test_user_limit_rejects_before_writing(self):
+        start = 1_800_000_000 + 30
+        with mock.patch('cryptix_app.ratelimit.time.time', return_value=start):
+            self.assertEqual(self.comment(self.client).status_code, 302)
+            self.assertEqual(self.comment(self.client).status_code, 302)
+            response = self.comment(self.client)
+            self.assertEqual(response.status_code, 429)
+            self.assertEqual(response['Retry-After'], '30')
+            # API ділить з HTML-формою той самий ліміт
+            self.assertEqual(self.comment(self.client, f'/api/v1/posts/{self.post.id}/comments/').status_code, 429)
+        self.assertEqual(PostComment.objects.count(), 2)
+
+        # у наступному вікні ще рахується частка попереднього
+        with mock.patch('cryptix_app.ratelimit.time.time', return_value=start + 45):
+            self.assertEqual(self.comment(self.client).status_code, 429)
+        with mock.patch('cryptix_app.ratelimit.time.time', return_value=start + 60):
+            self.assertEqual(self.comment(self.client).status_code, 302)
+
+    def test_file_cache_counts_concurrent_requests_under_lock(self):
+        request = RequestFactory().post('/', REMOTE_ADDR='10.0.0.9')
+        request.user = AnonymousUser()
+        results = []
+        with tempfile.TemporaryDirectory() as cache_dir, self.settings(
+            CACHES={'default': {'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache', 'LOCATION': cache_dir}},
+            RATE_LIMITS={'comment': '2/min'}, RATE_LIMIT_IP_FACTOR=1,
+        ):
+            threads = [threading.Thread(target=lambda: results.append(take_token('comment', request))) for _ in range(8)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+        self.assertEqual(results.count(0), 2)
+
+    def test_expired_window_key_does_not_break_rejection(self):
+        with self.settings(RATE_LIMITS={'comment': '0/min'}), \
+                mock.patch('cryptix_app.ratelimit.cache.decr', side_effect=ValueError):
+            self.assertEqual(self.comment(self.client).status_code, 429)
+
+    def test_forwarded_for_is_trusted_only_from_configured_proxies(self):
+        request = RequestFactory().post('/', REMOTE_ADDR='10.0.0.1', HTTP_X_FORWARDED_FOR='6.6.6.6, 203.0.113.7')
+        self.assertEqual(client_ip(request), '10.0.0.1')
+        with self.settings(RATE_LIMIT_TRUSTED_PROXIES=1):
+            self.assertEqual(client_ip(request), '203.0.113.7')
+        with self.settings(RATE_LIMIT_TRUSTED_PROXIES=5):
+            self.assertEqual(client_ip(request), '6.6.6.6')
+
+    def test_ip_limit_is_shared_between_users(self):
+        other = Client()
+        other.login(username='other', password='pass-12345')
+        with self.settings(RATE_LIMIT_IP_FACTOR=1):
+            self.comment(self.client)
+            self.comment(self.client)
+            self.assertEqual(self.comment(other).status_code, 429)
+            response = other.post(f'/app/post/{self.post.id}/comment/', {'content': 'З іншої мережі'}, REMOTE_ADDR='10.0.0.2')
+            self.assertEqual(response.status_code, 302)
+            # інші види записів мають власні ліміти
+            self.assertEqual(self.client.post(f'/app/post/{self.post.id}/like/').status_code, 302)
+
+
+class MessageArchiveTest(CachedTestCase):
+    def setUp(self):
+        self.user = User.objects.create_user('viewer', password='pass-12345')
+        self.other = User.objects.create_user('other', password='pass-12345')
+        self.conversation = Conversation.objects.create()
+        self.conversation.participants.add(self.user, self.other)
+        Message.objects.bulk_create([
+            Message(conversation=self.conversation, sender=self.user if n % 2 else self.other, content=f'Повідомлення {n}')
+            for n in range(25)
+        ])
+        self.ids = list(Message.objects.order_by('id').values_list('id', flat=True))
+        # 20 найстаріших - за межею архівації
+        Message.objects.filter(id__in=self.ids[:20]).update(created_at=timezone.now() - timedelta(days=100))
+
+    def test_old_messages_move_into_full_chunks(self):
+        result = archive_messages(days=90, chunk_size=8)
+        self.assertEqual(result, {'conversations': 1, 'chunks': 2, 'messages': 16})
+        self.assertEqual(Message.objects.count(), 9)
+        first = MessageArchive.objects.order_by('first_id').first()
+        self.assertEqual((first.first_id, first.last_id, first.message_count), (self.ids[0], self.ids[7], 8))
+        self.assertEqual([m.content for m in first.messages()[:2]], ['Повідомлення 0', 'Повідомлення 1'])
+        self.assertEqual(archive_messages(days=90, chunk_size=8)['chunks'], 0)
+
+    def test_chat_scrolls_back_into_archive(self):
+        archive_messages(days=90, chunk_size=8)
+        page, has_older = message_page(self.conversation, limit=12)
+        self.assertTrue(has_older)
+        self.assertEqual([m.id for m in page], self.ids[::-1][:12])
+        # три найстаріші з архіву, з підтягнутим відправником
+        self.assertEqual(page[-1].sender, self.user)
+
+        page, has_older = message_page(self.conversation, before=page[-1].id, limit=13)
+        self.assertFalse(has_older)
+        self.assertEqual([m.id for m in page], self.ids[::-1][12:])
+
+        self.client.login(username='viewer', password='pass-12345')
+        response = self.client.get(f'/app/conversation/{self.conversation.id}/', {'before': self.ids[9]})
+        self.assertContains(response, 'Повідомлення 8')
+        self.assertNotContains(response, 'Повідомлення 10')
+
+    def test_deleted_user_is_stripped_from_archive(self):
+        archive_messages(days=90, chunk_size=8)
+        soft_delete_user(self.other)
+        purge_tombstones(pause=0)
+        contents = [m.content for archive in MessageArchive.objects.all() for m in archive.messages()]
+        self.assertEqual(len(contents), 8)
+        self.assertTrue(all(int(content.split()[1]) % 2 for content in contents))
+
+
+class PeriodicJobsTest(TestCase):
+    def test_due_jobs_run_once_per_interval_across_processes(self):
+        job = mock.Mock(return_value='ok')
+        with mock.patch.dict('cryptix_app.tasks.PERIODIC_JOBS', {'job': (job, 60)}, clear=True):
+            self.assertEqual(run_due_jobs(), {'job': 'ok'})
+            # новий процес з порожнім кешем (run_worker --once з cron)
+            caches['default'].clear()
+            self.assertEqual(run_due_jobs(), {})
+            JobSchedule.objects.filter(name='job').update(next_run_at=timezone.now() - timedelta(seconds=1))
+            self.assertEqual(run_due_jobs(), {'job': 'ok'})
+        self.assertEqual(job.call_count, 2)
@@ -0,0 +1,246 @@
+import base64
+import logging
+import os
+import uuid
+from io import BytesIO
+
+from PIL import Image, ImageOps
+from django.apps import apps
+from django.conf import settings
+from django.core.exceptions import RequestDataTooBig, ValidationError
+from django.core.files.base import ContentFile
+from django.core.files.uploadhandler import SkipFile, TemporaryFileUploadHandler
+
+from .cache import bump_fragment_version, bump_news_version, forget_auth_user, touch_watermark
+from .models import PendingImage
+
+
+logger = logging.getLogger(__name__)
+
+
+# -- завантаження зображень --
+# Запит, чий Content-Length більший за UPLOAD_MAX_BYTES разом з лімітом
+# звичайних полів, відхиляється ще до читання тіла. Решта пишеться у
+# тимчасовий файл порціями; файл понад UPLOAD_MAX_BYTES перестає
+# зберігатись (тіло дочитується, але не пишеться на диск). У запиті
+# зображення лише перевіряється за заголовком (формат і розміри, без
+# декодування пікселів), а декодує і перекодовує його воркер - задача
+# process_images (run_worker, див. gunicorn.conf.py).
+
+IMAGE_FORMATS = {'JPEG': 'jpg', 'PNG': 'png', 'GIF': 'gif', 'WEBP': 'webp'}
+MAX_PROCESS_ATTEMPTS = 3
+
+# захист Pillow від "декомпресійних бомб" з тим самим лімітом
+Image.MAX_IMAGE_PIXELS = settings.UPLOAD_MAX_PIXELS
+
+
+class LimitedUploadHandler(TemporaryFileUploadHandler):
+    def handle_raw_input(self, input_data, META, content_length, boundary, encoding=None):
+        fields_limit = settings.DATA_UPLOAD_MAX_MEMORY_SIZE or 0
+        if content_length > settings.UPLOAD_MAX_BYTES + fields_limit:
+            raise RequestDataTooBig('Тіло запиту перевищує ліміт завантаження')
+        return super().handle_raw_input(input_data, META, content_length, boundary, encoding)
+
+    def new_file(self, *args, **kwargs):
+        super().new_file(*args, **kwargs)
+        self.received = 0
+
+    def receive_data_chunk(self, raw_data, start):
+        self.received += len(raw_data)
+        if self.received > settings.UPLOAD_MAX_BYTES:
+            self.file.close()
+            rejected = getattr(self.request, 'rejected_uploads', set())
+            rejected.add(self.field_name)
+            self.request.rejected_uploads = rejected
+            raise SkipFile
+        return super().receive_data_chunk(raw_data, start)
+
+
+def _too_large():
+    return ValidationError(f'Файл завеликий: максимум {settings.UPLOAD_MAX_BYTES // (1024 * 1024)} МБ')
+
+
+def check_image(file):
+    """Перевіряє заголовок зображення і дає файлу випадкову назву з правильним розширенням."""
+    if file.size > settings.UPLOAD_MAX_BYTES:
+        raise _too_large()
+    try:
+        with Image.open(file) as image:
+            image_format, (width, height) = image.format, image.size
+    except Image.DecompressionBombError:
+        raise ValidationError('Зображення має завелику роздільність')
+    except (OSError, SyntaxError, ValueError):
+        raise ValidationError('Файл не є зображенням')
+    if image_format not in IMAGE_FORMATS:
+        raise ValidationError('Підтримуються лише JPEG, PNG, GIF і WebP')
+    if width * height > settings.UPLOAD_MAX_PIXELS:
+        raise ValidationError('Зображення має завелику роздільність')
+    file.seek(0)
+    file.name = f'{uuid.uuid4().hex}.{IMAGE_FORMATS[image_format]}'
+    return file
+
+
+def check_not_rejected(request, field):
+    # LimitedUploadHandler пропускає завеликий файл, тож у FILES його просто немає
+    if field in getattr(request, 'rejected_uploads', ()):
+        raise _too_large()
+
+
+def accept_image(request, field):
+    """Перевірене зображення з request.FILES[field] або None."""
+    check_not_rejected(request, field)
+    file = request.FILES.get(field)
+    if file is not None:
+        check_image(file)
+    return file
+
+
+def queue_image(instance, field):
+    file = getattr(instance, field)
+    if file:
+        PendingImage.objects.create(
+            model=instance._meta.label_lower, object_id=instance.pk, field=field, name=file.name,
+        )
+
+
+# -- обробка у воркері --
+# Окрім перекодування воркер записує <поле>_width/_height, крихітне превʼю
+# <поле>_placeholder і зменшені копії <назва>_<ширина>w для srcset
+# (templatetags/images.py), позначаючи їх у <поле>_variants. Анімовані
+# зображення (зокрема APNG) лишаються як є, без копій.
+
+SRCSET_WIDTHS = (160, 480, 960)
+PLACEHOLDER_SIZE = 16
+
+
+def variant_name(name, width):
+    root, extension = os.path.splitext(name)
+    return f'{root}_{width}w{extension}'
+
+
+def _encode(image, extension):
+    buffer = BytesIO()
+    if extension == 'png':
+        image.save(buffer, 'PNG', optimize=True)
+    else:
+        image.save(buffer, 'JPEG', quality=85, optimize=True, progressive=True)
+    return ContentFile(buffer.getvalue())
+
+
+def placeholder(image):
+    small = image.convert('RGB')
+    small.thumbnail((PLACEHOLDER_SIZE, PLACEHOLDER_SIZE))
+    buffer = BytesIO()
+    small.save(buffer, 'JPEG', quality=40)
+    return 'data:image/jpeg;base64,' + base64.b64encode(buffer.getvalue()).decode()
+
+
+def decode_image(file):
+    """Повністю декодоване зображення і чи воно анімоване."""
+    with file.open('rb'), Image.open(file) as image:
+        if image.width * image.height > settings.UPLOAD_MAX_PIXELS:
+            raise Image.DecompressionBombError('Зображення має завелику роздільність')
+        image.load()
+        if getattr(image, 'is_animated', False):
+            return image.copy(), True
+        return ImageOps.exif_transpose(image), False
+
+
+def _save_image(file, instance, field, image):
+    """Зберігає перекодоване зображення і копії для srcset: (назви, розмір)."""
+    image.thumbnail((settings.UPLOAD_MAX_DIMENSION, settings.UPLOAD_MAX_DIMENSION))
+    if image.mode in ('RGBA', 'LA') or 'transparency' in image.info:
+        image, extension = image.convert('RGBA'), 'png'
+    else:
+        image, extension = image.convert('RGB'), 'jpg'
+
+    stem = os.path.splitext(os.path.basename(file.name))[0]
+    name = file.storage.save(field.generate_filename(instance, f'{stem}.{extension}'), _encode(image, extension))
+    names = [name]
+    for width in SRCSET_WIDTHS:
+        if width < image.width:
+            copy = image.resize((width, round(image.height * width / image.width)), Image.Resampling.LANCZOS)
+            names.append(file.storage.save(variant_name(name, width), _encode(copy, extension)))
+    return names, image.size
+
+
+FRAGMENT_KINDS = {
+    'cryptix_app.post': 'post',
+    'cryptix_app.grouppost': 'group_post',
+    'cryptix_app.news': 'news',
+    'cryptix_app.profile': 'profile',
+    'cryptix_app.group': 'group',
+}
+
+
+def _invalidate(instance):
+    # кешовані фрагменти посилаються на старий файл і не знають розмірів
+    kind = FRAGMENT_KINDS.get(instance._meta.label_lower)
+    if kind == 'profile':
+        bump_fragment_version('profile', instance.user_id)
+        # update() минає post_save, тож кешований користувач зберіг би старий профіль
+        forget_auth_user(instance.user_id)
+    elif kind == 'group':
+        # фрагментів групи немає, але список груп відповідає 304 за watermark
+        touch_watermark('groups')
+    elif kind:
+        bump_fragment_version(kind, instance.pk)
+    if kind == 'news':
+        bump_news_version()
+
+
+def _process(job):
+    model = apps.get_model(job.model)
+    manager = model._base_manager
+    instance = manager.filter(pk=job.object_id).first()
+    file = getattr(instance, job.field, None)
+    if not file or file.name != job.name:
+        return 'stale'
+
+    current = manager.filter(pk=job.object_id, **{job.field: job.name})
+    try:
+        image, animated = decode_image(file)
+    except (OSError, SyntaxError, ValueError, Image.DecompressionBombError):
+        logger.warning('Не вдалося декодувати %s (%s)', job.name, job)
+        current.update(**{job.field: ''})
+        file.storage.delete(job.name)
+        _invalidate(instance)
+        return 'failed'
+
+    if animated:
+        names, size = [job.name], image.size
+    else:
+        names, size = _save_image(file, instance, model._meta.get_field(job.field), image)
+    updated = current.update(**{
+        job.field: names[0],
+        f'{job.field}_width': size[0],
+        f'{job.field}_height': size[1],
+        f'{job.field}_placeholder': placeholder(image),
+        f'{job.field}_variants': len(names) > 1,
+    })
+    if not updated:
+        # поле змінилось, поки воркер обробляв файл
+        for name in names:
+            if name != job.name:
+                file.storage.delete(name)
+        return 'stale'
+    if names[0] != job.name:
+        file.storage.delete(job.name)
+    _invalidate(instance)
+    return 'processed'
+
+
+def process_pending_images(limit=50):
+    counts = {'processed': 0, 'failed': 0, 'stale': 0}
+    for job in PendingImage.objects.all()[:limit]:
+        try:
+            counts[_process(job)] += 1
+        except Exception:
+            logger.exception('Помилка обробки зображення %s', job)
+            job.attempts += 1
+            if job.attempts < MAX_PROCESS_ATTEMPTS:
+                job.save(update_fields=['attempts'])
+                continue
+            counts['failed'] += 1
+        job.delete()
+    return counts
@@ -8,6 +8,7 @@ urlpatterns = [
     path('login/', auth_views.LoginView.as_view(template_name='cryptix_app/login.html'), name='login'),
     path('logout/', auth_views.LogoutView.as_view(), name='logout'),
     path('profile/', views.profile, name='profile'),
+    path('account/delete/', views.account_delete, name='account_delete'),
     path('', views.home, name='home'),
 
     # користувачі та друзі
@@ -37,13 +38,15 @@ urlpatterns = [
     path('group/<int:group_id>/join/', views.group_join, name='group_join'),
     path('group/<int:group_id>/leave/', views.group_leave, name='group_leave'),
     path('group/<int:group_id>/delete/', views.group_delete, name='group_delete'),
-    path('post/<int:post_id>/comment/', views.group_post_comment, name='group_post_comment'),
+    path('group/post/<int:post_id>/comment/', views.group_post_comment, name='group_post_comment'),
+    path('group/post/<int:post_id>/comments/', views.group_post_comments, name='group_post_comments'),
     
     # профілі користувачів
     path('user/<str:username>/', views.user_profile_view, name='user_profile_view'),
 
     # сповіщення
     path('notifications/', views.notifications_list, name='notifications_list'),
+    path('notifications/stream/', views.notifications_stream, name='notifications_stream'),
     path('notification/<int:notification_id>/delete/', views.notification_delete, name='notification_delete'),
     
     # відгуки
@@ -52,6 +55,7 @@ urlpatterns = [
 
     # стрічка новин
     path('feed/', views.feed, name='feed'),
+    path('trending/', views.trending, name='trending'),
     path('my-posts/', views.my_posts, name='my_posts'),
     path('post/<int:post_id>/like/', views.post_like, name='post_like'),
     path('post/<int:post_id>/comment/', views.post_comment, name='post_comment'),
@@ -60,4 +64,7 @@ urlpatterns = [
     # стрічка новин (адмін)
     path('news/<int:news_id>/delete/', views.news_delete, name='news_delete'),
     path('news/<int:news_id>/edit/', views.news_edit, name='news_edit'),
+
+    # службові
+    path('ready/', views.readiness, name='readiness'),
 ]
\ No newline at end of file
@@ -1,13 +1,96 @@
-from .models import Notification
+import random
+import time
+from collections import defaultdict
+from datetime import timedelta
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db import IntegrityError, transaction
+from django.db.models import F, OuterRef, Q, Subquery, Sum, Window
+from django.db.models.functions import Coalesce
+from django.db.models.functions import RowNumber
+from django.utils import timezone
+
+from .models import (
+    Notification, NotificationActor, Friendship, Follow, Conversation, Message, Group, GroupMembership,
+    GroupPost, GroupPostComment, Profile, Post, PostLike, PostLikeCounter, PostComment, Review, ReviewStats,
+)
+from .cache import touch_watermark, forget_group_roles, bump_fragment_version
+from .buffers import WriteBehindBuffer
+from .events import publish_notification
 
 def create_notification(recipient, notification_type, text, sender=None, link=''):
-    Notification.objects.create(
+    notification = Notification.objects.create(
         recipient=recipient,
         sender=sender,
         notification_type=notification_type,
         text=text,
         link=link
     )
+    touch_watermark('notifications', recipient.id)
+    publish_notification(notification)
+
+# -- агреговані сповіщення --
+# Лайки й коментарі до одного обʼєкта збираються в один непрочитаний рядок
+# ("X та ще 241 користувач вподобали ваш пост"), який оновлюється на місці
+# протягом вікна агрегації.
+
+NOTIFICATION_AGGREGATE_WINDOW = timedelta(hours=24)
+
+
+def others_phrase(count):
+    if count % 10 == 1 and count % 100 != 11:
+        word = 'користувач'
+    elif 2 <= count % 10 <= 4 and not 12 <= count % 100 <= 14:
+        word = 'користувачі'
+    else:
+        word = 'користувачів'
+    return f'та ще {count} {word}'
+
+
+def aggregate_notification(recipient, sender, notification_type, target_key, single_text, many_text, link='', actor_ids=None):
+    actor_ids = list(dict.fromkeys(actor_ids or [sender.id]))
+    since = timezone.now() - NOTIFICATION_AGGREGATE_WINDOW
+    with transaction.atomic():
+        notification = Notification.objects.select_for_update().filter(
+            recipient=recipient,
+            notification_type=notification_type,
+            target_key=target_key,
+            is_read=False,
+            updated_at__gte=since,
+        ).first()
+        if notification is None:
+            actors = len(actor_ids)
+            notification = Notification.objects.create(
+                recipient=recipient,
+                sender=sender,
+                notification_type=notification_type,
+                target_key=target_key,
+                actor_count=actors,
+                text=single_text if actors == 1 else many_text.format(others=others_phrase(actors - 1)),
+                link=link
+            )
+            added = actor_ids
+        else:
+            # рядок сповіщення заблоковано, тож між перевіркою і вставкою
+            # інший запис цих авторів не додасть
+            known = set(NotificationActor.objects.filter(
+                notification=notification, actor_id__in=actor_ids
+            ).values_list('actor_id', flat=True))
+            added = [actor_id for actor_id in actor_ids if actor_id not in known]
+            notification.actor_count += len(added)
+            notification.sender = sender
+            if notification.actor_count > 1:
+                notification.text = many_text.format(others=others_phrase(notification.actor_count - 1))
+            notification.save(update_fields=['sender', 'actor_count', 'text', 'updated_at'])
+        NotificationActor.objects.bulk_create(
+            [NotificationActor(notification=notification, actor_id=actor_id) for actor_id in added],
+            ignore_conflicts=True
+        )
+        publish_notification(notification)
+    touch_watermark('notifications', recipient.id)
+
 
 def notify_friend_request(from_user, to_user):
     create_notification(
@@ -49,12 +132,14 @@ def notify_group_post(group, author):
 
 def notify_new_comment(post, comment_author):
     if post.author != comment_author:
-        create_notification(
+        aggregate_notification(
             recipient=post.author,
             sender=comment_author,
             notification_type=Notification.COMMENT,
-            text=f'{comment_author.username} прокоментував ваш пост',
-            link=f'/app/group/{post.group.id}/'
+            target_key=f'group_post:{post.id}',
+            single_text=f'{comment_author.username} прокоментував ваш пост',
+            many_text=f'{comment_author.username} {{others}} прокоментували ваш пост',
+            link=f'/app/group/{post.group_id}/'
         )
 
 def notify_new_review(reviewer, reviewed_user, rating):
@@ -64,4 +149,304 @@ def notify_new_review(reviewer, reviewed_user, rating):
         notification_type=Notification.REVIEW,
         text=f'{reviewer.username} залишив вам відгук ({rating}★)',
         link=f'/app/user/{reviewed_user.username}/'
-    )
\ No newline at end of file
+    )
+
+
+# -- відгуки --
+# ReviewStats змінюється в тій самій транзакції, що й відгук, відносними
+# F-оновленнями - паралельні відгуки не затирають один одного.
+
+def adjust_review_stats(user_id, **deltas):
+    ReviewStats.objects.get_or_create(user_id=user_id)
+    ReviewStats.objects.filter(user_id=user_id).update(
+        **{field: F(field) + delta for field, delta in deltas.items()}
+    )
+
+
+def save_review(reviewer, reviewed_user, rating, comment):
+    with transaction.atomic():
+        review = Review.objects.select_for_update().filter(reviewer=reviewer, reviewed_user=reviewed_user).first()
+        if review is None:
+            review = Review.objects.create(reviewer=reviewer, reviewed_user=reviewed_user, rating=rating, comment=comment)
+            adjust_review_stats(reviewed_user.id, count=1, total=rating, **{f'rating_{rating}': 1})
+            created = True
+        else:
+            old_rating = review.rating
+            review.rating = rating
+            review.comment = comment
+            review.save(update_fields=['rating', 'comment', 'updated_at'])
+            if old_rating != rating:
+                adjust_review_stats(
+                    reviewed_user.id, total=rating - old_rating,
+                    **{f'rating_{old_rating}': -1, f'rating_{rating}': 1}
+                )
+            created = False
+    bump_fragment_version('profile', reviewed_user.id)
+    return review, created
+
+
+def remove_review(review):
+    with transaction.atomic():
+        # оцінку беремо з заблокованого рядка: її могли змінити після читання review
+        current = Review.objects.select_for_update().filter(id=review.id).first()
+        if current is not None:
+            current.delete()
+            adjust_review_stats(
+                current.reviewed_user_id, count=-1, total=-current.rating, **{f'rating_{current.rating}': -1}
+            )
+    bump_fragment_version('profile', review.reviewed_user_id)
+    return current is not None
+
+
+# -- членство в групах --
+def join_group(user, group, role=GroupMembership.MEMBER):
+    with transaction.atomic():
+        membership, created = GroupMembership.objects.get_or_create(
+            user=user,
+            group=group,
+            defaults={'role': role}
+        )
+        if created:
+            Group.objects.filter(id=group.id).update(member_count=F('member_count') + 1)
+    if created:
+        forget_group_roles(user.id)
+        touch_watermark('groups')
+        touch_watermark('memberships', user.id)
+    return created
+
+
+def leave_group(user, group):
+    with transaction.atomic():
+        deleted, _ = GroupMembership.objects.filter(user=user, group=group).delete()
+        if deleted:
+            Group.objects.filter(id=group.id).update(member_count=F('member_count') - 1)
+    if deleted:
+        forget_group_roles(user.id)
+        touch_watermark('groups')
+        touch_watermark('memberships', user.id)
+    return bool(deleted)
+
+
+# -- коментарі групових постів --
+def add_group_post_comment(post, author, content):
+    with transaction.atomic():
+        comment = GroupPostComment.objects.create(post=post, author=author, content=content)
+        GroupPost.objects.filter(id=post.id).update(comment_count=F('comment_count') + 1)
+    return comment
+
+
+def attach_latest_comments(posts, limit=3):
+    """Проставляє post.latest_comments - останні limit коментарів одним запитом."""
+    posts_by_id = {post.id: post for post in posts}
+    for post in posts:
+        post.latest_comments = []
+    if not posts_by_id:
+        return posts
+    
+    comments = GroupPostComment.objects.filter(post_id__in=posts_by_id).annotate(
+        row=Window(RowNumber(), partition_by=[F('post_id')], order_by=F('id').desc())
+    ).filter(row__lte=limit).select_related('author').order_by('id')
+    
+    for comment in comments:
+        posts_by_id[comment.post_id].latest_comments.append(comment)
+    return posts
+
+
+# -- профіль --
+# Профіль поточного користувача вже приходить з кешу разом з request.user
+# (middleware.CachedAuthenticationMiddleware).
+def get_profile(user):
+    try:
+        return user.profile
+    except Profile.DoesNotExist:
+        profile, created = Profile.objects.get_or_create(user=user)
+        return profile
+
+
+# -- соціальний граф --
+# Множини запамʼятовуються на обʼєкті користувача, тож у межах одного запиту
+# (зокрема всі підзапити батчу) граф читається з БД лише раз.
+def get_friend_ids(user):
+    if not hasattr(user, '_friend_ids'):
+        pairs = Friendship.objects.filter(
+            Q(from_user=user, status=Friendship.ACCEPTED) |
+            Q(to_user=user, status=Friendship.ACCEPTED)
+        ).values_list('from_user_id', 'to_user_id')
+        user._friend_ids = frozenset(from_id if from_id != user.id else to_id for from_id, to_id in pairs)
+    return user._friend_ids
+
+
+def get_following_ids(user):
+    if not hasattr(user, '_following_ids'):
+        user._following_ids = frozenset(Follow.objects.filter(follower=user).values_list('following_id', flat=True))
+    return user._following_ids
+
+
+def get_feed_user_ids(user):
+    return get_friend_ids(user) | get_following_ids(user) | {user.id}
+
+
+# -- лайки --
+# Лічильник лайків - сума шардів PostLikeCounter. Звичайні пости пишуться
+# одразу; для "гарячих" (понад LIKE_HOT_THRESHOLD перемикань за хвилину)
+# перемикання накопичуються в like_buffer як бажаний стан (post_id, user_id)
+# і скидаються пачкою - повторні перемикання одного користувача згортаються.
+# Сам бажаний стан лежить у спільному кеші (likes:pending:...), тож його
+# бачать усі воркери, а буфер процесу лише вирішує, коли писати в БД.
+
+LIKE_PENDING_TIMEOUT = 60
+
+
+def pending_like_key(post_id, user_id):
+    return f'likes:pending:{post_id}:{user_id}'
+
+def like_total():
+    totals = PostLikeCounter.objects.filter(post=OuterRef('pk')).order_by().values('post').annotate(
+        total=Sum('count')
+    ).values('total')
+    return Coalesce(Subquery(totals), 0)
+
+
+def add_like_delta(post_id, delta):
+    if not delta:
+        return
+    shard = random.randrange(PostLikeCounter.SHARDS)
+    counters = PostLikeCounter.objects.filter(post_id=post_id, shard=shard)
+    if counters.update(count=F('count') + delta):
+        return
+    try:
+        with transaction.atomic():
+            PostLikeCounter.objects.create(post_id=post_id, shard=shard, count=delta)
+    except IntegrityError:
+        counters.update(count=F('count') + delta)
+
+
+def is_hot_post(post_id):
+    key = f'likes:rate:{post_id}:{int(time.time() // 60)}'
+    cache.add(key, 0, 120)
+    try:
+        return cache.incr(key) > settings.LIKE_HOT_THRESHOLD
+    except ValueError:
+        return False
+
+
+def liked_post_ids(user, post_ids):
+    post_ids = list(post_ids)
+    liked = set(PostLike.objects.filter(user=user, post_id__in=post_ids).values_list('post_id', flat=True))
+    pending = cache.get_many([pending_like_key(post_id, user.id) for post_id in post_ids])
+    for post_id in post_ids:
+        state = pending.get(pending_like_key(post_id, user.id))
+        if state is True:
+            liked.add(post_id)
+        elif state is False:
+            liked.discard(post_id)
+    return liked
+
+
+def notify_post_likes(post, likers):
+    if not likers:
+        return
+    last = likers[-1]
+    aggregate_notification(
+        recipient=post.author,
+        sender=last,
+        notification_type=Notification.LIKE,
+        target_key=f'post:{post.id}',
+        single_text=f'{last.username} лайкнув ваш пост',
+        many_text=f'{last.username} {{others}} вподобали ваш пост',
+        link='/app/feed/',
+        actor_ids=[liker.id for liker in likers]
+    )
+
+
+def toggle_post_like(post, user):
+    key = pending_like_key(post.id, user.id)
+    pending = cache.get(key)
+    if pending is not None or is_hot_post(post.id):
+        if pending is None:
+            pending = PostLike.objects.filter(post=post, user=user).exists()
+        cache.set(key, not pending, LIKE_PENDING_TIMEOUT)
+        like_buffer.put((post.id, user.id), not pending)
+        return not pending
+    
+    with transaction.atomic():
+        like, created = PostLike.objects.get_or_create(post=post, user=user)
+        if not created:
+            like.delete()
+        add_like_delta(post.id, 1 if created else -1)
+    bump_fragment_version('post', post.id)
+    
+    if created and post.author_id != user.id:
+        notify_post_likes(post, [user])
+    return created
+
+
+def flush_like_toggles(items):
+    # останнє слово - за станом у кеші: той самий ключ міг змінити інший воркер
+    latest = cache.get_many([pending_like_key(*key) for key in items])
+    wanted = defaultdict(dict)
+    for (post_id, user_id), liked in items.items():
+        wanted[post_id][user_id] = latest.get(pending_like_key(post_id, user_id), liked)
+    
+    with transaction.atomic():
+        created = defaultdict(list)
+        for post_id, users in wanted.items():
+            # лічильник змінюємо лише на справді видалені й вставлені рядки:
+            # паралельний прямий лайк чи анлайк уже врахував свій рядок сам,
+            # тож і наявність рядків перевіряє сама БД, а не попередній SELECT
+            unliked, _ = PostLike.objects.filter(
+                post_id=post_id, user_id__in=[uid for uid, liked in users.items() if not liked]
+            ).delete()
+            for user_id, liked in users.items():
+                if not liked:
+                    continue
+                try:
+                    with transaction.atomic():
+                        PostLike.objects.create(post_id=post_id, user_id=user_id)
+                except IntegrityError:
+                    continue
+                created[post_id].append(user_id)
+            add_like_delta(post_id, len(created[post_id]) - unliked)
+        
+        posts = Post.objects.select_related('author').in_bulk(list(created))
+        users = User.objects.in_bulk([uid for uids in created.values() for uid in uids])
+        for post_id, user_ids in created.items():
+            post = posts.get(post_id)
+            likers = [users[uid] for uid in user_ids if uid in users and uid != post.author_id] if post else []
+            if likers:
+                notify_post_likes(post, likers)
+    
+    for post_id in wanted:
+        bump_fragment_version('post', post_id)
+
+
+like_buffer = WriteBehindBuffer(
+    'likes', flush_like_toggles, settings.LIKE_FLUSH_INTERVAL, settings.LIKE_FLUSH_MAX_ITEMS
+)
+
+
+# -- пости --
+def add_post_comment(post, author, content):
+    comment = PostComment.objects.create(post=post, author=author, content=content)
+    bump_fragment_version('post', post.id)
+    
+    if post.author_id != author.id:
+        aggregate_notification(
+            recipient=post.author,
+            sender=author,
+            notification_type=Notification.COMMENT,
+            target_key=f'post:{post.id}',
+            single_text=f'{author.username} прокоментував ваш пост',
+            many_text=f'{author.username} {{others}} прокоментували ваш пост',
+            link='/app/feed/'
+        )
+    return comment
+
+
+# -- чат --
+def send_message(conversation, sender, recipient, content):
+    message = Message.objects.create(conversation=conversation, sender=sender, content=content)
+    Conversation.objects.filter(id=conversation.id).update(updated_at=timezone.now())
+    if recipient:
+        notify_new_message(sender, recipient, conversation.id)
+    return message
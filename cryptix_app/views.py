@@ -1,13 +1,42 @@
+import asyncio
+
+from asgiref.sync import sync_to_async
 from django.shortcuts import render, redirect, get_object_or_404
-from django.contrib.auth import login
+from django.contrib.auth import login, logout
 from django.contrib.auth.decorators import login_required
 from django.contrib.auth.models import User
-from django.db.models import Q, Count
+from django.core.cache import cache
+from django.core.exceptions import ValidationError
+from django.db import connection, DatabaseError
+from django.db.models import Q, Count, Prefetch
 from django.contrib import messages
+from django.core.paginator import Paginator
 from django.utils import timezone
+from django.http import JsonResponse, StreamingHttpResponse
+from django.views.decorators.cache import cache_control, never_cache
+from django.views.decorators.http import condition
 from .forms import RegisterForm, UserUpdateForm, ProfileUpdateForm
-from .models import Profile, Friendship, Follow, Conversation, Message, Group, GroupMembership, GroupPost, GroupPostComment, Notification, Review, Post, PostLike, PostComment, News
+from .models import Profile, Friendship, Follow, Conversation, Message, Group, GroupMembership, GroupPost, GroupPostComment, Notification, Review, ReviewStats, Post, PostLike, PostComment, News
 from .utils import *
+from .cache import (
+    attach_fragment_versions, bump_fragment_version, fragment_versions, fragment_user_key,
+    bump_news_version, news_html, news_etag, news_last_modified, touch_watermark,
+    group_roles,
+)
+from .archive import message_page
+from .decorators import conditional_on, rate_limited
+from .deletion import soft_delete_group, soft_delete_post, soft_delete_user
+from .events import broker, format_event, publish_unread, unread_event
+from .presence import attach_presence, online_users, presence_etag, record_heartbeat
+from .ranking import ranked_feed, trending_post_ids
+from .uploads import accept_image, check_not_rejected, queue_image
+
+
+GROUP_POSTS_PAGE_SIZE = 10
+GROUP_COMMENTS_PREVIEW = 3
+NOTIFICATIONS_LIST_LIMIT = 100
+REVIEWS_PAGE_SIZE = 10
+SSE_KEEPALIVE = 20
 
 
 def register(request):
@@ -25,15 +54,25 @@ def register(request):
 
 @login_required
 def profile(request):
-    profile, created = Profile.objects.get_or_create(user=request.user)
+    profile = get_profile(request.user)
     
     if request.method == 'POST':
+        # форма зберігає всі поля, тож профіль читаємо з БД, а не з кешованого користувача
+        profile, _ = Profile.objects.get_or_create(user=request.user)
+        try:
+            check_not_rejected(request, 'avatar')
+        except ValidationError as error:
+            messages.error(request, error.message)
+            return redirect('profile')
         user_form = UserUpdateForm(request.POST, instance=request.user)
         profile_form = ProfileUpdateForm(request.POST, request.FILES, instance=profile)
         
         if user_form.is_valid() and profile_form.is_valid():
             user_form.save()
             profile_form.save()
+            if 'avatar' in request.FILES:
+                queue_image(profile, 'avatar')
+            bump_fragment_version('profile', request.user.id)
             messages.success(request, 'Профіль оновлено!')
             return redirect('profile')
     else:
@@ -47,37 +86,60 @@ def profile(request):
 
 
 @login_required
+def account_delete(request):
+    if request.method == 'POST':
+        soft_delete_user(request.user)
+        logout(request)
+        messages.success(request, 'Акаунт видалено')
+        return redirect('login')
+    return redirect('profile')
+
+
+@login_required
+@cache_control(private=True, no_cache=True)
+@condition(etag_func=news_etag, last_modified_func=news_last_modified)
 def home(request):
-    news_list = News.objects.all()
-    
     if request.method == 'POST' and request.user.is_superuser:
         title = request.POST.get('title', '').strip()
         content = request.POST.get('content', '').strip()
-        image = request.FILES.get('image')
         is_pinned = request.POST.get('is_pinned') == 'on'
+        try:
+            image = accept_image(request, 'image')
+        except ValidationError as error:
+            messages.error(request, error.message)
+            return redirect('home')
         
         if title and content:
-            News.objects.create(
+            news = News.objects.create(
                 title=title,
                 content=content,
                 image=image,
                 author=request.user,
                 is_pinned=is_pinned
             )
+            queue_image(news, 'image')
+            bump_news_version()
             messages.success(request, 'Новину створено!')
             return redirect('home')
     
-    return render(request, 'cryptix_app/home.html', {
-        'news_list': news_list,
-        'is_admin': request.user.is_superuser
-    })
+    context = {'is_admin': request.user.is_superuser}
+    
+    # адміністратори бачать кнопки керування, тому для них рендеримо наживо
+    if request.user.is_superuser:
+        news_list = News.objects.all().select_related('author')
+        context['news_list'] = attach_fragment_versions('news', news_list)
+        context['fragment_user'] = fragment_user_key(request)
+    else:
+        context['news_html'] = news_html()
+    
+    return render(request, 'cryptix_app/home.html', context)
 
 
 # -- друзі та підписники --
 @login_required
 def users_list(request):
     query = request.GET.get('q', '')
-    users = User.objects.exclude(id=request.user.id)
+    users = User.objects.filter(is_active=True).exclude(id=request.user.id)
     
     if query:
         users = users.filter(
@@ -108,6 +170,7 @@ def users_list(request):
 
 
 @login_required
+@rate_limited('friend_request')
 def send_friend_request(request, user_id):
     to_user = get_object_or_404(User, id=user_id)
     
@@ -122,6 +185,7 @@ def send_friend_request(request, user_id):
     )
     
     if created:
+        touch_watermark('friends', request.user.id, to_user.id)
         notify_friend_request(request.user, to_user)
         messages.success(request, f'Запит дружби надіслано користувачу {to_user.username}')
     else:
@@ -135,6 +199,7 @@ def accept_friend_request(request, friendship_id):
     friendship = get_object_or_404(Friendship, id=friendship_id, to_user=request.user)
     friendship.status = 'accepted'
     friendship.save()
+    touch_watermark('friends', friendship.from_user_id, request.user.id)
     notify_friend_accept(friendship.from_user, request.user)
     messages.success(request, f'Ви тепер друзі з {friendship.from_user.username}')
     return redirect('friend_requests')
@@ -144,6 +209,7 @@ def accept_friend_request(request, friendship_id):
 def reject_friend_request(request, friendship_id):
     friendship = get_object_or_404(Friendship, id=friendship_id, to_user=request.user)
     friendship.delete()
+    touch_watermark('friends', friendship.from_user_id, request.user.id)
     messages.success(request, 'Запит відхилено')
     return redirect('friend_requests')
 
@@ -155,6 +221,7 @@ def remove_friend(request, user_id):
         Q(from_user=request.user, to_user=user) |
         Q(from_user=user, to_user=request.user)
     ).delete()
+    touch_watermark('friends', request.user.id, user.id)
     messages.success(request, f'{user.username} видален з друзів')
     return redirect('friends_list')
 
@@ -169,18 +236,14 @@ def friend_requests(request):
     return render(request, 'cryptix_app/friend_requests.html', {'requests': pending_requests})
 
 
+def friends_presence(request):
+    return presence_etag(get_friend_ids(request.user))
+
+
 @login_required
+@conditional_on('friends', vary_on=friends_presence)
 def friends_list(request):
-    friends_ids = Friendship.objects.filter(
-        Q(from_user=request.user, status='accepted') |
-        Q(to_user=request.user, status='accepted')
-    ).values_list('from_user_id', 'to_user_id')
-    
-    friend_ids = set()
-    for from_id, to_id in friends_ids:
-        friend_ids.add(from_id if from_id != request.user.id else to_id)
-    
-    friends = User.objects.filter(id__in=friend_ids)
+    friends = attach_presence(User.objects.filter(id__in=get_friend_ids(request.user), is_active=True))
     
     return render(request, 'cryptix_app/friends_list.html', {'friends': friends})
 
@@ -199,6 +262,7 @@ def follow_user(request, user_id):
     )
     
     if created:
+        touch_watermark('follows', request.user.id, user_to_follow.id)
         messages.success(request, f'Ви підписалися на {user_to_follow.username}')
     else:
         messages.info(request, 'Ви вже підписані на цього користувача')
@@ -210,19 +274,22 @@ def follow_user(request, user_id):
 def unfollow_user(request, user_id):
     user_to_unfollow = get_object_or_404(User, id=user_id)
     Follow.objects.filter(follower=request.user, following=user_to_unfollow).delete()
+    touch_watermark('follows', request.user.id, user_to_unfollow.id)
     messages.success(request, f'Ви відписались від {user_to_unfollow.username}')
     return redirect('users_list')
 
 
 @login_required
+@conditional_on('follows')
 def followers_list(request):
-    followers = User.objects.filter(following__following=request.user)
+    followers = User.objects.filter(following__following=request.user, is_active=True)
     return render(request, 'cryptix_app/followers_list.html', {'followers': followers})
 
 
 @login_required
+@conditional_on('follows')
 def following_list(request):
-    following = User.objects.filter(followers__follower=request.user)
+    following = User.objects.filter(followers__follower=request.user, is_active=True)
     return render(request, 'cryptix_app/following_list.html', {'following': following})
 
 
@@ -244,14 +311,15 @@ def conversations_list(request):
             'last_message': last_message,
             'unread_count': unread_count
         })
+    attach_presence(data['other_user'] for data in conversations_data)
     
     return render(request, 'cryptix_app/conversations_list.html', {'conversations_data': conversations_data})
 
 
 @login_required
+@rate_limited('message')
 def conversation_detail(request, conversation_id):
     conversation = get_object_or_404(Conversation, id=conversation_id, participants=request.user)
-    chat_messages = conversation.messages.all().select_related('sender')
     other_user = conversation.participants.exclude(id=request.user.id).first()
     
     conversation.messages.filter(is_read=False).exclude(sender=request.user).update(is_read=True)
@@ -259,19 +327,18 @@ def conversation_detail(request, conversation_id):
     if request.method == 'POST':
         content = request.POST.get('content', '').strip()
         if content:
-            Message.objects.create(
-                conversation=conversation,
-                sender=request.user,
-                content=content
-            )
-            conversation.updated_at = timezone.now()
-            conversation.save()
-            notify_new_message(request.user, other_user, conversation.id)
+            send_message(conversation, request.user, other_user, content)
             return redirect('conversation_detail', conversation_id=conversation.id)
     
+    # старіші повідомлення - сторінками через ?before=<id>, зокрема з архіву
+    before = request.GET.get('before')
+    chat_messages, has_older = message_page(conversation, before=int(before) if before and before.isdigit() else None)
+    
     return render(request, 'cryptix_app/conversation_detail.html', {
         'conversation': conversation,
         'chat_messages': chat_messages,
+        'has_older': has_older,
+        'oldest_id': chat_messages[-1].id if chat_messages else None,
         'other_user': other_user
     })
 
@@ -300,12 +367,15 @@ def start_conversation(request, user_id):
 
 
 @login_required
+@conditional_on('groups', 'memberships')
 def groups_list(request):
-    all_groups = Group.objects.all().prefetch_related('members')
-    my_groups = request.user.joined_groups.all()
+    my_group_ids = list(group_roles(request.user.id))
+    my_groups = list(Group.objects.filter(id__in=my_group_ids))
+    
+    page = Paginator(Group.objects.exclude(id__in=my_group_ids), 20).get_page(request.GET.get('page'))
     
     return render(request, 'cryptix_app/groups_list.html', {
-        'all_groups': all_groups,
+        'page': page,
         'my_groups': my_groups
     })
 
@@ -316,7 +386,11 @@ def group_create(request):
         name = request.POST.get('name')
         description = request.POST.get('description', '')
         is_private = request.POST.get('is_private') == 'on'
-        avatar = request.FILES.get('avatar')
+        try:
+            avatar = accept_image(request, 'avatar')
+        except ValidationError as error:
+            messages.error(request, error.message)
+            return redirect('group_create')
         
         group = Group.objects.create(
             name=name,
@@ -325,12 +399,8 @@ def group_create(request):
             avatar=avatar,
             creator=request.user
         )
-        
-        GroupMembership.objects.create(
-            user=request.user,
-            group=group,
-            role='admin'
-        )
+        queue_image(group, 'avatar')
+        join_group(request.user, group, role=GroupMembership.ADMIN)
         
         messages.success(request, f'Група "{name}" створена!')
         return redirect('group_detail', group_id=group.id)
@@ -339,40 +409,58 @@ def group_create(request):
 
 
 @login_required
+@rate_limited('group_post')
 def group_detail(request, group_id):
     group = get_object_or_404(Group, id=group_id)
-    is_member = group.members.filter(id=request.user.id).exists()
+    role = group_roles(request.user.id).get(group.id)
+    is_member = role is not None
     
     if group.is_private and not is_member:
         messages.error(request, 'Це приватна група')
         return redirect('groups_list')
     
-    posts = group.posts.all().select_related('author').prefetch_related('comments')
-    membership = None
-    
-    if is_member:
-        membership = GroupMembership.objects.get(user=request.user, group=group)
-    
     if request.method == 'POST' and is_member:
         if 'post_content' in request.POST:
             content = request.POST.get('post_content', '').strip()
-            image = request.FILES.get('post_image')
+            try:
+                image = accept_image(request, 'post_image')
+            except ValidationError as error:
+                messages.error(request, error.message)
+                return redirect('group_detail', group_id=group.id)
             if content:
-                GroupPost.objects.create(
+                post = GroupPost.objects.create(
                     group=group,
                     author=request.user,
                     content=content,
                     image=image
                 )
+                queue_image(post, 'image')
                 notify_group_post(group, request.user)
                 messages.success(request, 'Пост створено!')
                 return redirect('group_detail', group_id=group.id)
     
+    posts = []
+    next_before = None
+    
+    # курсорна пагінація: ?before=<id найстарішого показаного поста>
+    if is_member:
+        posts = group.posts.select_related('author').order_by('-id')
+        before = request.GET.get('before', '')
+        if before.isdigit():
+            posts = posts.filter(id__lt=int(before))
+        posts = list(posts[:GROUP_POSTS_PAGE_SIZE + 1])
+        if len(posts) > GROUP_POSTS_PAGE_SIZE:
+            posts = posts[:GROUP_POSTS_PAGE_SIZE]
+            next_before = posts[-1].id
+        attach_latest_comments(posts, GROUP_COMMENTS_PREVIEW)
+    
     return render(request, 'cryptix_app/group_detail.html', {
         'group': group,
-        'posts': posts,
+        'posts': attach_fragment_versions('group_post', posts),
+        'next_before': next_before,
         'is_member': is_member,
-        'membership': membership
+        'role': role,
+        'fragment_user': fragment_user_key(request),
     })
 
 
@@ -384,11 +472,7 @@ def group_join(request, group_id):
         messages.error(request, 'Неможливо приєднатися до приватної групи')
         return redirect('groups_list')
     
-    GroupMembership.objects.get_or_create(
-        user=request.user,
-        group=group,
-        defaults={'role': 'member'}
-    )
+    join_group(request.user, group)
     
     messages.success(request, f'Ви приєдналися до групи "{group.name}"')
     return redirect('group_detail', group_id=group.id)
@@ -402,33 +486,69 @@ def group_leave(request, group_id):
         messages.error(request, 'Створювач не може покинути групу')
         return redirect('group_detail', group_id=group.id)
     
-    GroupMembership.objects.filter(user=request.user, group=group).delete()
+    leave_group(request.user, group)
     messages.success(request, f'Ви покинули групу "{group.name}"')
     return redirect('groups_list')
 
 
 @login_required
+@rate_limited('comment')
 def group_post_comment(request, post_id):
-    post = get_object_or_404(GroupPost, id=post_id)
+    # пост видаленої групи лишається до очищення, але писати в нього не можна
+    post = get_object_or_404(GroupPost.objects.select_related('group').filter(group__in=Group.objects.all()), id=post_id)
+    
+    if post.group_id not in group_roles(request.user.id):
+        messages.error(request, 'Коментувати можуть лише учасники групи')
+        return redirect('group_detail', group_id=post.group_id)
     
     if request.method == 'POST':
         content = request.POST.get('content', '').strip()
         if content:
-            GroupPostComment.objects.create(
-                post=post,
-                author=request.user,
-                content=content
-            )
+            add_group_post_comment(post, request.user, content)
+            bump_fragment_version('group_post', post.id)
             notify_new_comment(post, request.user)
             messages.success(request, 'Коментар додано!')
     
     return redirect('group_detail', group_id=post.group.id)
 
 
+@login_required
+def group_post_comments(request, post_id):
+    post = get_object_or_404(GroupPost.objects.filter(group__in=Group.objects.all()), id=post_id)
+    
+    if post.group_id not in group_roles(request.user.id):
+        return JsonResponse({'error': 'Коментарі бачать лише учасники групи'}, status=403)
+    
+    limit = request.GET.get('limit', '')
+    limit = min(int(limit), 50) if limit.isdigit() and int(limit) > 0 else 20
+    
+    comments = post.comments.select_related('author').order_by('-id')
+    before = request.GET.get('before', '')
+    if before.isdigit():
+        comments = comments.filter(id__lt=int(before))
+    comments = list(comments[:limit + 1])
+    has_more = len(comments) > limit
+    comments = comments[:limit]
+    
+    return JsonResponse({
+        'comments': [
+            {
+                'id': comment.id,
+                'author': comment.author.username,
+                'content': comment.content,
+                'created_at': timezone.localtime(comment.created_at).strftime('%d.%m.%Y %H:%M'),
+            }
+            for comment in reversed(comments)
+        ],
+        'has_more': has_more,
+        'next_before': comments[-1].id if has_more else None,
+    })
+
+
 @login_required
 def group_delete(request, group_id):
     group = get_object_or_404(Group, id=group_id, creator=request.user)
-    group.delete()
+    soft_delete_group(group)
     messages.success(request, 'Групу видалено')
     return redirect('groups_list')
 
@@ -437,7 +557,7 @@ def group_delete(request, group_id):
 
 @login_required
 def user_profile_view(request, username):
-    profile_user = get_object_or_404(User, username=username)
+    profile_user = get_object_or_404(User, username=username, is_active=True)
     profile, created = Profile.objects.get_or_create(user=profile_user)
     
     is_friend = False
@@ -470,6 +590,13 @@ def user_profile_view(request, username):
     following_count = Follow.objects.filter(follower=profile_user).count()
     groups_count = profile_user.joined_groups.count()
     
+    review_stats = ReviewStats.objects.filter(user=profile_user).first()
+    # у кеші точніший час, ніж у профілі, куди він пишеться пачками
+    online = online_users([profile_user.id])
+    reviews_page = Paginator(
+        profile_user.reviews_received.select_related('reviewer').order_by('-created_at', '-id'), REVIEWS_PAGE_SIZE
+    ).get_page(request.GET.get('reviews_page'))
+    
     return render(request, 'cryptix_app/user_profile.html', {
         'profile_user': profile_user,
         'profile': profile,
@@ -480,16 +607,28 @@ def user_profile_view(request, username):
         'followers_count': followers_count,
         'following_count': following_count,
         'groups_count': groups_count,
+        'review_stats': review_stats,
+        'reviews_page': reviews_page,
+        'is_online': profile_user.id in online,
+        'last_seen': online.get(profile_user.id, profile.last_seen),
+        'reviews_version': fragment_versions('profile', [profile_user.id])[profile_user.id],
+        'fragment_user': fragment_user_key(request),
     })
 
 
 # -- сповіщення
 @login_required
+@conditional_on('notifications')
 def notifications_list(request):
-    notifications = request.user.notifications.all()
-    unread_count = notifications.filter(is_read=False).count()
+    unread = request.user.notifications.filter(is_read=False)
+    unread_count = unread.count()
+    notifications = request.user.notifications.select_related('sender')[:NOTIFICATIONS_LIST_LIMIT]
     
-    notifications.filter(is_read=False).update(is_read=True)
+    if unread.update(is_read=True):
+        # ETag цієї відповіді описує стан до прочитання: після оновлення він
+        # не має збігтися, інакше клієнт отримав би 304 для сторінки з "новими"
+        touch_watermark('notifications', request.user.id)
+    publish_unread(request.user.id, 0)
     
     return render(request, 'cryptix_app/notifications_list.html', {
         'notifications': notifications,
@@ -501,10 +640,50 @@ def notifications_list(request):
 def notification_delete(request, notification_id):
     notification = get_object_or_404(Notification, id=notification_id, recipient=request.user)
     notification.delete()
+    touch_watermark('notifications', request.user.id)
+    publish_unread(request.user.id)
     messages.success(request, 'Сповіщення видалено')
     return redirect('notifications_list')
 
 
+@login_required
+async def notifications_stream(request):
+    # SSE: нові сповіщення і лічильник непрочитаних без опитування сторінок
+    user = await request.auser()
+    queue = broker.subscribe(user.id)
+    unread_count = await Notification.objects.filter(recipient=user, is_read=False).acount()
+
+    async def stream():
+        unread = unread_count
+        try:
+            yield f'retry: 5000\n\n{format_event(unread_event(unread))}'
+            while True:
+                try:
+                    event = await asyncio.wait_for(queue.get(), SSE_KEEPALIVE)
+                except asyncio.TimeoutError:
+                    # відкрита вкладка - теж присутність, хоч запитів і немає
+                    await sync_to_async(record_heartbeat)(user.id)
+                    # брокер живе в процесі: сповіщення, створені іншим
+                    # воркером, сюди не дійдуть, тож лічильник перечитуємо з БД
+                    count = await Notification.objects.filter(recipient=user, is_read=False).acount()
+                    if count != unread:
+                        unread = count
+                        yield format_event(unread_event(count))
+                    else:
+                        yield ': keepalive\n\n'
+                    continue
+                if event['event'] == 'unread':
+                    unread = event['data']['unread']
+                yield format_event(event)
+        finally:
+            broker.unsubscribe(user.id, queue)
+
+    response = StreamingHttpResponse(stream(), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'
+    return response
+
+
 # -- відгуки і рейтинг
 @login_required
 def leave_review(request, username):
@@ -515,18 +694,11 @@ def leave_review(request, username):
         return redirect('user_profile_view', username=username)
     
     if request.method == 'POST':
-        rating = request.POST.get('rating')
+        rating = request.POST.get('rating', '')
         comment = request.POST.get('comment', '').strip()
         
-        if rating and comment:
-            review, created = Review.objects.update_or_create(
-                reviewer=request.user,
-                reviewed_user=reviewed_user,
-                defaults={
-                    'rating': int(rating),
-                    'comment': comment
-                }
-            )
+        if rating in ('1', '2', '3', '4', '5') and comment:
+            review, created = save_review(request.user, reviewed_user, int(rating), comment)
             
             if created:
                 notify_new_review(request.user, reviewed_user, rating)
@@ -540,95 +712,91 @@ def leave_review(request, username):
 
 @login_required
 def delete_review(request, review_id):
-    review = get_object_or_404(Review, id=review_id, reviewer=request.user)
-    review.delete()
+    review = get_object_or_404(Review.objects.select_related('reviewed_user'), id=review_id, reviewer=request.user)
+    remove_review(review)
     messages.success(request, 'Відгук видалено')
     return redirect('user_profile_view', username=review.reviewed_user.username)
 
 
 # -- стрічка новин
+def post_cards():
+    return Post.objects.select_related('author__profile').annotate(
+        like_total=like_total()
+    ).prefetch_related(
+        Prefetch('comments', queryset=PostComment.objects.select_related('author'))
+    )
+
+
+def posts_in_order(post_ids):
+    posts = {post.id: post for post in post_cards().filter(id__in=post_ids)}
+    return [posts[post_id] for post_id in post_ids if post_id in posts]
+
+
+def render_posts(request, posts, mode):
+    posts = attach_fragment_versions('post', posts)
+    liked_posts_ids = liked_post_ids(request.user, [post.id for post in posts])
+    
+    return render(request, 'cryptix_app/feed.html', {
+        'posts': posts,
+        'liked_posts_ids': liked_posts_ids,
+        'mode': mode,
+        'fragment_user': fragment_user_key(request),
+    })
+
+
 @login_required
 def feed(request):
-    friends_ids = Friendship.objects.filter(
-        Q(from_user=request.user, status='accepted') |
-        Q(to_user=request.user, status='accepted')
-    ).values_list('from_user_id', 'to_user_id')
-    
-    friend_ids = set()
-    for from_id, to_id in friends_ids:
-        friend_ids.add(from_id if from_id != request.user.id else to_id)
-    
-    following_ids = Follow.objects.filter(follower=request.user).values_list('following_id', flat=True)
-    
-    all_user_ids = friend_ids.union(set(following_ids)).union({request.user.id})
-    
-    posts = Post.objects.filter(author_id__in=all_user_ids).select_related('author').prefetch_related('likes', 'comments')
-    
     if request.method == 'POST' and 'post_content' in request.POST:
         content = request.POST.get('post_content', '').strip()
-        image = request.FILES.get('post_image')
+        try:
+            image = accept_image(request, 'post_image')
+        except ValidationError as error:
+            messages.error(request, error.message)
+            return redirect('feed')
         if content:
-            Post.objects.create(
+            post = Post.objects.create(
                 author=request.user,
                 content=content,
                 image=image
             )
+            queue_image(post, 'image')
             messages.success(request, 'Пост створено!')
             return redirect('feed')
     
-    liked_posts_ids = PostLike.objects.filter(user=request.user).values_list('post_id', flat=True)
-    
-    return render(request, 'cryptix_app/feed.html', {
-        'posts': posts,
-        'liked_posts_ids': liked_posts_ids
-    })
+    feed_user_ids = get_feed_user_ids(request.user)
+    if request.GET.get('mode') == 'ranked':
+        return render_posts(request, posts_in_order(ranked_feed(request.user, feed_user_ids)), 'ranked')
+    return render_posts(request, post_cards().filter(author_id__in=feed_user_ids), 'latest')
+
+
+@login_required
+def trending(request):
+    return render_posts(request, posts_in_order(trending_post_ids()), 'trending')
 
 
 @login_required
+@rate_limited('like')
 def post_like(request, post_id):
     post = get_object_or_404(Post, id=post_id)
     
-    like, created = PostLike.objects.get_or_create(post=post, user=request.user)
-    
-    if not created:
-        like.delete()
-        messages.info(request, 'Лайк знято')
-    else:
+    if toggle_post_like(post, request.user):
         messages.success(request, 'Лайк додано!')
-        if post.author != request.user:
-            create_notification(
-                recipient=post.author,
-                sender=request.user,
-                notification_type=Notification.COMMENT,
-                text=f'{request.user.username} лайкнув ваш пост',
-                link='/app/feed/'
-            )
+    else:
+        messages.info(request, 'Лайк знято')
     
     return redirect('feed')
 
 
 @login_required
+@rate_limited('comment')
 def post_comment(request, post_id):
     post = get_object_or_404(Post, id=post_id)
     
     if request.method == 'POST':
         content = request.POST.get('content', '').strip()
         if content:
-            PostComment.objects.create(
-                post=post,
-                author=request.user,
-                content=content
-            )
+            add_post_comment(post, request.user, content)
             messages.success(request, 'Коментар додано!')
-            
-            if post.author != request.user:
-                create_notification(
-                    recipient=post.author,
-                    sender=request.user,
-                    notification_type=Notification.COMMENT,
-                    text=f'{request.user.username} прокоментував ваш пост',
-                    link='/app/feed/'
-                )
     
     return redirect('feed')
 
@@ -636,15 +804,15 @@ def post_comment(request, post_id):
 @login_required
 def post_delete(request, post_id):
     post = get_object_or_404(Post, id=post_id, author=request.user)
-    post.delete()
+    soft_delete_post(post)
     messages.success(request, 'Пост видалено')
     return redirect('feed')
 
 
 @login_required
 def my_posts(request):
-    posts = request.user.posts.all().prefetch_related('likes', 'comments')
-    liked_posts_ids = PostLike.objects.filter(user=request.user).values_list('post_id', flat=True)
+    posts = list(request.user.posts.annotate(like_total=like_total()).prefetch_related('comments'))
+    liked_posts_ids = liked_post_ids(request.user, [post.id for post in posts])
     
     return render(request, 'cryptix_app/my_posts.html', {
         'posts': posts,
@@ -661,6 +829,8 @@ def news_delete(request, news_id):
     
     news = get_object_or_404(News, id=news_id)
     news.delete()
+    bump_fragment_version('news', news_id)
+    bump_news_version()
     messages.success(request, 'Новину видалено')
     return redirect('home')
 
@@ -677,12 +847,39 @@ def news_edit(request, news_id):
         news.title = request.POST.get('title', '').strip()
         news.content = request.POST.get('content', '').strip()
         news.is_pinned = request.POST.get('is_pinned') == 'on'
+        try:
+            image = accept_image(request, 'image')
+        except ValidationError as error:
+            messages.error(request, error.message)
+            return redirect('news_edit', news_id=news.id)
         
-        if 'image' in request.FILES:
-            news.image = request.FILES['image']
+        if image:
+            news.image = image
         
         news.save()
+        if image:
+            queue_image(news, 'image')
+        bump_fragment_version('news', news.id)
+        bump_news_version()
         messages.success(request, 'Новину оновлено!')
         return redirect('home')
     
-    return render(request, 'cryptix_app/news_edit.html', {'news': news})
\ No newline at end of file
+    return render(request, 'cryptix_app/news_edit.html', {'news': news})
+
+
+# -- службові
+@never_cache
+def readiness(request):
+    checks = {}
+    try:
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT 1')
+        checks['database'] = 'ok'
+    except DatabaseError:
+        checks['database'] = 'error'
+    
+    cache.set('readiness', 1, 5)
+    checks['cache'] = 'ok' if cache.get('readiness') == 1 else 'error'
+    
+    ready = all(value == 'ok' for value in checks.values())
+    return JsonResponse({'status': 'ok' if ready else 'unavailable', 'checks': checks}, status=200 if ready else 503)
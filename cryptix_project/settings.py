@@ -26,7 +26,8 @@ SECRET_KEY = 'django-insecure-k^evurjxvkilk6sd0mby3ybjo271qv$-n^_tcd+uema=v9$qa(
 # SECURITY WARNING: don't run with debug turned on in production!
 DEBUG = True
 
-ALLOWED_HOSTS = ['.onrender.com']
+ALLOWED_HOSTS = ['.onrender.com', 'localhost', '127.0.0.1']
+ALLOWED_HOSTS += [host for host in os.environ.get('DJANGO_ALLOWED_HOSTS', '').split(',') if host]
 
 
 # Application definition
@@ -44,13 +45,15 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
+    'whitenoise.middleware.WhiteNoiseMiddleware',
+    'cryptix_app.middleware.CompressionMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
-    'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'cryptix_app.middleware.CachedAuthenticationMiddleware',
+    'cryptix_app.middleware.PresenceMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
-    'whitemoise.middleware.WhiteNoiseMiddleWare',
 ]
 
 ROOT_URLCONF = 'cryptix_project.urls'
@@ -65,6 +68,7 @@ TEMPLATES = [
                 'django.template.context_processors.request',
                 'django.contrib.auth.context_processors.auth',
                 'django.contrib.messages.context_processors.messages',
+                'cryptix_app.context_processors.notification_stream',
             ],
         },
     },
@@ -84,6 +88,59 @@ DATABASES = {
 }
 
 
+DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
+
+
+# Cache
+# CRYPTIX_CACHE_BACKEND: locmem (за замовчуванням), file або redis
+
+CACHE_BACKEND = os.environ.get('CRYPTIX_CACHE_BACKEND', 'locmem')
+CACHE_BACKENDS = {
+    'locmem': 'django.core.cache.backends.locmem.LocMemCache',
+    'file': 'django.core.cache.backends.filebased.FileBasedCache',
+    'redis': 'django.core.cache.backends.redis.RedisCache',
+}
+
+
+def cache_config(alias, timeout=300):
+    if CACHE_BACKEND == 'file':
+        location = os.path.join(os.environ.get('CRYPTIX_CACHE_DIR', BASE_DIR / '.cache'), alias)
+    elif CACHE_BACKEND == 'redis':
+        location = os.environ.get('CRYPTIX_REDIS_URL', 'redis://127.0.0.1:6379/1')
+    else:
+        location = f'cryptix-{alias}'
+    return {
+        'BACKEND': CACHE_BACKENDS[CACHE_BACKEND],
+        'LOCATION': location,
+        'KEY_PREFIX': alias,
+        'TIMEOUT': timeout,
+    }
+
+
+CACHES = {
+    'default': cache_config('default'),
+    'fragments': cache_config('fragments', timeout=60 * 60),
+    'sessions': cache_config('sessions', timeout=60 * 60 * 24 * 14),
+}
+
+
+# Sessions
+# CRYPTIX_SESSION_ENGINE: db (за замовчуванням), cached_db або cache.
+# cache зберігає сесії лише в кеші - підходить тільки для спільного redis,
+# бо locmem і file не переживають перезапуск / не діляться між серверами.
+SESSION_ENGINES = {
+    'db': 'django.contrib.sessions.backends.db',
+    'cached_db': 'django.contrib.sessions.backends.cached_db',
+    'cache': 'django.contrib.sessions.backends.cache',
+}
+SESSION_ENGINE = SESSION_ENGINES[os.environ.get('CRYPTIX_SESSION_ENGINE', 'db')]
+SESSION_CACHE_ALIAS = 'sessions'
+
+# Користувач разом з профілем кешується між запитами (cryptix_app.middleware);
+# кеш скидається при збереженні User або Profile.
+AUTH_USER_CACHE_TIMEOUT = int(os.environ.get('CRYPTIX_AUTH_USER_CACHE_TIMEOUT', 60 * 15))
+
+
 # Password validation
 # https://docs.djangoproject.com/en/6.0/ref/settings/#auth-password-validators
 
@@ -121,6 +178,84 @@ USE_TZ = True
 STATIC_URL = 'static/'
 
 
+REST_FRAMEWORK = {
+    'DEFAULT_AUTHENTICATION_CLASSES': [
+        'rest_framework.authentication.SessionAuthentication',
+        'rest_framework.authentication.BasicAuthentication',
+    ],
+    'DEFAULT_PERMISSION_CLASSES': ['rest_framework.permissions.IsAuthenticated'],
+    'DEFAULT_RENDERER_CLASSES': ['rest_framework.renderers.JSONRenderer'],
+    'DEFAULT_PARSER_CLASSES': [
+        'rest_framework.parsers.JSONParser',
+        'rest_framework.parsers.MultiPartParser',
+    ],
+    'DEFAULT_THROTTLE_CLASSES': [
+        'rest_framework.throttling.AnonRateThrottle',
+        'rest_framework.throttling.UserRateThrottle',
+    ],
+    'DEFAULT_THROTTLE_RATES': {
+        'anon': '60/min',
+        'user': '600/min',
+    },
+}
+
+
+# Зберігання сповіщень: прочитані старші за RETENTION_DAYS видаляються
+# (або архівуються у NOTIFICATION_ARCHIVE_DIR), на користувача лишається
+# не більше MAX_PER_USER найновіших.
+NOTIFICATION_RETENTION_DAYS = int(os.environ.get('CRYPTIX_NOTIFICATION_RETENTION_DAYS', 90))
+NOTIFICATION_MAX_PER_USER = int(os.environ.get('CRYPTIX_NOTIFICATION_MAX_PER_USER', 500))
+NOTIFICATION_PURGE_CHUNK = int(os.environ.get('CRYPTIX_NOTIFICATION_PURGE_CHUNK', 500))
+NOTIFICATION_ARCHIVE_DIR = os.environ.get('CRYPTIX_NOTIFICATION_ARCHIVE_DIR') or None
+
+# Повідомлення, старші за ARCHIVE_DAYS, переносяться блоками по ARCHIVE_CHUNK
+# у стиснені рядки MessageArchive; чат і далі показує їх при прокручуванні.
+MESSAGE_ARCHIVE_DAYS = int(os.environ.get('CRYPTIX_MESSAGE_ARCHIVE_DAYS', 90))
+MESSAGE_ARCHIVE_CHUNK = int(os.environ.get('CRYPTIX_MESSAGE_ARCHIVE_CHUNK', 500))
+
+
+# Видалені групи, пости й акаунти ховаються одразу, а залежні рядки
+# видаляє воркер порціями по TOMBSTONE_PURGE_CHUNK, не довше за BUDGET секунд за запуск.
+TOMBSTONE_PURGE_CHUNK = int(os.environ.get('CRYPTIX_TOMBSTONE_PURGE_CHUNK', 500))
+TOMBSTONE_PURGE_BUDGET = float(os.environ.get('CRYPTIX_TOMBSTONE_PURGE_BUDGET', 20))
+
+# Рейтингова стрічка: оцінюються пости за останні WINDOW днів, "Популярне"
+# показує пости за TRENDING днів, спорідненість з авторами - за AFFINITY днів.
+RANKING_WINDOW_DAYS = int(os.environ.get('CRYPTIX_RANKING_WINDOW_DAYS', 7))
+RANKING_TRENDING_DAYS = int(os.environ.get('CRYPTIX_RANKING_TRENDING_DAYS', 2))
+RANKING_AFFINITY_DAYS = int(os.environ.get('CRYPTIX_RANKING_AFFINITY_DAYS', 30))
+
+# Лайки "гарячих" постів (понад LIKE_HOT_THRESHOLD перемикань за хвилину)
+# буферизуються в памʼяті воркера і записуються пачками.
+LIKE_HOT_THRESHOLD = int(os.environ.get('CRYPTIX_LIKE_HOT_THRESHOLD', 30))
+LIKE_FLUSH_INTERVAL = float(os.environ.get('CRYPTIX_LIKE_FLUSH_INTERVAL', 1.0))
+LIKE_FLUSH_MAX_ITEMS = int(os.environ.get('CRYPTIX_LIKE_FLUSH_MAX_ITEMS', 500))
+
+# Користувач онлайн, поки з останнього запиту минуло менше ONLINE секунд.
+# Profile.last_seen оновлюється не частіше ніж раз на FLUSH секунд на
+# користувача, пачками з памʼяті воркера.
+PRESENCE_ONLINE_SECONDS = int(os.environ.get('CRYPTIX_PRESENCE_ONLINE_SECONDS', 5 * 60))
+PRESENCE_FLUSH_SECONDS = int(os.environ.get('CRYPTIX_PRESENCE_FLUSH_SECONDS', 60))
+
+# Обмеження частоти записів (cryptix_app.ratelimit): "<кількість>/<період>",
+# період - sec, min, hour або day. Ліміт на IP у FACTOR разів більший.
+# TRUSTED_PROXIES - скільки проксі перед застосунком дописують
+# X-Forwarded-For; 0 - адреса клієнта береться з REMOTE_ADDR.
+RATE_LIMITS = {
+    'friend_request': '20/hour',
+    'like': '120/min',
+    'comment': '10/min',
+    'message': '30/min',
+    'group_post': '10/min',
+}
+RATE_LIMIT_IP_FACTOR = int(os.environ.get('CRYPTIX_RATE_LIMIT_IP_FACTOR', 5))
+RATE_LIMIT_TRUSTED_PROXIES = int(os.environ.get('CRYPTIX_RATE_LIMIT_TRUSTED_PROXIES', 0))
+
+# SSE-потік сповіщень тримає зʼєднання відкритим, тож клієнтський скрипт
+# вмикаємо лише під ASGI (gunicorn.conf.py вмикає його для uvicorn-воркерів).
+NOTIFICATION_STREAM = os.environ.get('CRYPTIX_NOTIFICATION_STREAM', '0') == '1'
+
+
 LOGIN_REDIRECT_URL = 'home'
 LOGOUT_REDIRECT_URL = 'login'
 LOGIN_URL = 'login'
@@ -128,7 +263,18 @@ LOGIN_URL = 'login'
 MEDIA_URL = '/media/'
 MEDIA_ROOT = BASE_DIR / 'media'
 
+# Завантаження пишуться на диск потоково; файл понад UPLOAD_MAX_BYTES
+# відкидається під час читання, зображення понад UPLOAD_MAX_PIXELS не
+# приймається. Воркер зменшує зображення до UPLOAD_MAX_DIMENSION по довшій стороні.
+FILE_UPLOAD_HANDLERS = ['cryptix_app.uploads.LimitedUploadHandler']
+UPLOAD_MAX_BYTES = int(os.environ.get('CRYPTIX_UPLOAD_MAX_BYTES', 10 * 1024 * 1024))
+UPLOAD_MAX_PIXELS = int(os.environ.get('CRYPTIX_UPLOAD_MAX_PIXELS', 40_000_000))
+UPLOAD_MAX_DIMENSION = int(os.environ.get('CRYPTIX_UPLOAD_MAX_DIMENSION', 2048))
+
 
-STATICFILES_STORAGE = 'whitenoise.storage.CompressedManifestStaticFilesStorage'
+STORAGES = {
+    'default': {'BACKEND': 'django.core.files.storage.FileSystemStorage'},
+    'staticfiles': {'BACKEND': 'cryptix_app.storage.StaticFilesStorage'},
+}
 STATIC_ROOT = os.path.join(BASE_DIR, "staticfiles")
 
@@ -0,0 +1,105 @@
+# Конфігурація gunicorn для продакшн-запуску (підхоплюється автоматично з робочої директорії).
+# Усі параметри можна перевизначити змінними середовища GUNICORN_*.
+import os
+import subprocess
+import sys
+import threading
+
+
+def cpu_count():
+    try:
+        return len(os.sched_getaffinity(0))
+    except AttributeError:
+        return os.cpu_count() or 1
+
+
+def env_int(name, default):
+    return int(os.environ.get(name, default))
+
+
+bind = os.environ.get('GUNICORN_BIND', f"0.0.0.0:{os.environ.get('PORT', '8000')}")
+
+# gthread - процеси з потоками над WSGI; uvicorn_worker.UvicornWorker - ASGI
+worker_class = os.environ.get('GUNICORN_WORKER_CLASS', 'gthread')
+if 'uvicorn' in worker_class.lower():
+    wsgi_app = 'cryptix_project.asgi:application'
+    # під ASGI довгі SSE-зʼєднання не займають потоків воркера
+    os.environ.setdefault('CRYPTIX_NOTIFICATION_STREAM', '1')
+else:
+    wsgi_app = 'cryptix_project.wsgi:application'
+
+# У locmem-кешу кожен процес має свій кеш, тож інвалідації (ролі в групах,
+# кешований користувач, водяні знаки, ліміти запитів) не дійшли б до інших
+# воркерів. Кілька воркерів - лише зі спільним кешем (file або redis).
+shared_cache = os.environ.get('CRYPTIX_CACHE_BACKEND', 'locmem') != 'locmem'
+workers = env_int('GUNICORN_WORKERS', cpu_count() * 2 + 1 if shared_cache else 1)
+if workers > 1 and not shared_cache:
+    raise RuntimeError('GUNICORN_WORKERS > 1 потребує спільного кешу: CRYPTIX_CACHE_BACKEND=file або redis')
+threads = env_int('GUNICORN_THREADS', 4)
+
+# імпортуємо Django один раз у майстрі, воркери стартують через fork
+preload_app = os.environ.get('GUNICORN_PRELOAD', '1') == '1'
+
+# keep-alive трохи довший за таймаут проксі, щоб не рвати зʼєднання першими
+keepalive = env_int('GUNICORN_KEEPALIVE', 75)
+timeout = env_int('GUNICORN_TIMEOUT', 30)
+graceful_timeout = env_int('GUNICORN_GRACEFUL_TIMEOUT', 30)
+
+# плавний перезапуск воркерів; jitter не дає їм перезапуститись одночасно
+max_requests = env_int('GUNICORN_MAX_REQUESTS', 2000)
+max_requests_jitter = env_int('GUNICORN_MAX_REQUESTS_JITTER', 200)
+
+accesslog = os.environ.get('GUNICORN_ACCESS_LOG', '-')
+errorlog = '-'
+loglevel = os.environ.get('GUNICORN_LOG_LEVEL', 'info')
+# заголовкам X-Forwarded-* віримо лише від локального проксі, інакше клієнт підробить адресу
+forwarded_allow_ips = os.environ.get('FORWARDED_ALLOW_IPS', '127.0.0.1')
+
+
+def post_fork(server, worker):
+    # зʼєднання з БД, відкрите у майстрі під час preload, не можна ділити між процесами
+    from django.db import connections
+    connections.close_all()
+
+
+# -- фоновий воркер --
+# Періодичні задачі (обробка завантажених зображень, очищення видаленого,
+# рейтинг, архів повідомлень) виконує manage.py run_worker. Майстер gunicorn
+# запускає його поруч із веб-воркерами і перезапускає, якщо процес впав.
+# CRYPTIX_RUN_WORKER=0 - коли воркер запущено окремо (інший контейнер, cron).
+# Воркер - окремий процес, тож, як і для кількох веб-воркерів, потрібен
+# спільний кеш: з locmem його інвалідації не дійшли б до веб-процесу.
+run_background_worker = os.environ.get('CRYPTIX_RUN_WORKER', '1' if shared_cache else '0') == '1'
+if run_background_worker and not shared_cache:
+    raise RuntimeError('CRYPTIX_RUN_WORKER=1 потребує спільного кешу: CRYPTIX_CACHE_BACKEND=file або redis')
+background_worker = None
+stopping = threading.Event()
+
+
+def supervise_background_worker(server):
+    global background_worker
+    manage = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'manage.py')
+    while not stopping.is_set():
+        background_worker = subprocess.Popen([sys.executable, manage, 'run_worker'])
+        code = background_worker.wait()
+        if stopping.is_set():
+            return
+        server.log.error('run_worker завершився з кодом %s, перезапуск за 5 с', code)
+        stopping.wait(5)
+
+
+def when_ready(server):
+    if run_background_worker:
+        threading.Thread(target=supervise_background_worker, args=(server,), daemon=True).start()
+    elif not shared_cache:
+        server.log.warning('run_worker не запущено: з locmem-кешем фонові задачі не виконуються')
+
+
+def on_exit(server):
+    stopping.set()
+    if background_worker is not None and background_worker.poll() is None:
+        background_worker.terminate()
+        try:
+            background_worker.wait(graceful_timeout)
+        except subprocess.TimeoutExpired:
+            background_worker.kill()